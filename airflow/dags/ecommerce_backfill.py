@@ -0,0 +1,122 @@
+"""
+Backfill DAG for the E-Commerce Data Quality Pipeline.
+
+Triggered manually with a date range, e.g.
+    airflow dags trigger ecommerce_backfill --conf '{"start": "2025-07-01", "end": "2025-09-30"}'
+
+Each day is one mapped task that replaces that day's slice of the raw,
+staging, quarantine and mart tables (see ecommerce_dq.backfill), so days are
+independent and idempotent. A failed day is retried alone by clearing its
+mapped task instance.
+
+Every task here runs dbt, so all of them take the single slot of the
+dbt_warehouse pool shared with the daily and micro-batch DAGs: a day's
+delete-and-append never overlaps a full rebuild or a micro-batch refresh of
+the same models. The mapped days therefore run one at a time; for parallel
+days outside Airflow, use scripts/backfill.py run --concurrency.
+"""
+
+from datetime import datetime, timedelta
+from airflow import DAG
+from airflow.models.param import Param
+from airflow.operators.python import PythonOperator
+from ecommerce_dq.dag_factory import DBT_POOL
+import os
+
+default_args = {
+    'owner': 'patrick_cheung',
+    'depends_on_past': False,
+    'start_date': datetime(2025, 10, 1),
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 1,
+    'retry_delay': timedelta(minutes=5),
+}
+
+DBT_PROJECT_DIR = os.getenv('DQ_DBT_PROJECT_DIR', '/opt/airflow/dbt')
+DBT_EXECUTABLE = os.getenv('DQ_DBT_EXECUTABLE', 'dbt')
+
+dag = DAG(
+    'ecommerce_backfill',
+    default_args=default_args,
+    description='Backfill a date range as parallel, idempotent per-day partitions',
+    schedule_interval=None,
+    catchup=False,
+    params={
+        'start': Param(type='string', format='date', description='First day to backfill'),
+        'end': Param(type='string', format='date', description='Last day to backfill (inclusive)'),
+    },
+    tags=['data-quality', 'ecommerce', 'backfill'],
+)
+
+
+def plan_backfill(**context):
+    """
+    Expand the requested range into days, one mapped task each, and create
+    any missing day-partitioned table before the days run in parallel.
+    """
+    from ecommerce_dq.backfill import backfill_days, prepare_models
+
+    days = backfill_days(context['params']['start'], context['params']['end'])
+    prepare_models(DBT_PROJECT_DIR, DBT_EXECUTABLE)
+    print(f"✓ Backfilling {len(days)} days ({days[0]} .. {days[-1]}), one at a time")
+    return [{'day': day} for day in days]
+
+
+def backfill_one_day(day: str, **context):
+    """Replace one day's slice of the raw, staging and mart tables."""
+    from ecommerce_dq.backfill import backfill_day
+
+    result = backfill_day(day, DBT_PROJECT_DIR, DBT_EXECUTABLE)
+    print(f"✓ {day}: {result['rows']} rows in {result['seconds']:.1f}s")
+    return result
+
+
+def finish_backfill(**context):
+    """Rebuild the cross-day models and report the backfill's throughput."""
+    from ecommerce_dq.backfill import rebuild_downstream
+    from ecommerce_dq.instrumentation import Instrumentation
+
+    rebuild_downstream(DBT_PROJECT_DIR, DBT_EXECUTABLE)
+
+    results = [r for r in context['ti'].xcom_pull(task_ids='backfill_day') if r]
+    rows = sum(sum(r['rows'].values()) for r in results)
+    elapsed = (datetime.now(context['dag_run'].start_date.tzinfo) - context['dag_run'].start_date).total_seconds()
+    summary = {
+        'days': len(results),
+        'rows': rows,
+        'elapsed_seconds': round(elapsed, 1),
+        'rows_per_sec': round(rows / elapsed, 1) if elapsed else None,
+        'days_per_hour': round(len(results) * 3600 / elapsed, 1) if elapsed else None,
+    }
+    metrics = Instrumentation(task='backfill')
+    for key in ('days', 'rows', 'rows_per_sec', 'days_per_hour'):
+        metrics.metric(f"backfill.{key}", summary[key])
+    print(f"✓ Backfilled {summary['days']} days, {rows} rows in {summary['elapsed_seconds']}s "
+          f"({summary['rows_per_sec']} rows/s, {summary['days_per_hour']} days/h)")
+    return summary
+
+
+plan = PythonOperator(
+    task_id='plan_backfill',
+    python_callable=plan_backfill,
+    pool=DBT_POOL,
+    dag=dag,
+)
+
+# One task instance per day, taking turns on the dbt pool's single slot
+days = PythonOperator.partial(
+    task_id='backfill_day',
+    python_callable=backfill_one_day,
+    pool=DBT_POOL,
+    dag=dag,
+).expand(op_kwargs=plan.output)
+
+finish = PythonOperator(
+    task_id='finish_backfill',
+    python_callable=finish_backfill,
+    pool=DBT_POOL,
+    dag=dag,
+)
+
+days >> finish
@@ -0,0 +1,66 @@
+"""
+Micro-batch DAG for near-real-time events.
+
+Runs continuously, one batch at a time: a deferrable sensor waits on the
+triggerer for new event files, the batch is ingested and the days it touched
+are refreshed in daily_metrics and the other day-partitioned models (see
+ecommerce_dq.microbatch). Each run reports the arrival-to-metrics lag of its
+files against DQ_MICROBATCH_LAG_TARGET_SECONDS. The refresh runs dbt in the
+dbt_warehouse pool with the daily pipeline's dbt steps.
+"""
+
+from datetime import datetime, timedelta
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from ecommerce_dq import microbatch
+from ecommerce_dq.dag_factory import DBT_POOL, DEFERRABLE
+from ecommerce_dq.operators import NewFilesSensor
+from ecommerce_dq.schema import bare_table_name
+
+default_args = {
+    'owner': 'patrick_cheung',
+    'depends_on_past': False,
+    'start_date': datetime(2025, 10, 1),
+    'email_on_failure': False,
+    'email_on_retry': False,
+    'retries': 1,
+    'retry_delay': timedelta(seconds=30),
+}
+
+dag = DAG(
+    'ecommerce_microbatch',
+    default_args=default_args,
+    description='Ingest event files as they land and refresh the days they touch',
+    # A new run starts as soon as the previous one finishes
+    schedule_interval='@continuous',
+    max_active_runs=1,
+    catchup=False,
+    tags=['data-quality', 'ecommerce', 'microbatch'],
+)
+
+wait = NewFilesSensor(
+    task_id='wait_for_event_files',
+    table_name=microbatch.MICROBATCH_TABLE,
+    max_files=microbatch.MAX_FILES,
+    poll_interval=microbatch.POLL_INTERVAL,
+    deferrable=DEFERRABLE,
+    dag=dag,
+)
+
+ingest = PythonOperator(
+    task_id='ingest_event_batch',
+    python_callable=microbatch.ingest_event_batch,
+    # Shares the feed's pool with the daily pipeline's ingest tasks
+    pool=f"ingest_{bare_table_name(microbatch.MICROBATCH_TABLE)}",
+    dag=dag,
+)
+
+refresh = PythonOperator(
+    task_id='refresh_event_days',
+    python_callable=microbatch.refresh_event_days,
+    # Takes turns with the daily pipeline's dbt steps
+    pool=DBT_POOL,
+    dag=dag,
+)
+
+wait >> ingest >> refresh
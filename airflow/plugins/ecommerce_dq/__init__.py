@@ -0,0 +1,6 @@
+"""
+Shared helpers for the e-commerce data quality pipeline.
+
+Lives in the Airflow plugins folder so DAGs and tasks can import it as
+`ecommerce_dq.<module>`.
+"""
@@ -0,0 +1,294 @@
+"""
+Per-day backfills of historical date ranges.
+
+A backfill reprocesses a range of days as independent partitions. Each day:
+1. replaces its slice of the raw fact tables (rows whose partition column
+   falls on the day) with the day's input file, when there is one
+2. runs the dbt models tagged day_partitioned with --vars backfill_day,
+   which replace the same day's slice of the staging, quarantine,
+   intermediate and mart tables (dbt/macros/day_partition.sql)
+
+A day only touches its own slices, so re-running it is idempotent and days
+run in parallel. Models downstream of the day partitions that aggregate
+across days (customer_features) are rebuilt once at the end.
+
+Day inputs live at <DQ_BACKFILL_DIR>/<table>/<YYYY-MM-DD>.csv; split_by_day()
+produces them from full CSV exports. Dimension tables (customers) have no
+partition column and are loaded by the regular ingest.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import pandas as pd
+
+from ecommerce_dq.dedup import DEDUP_STATE_DIR, KeyIndex
+from ecommerce_dq.instrumentation import Instrumentation
+from ecommerce_dq.schema import DATA_DIR, bare_table_name, load_raw_schema, partition_column, primary_key, read_dtypes
+from ecommerce_dq.warehouse import DUCKDB, dbt_target, get_hook, warehouse_backend, warehouse_lock, write_dataframe
+
+BACKFILL_DIR = os.getenv('DQ_BACKFILL_DIR', os.path.join(DATA_DIR, 'backfill'))
+DEFAULT_CONCURRENCY = int(os.getenv('DQ_BACKFILL_CONCURRENCY', '4'))
+SPLIT_CHUNK_ROWS = 500_000
+
+DAY_PARTITIONED_TAG = 'day_partitioned'
+
+# A day outside any data: running the day models for it creates missing tables empty and changes nothing else
+EMPTY_DAY = '1970-01-01'
+
+
+def backfill_days(start, end) -> list:
+    """Days from `start` to `end` inclusive, as YYYY-MM-DD strings."""
+    start, end = date.fromisoformat(str(start)), date.fromisoformat(str(end))
+    if end < start:
+        raise ValueError(f"Backfill end {end} is before start {start}")
+    return [(start + timedelta(days=n)).isoformat() for n in range((end - start).days + 1)]
+
+
+def partitioned_tables() -> list:
+    """Raw tables with a partition column, in schema order."""
+    return [table for table in load_raw_schema() if partition_column(table)]
+
+
+def day_file(table_name: str, day: str, backfill_dir: str = BACKFILL_DIR) -> str:
+    return os.path.join(backfill_dir, bare_table_name(table_name), f"{day}.csv")
+
+
+def row_days(df: pd.DataFrame, table_name: str) -> pd.Series:
+    """YYYY-MM-DD of each row's partition column (NaN when missing or unparseable)."""
+    timestamps = pd.to_datetime(df[partition_column(table_name)].astype(object), errors='coerce')
+    return timestamps.dt.strftime('%Y-%m-%d')
+
+
+def split_by_day(table_name: str, csv_paths: list, backfill_dir: str = BACKFILL_DIR,
+                 chunk_rows: int = SPLIT_CHUNK_ROWS) -> dict:
+    """
+    Split full CSV exports of a raw table into one input file per day,
+    replacing the table's previous day files. Rows without a valid partition
+    timestamp belong to no day and are counted as unassigned.
+    """
+    table = bare_table_name(table_name)
+    table_dir = os.path.join(backfill_dir, table)
+    shutil.rmtree(table_dir, ignore_errors=True)
+    os.makedirs(table_dir)
+
+    days = set()
+    rows = unassigned = 0
+    for csv_path in csv_paths:
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows, dtype=read_dtypes(table)):
+            chunk_days = row_days(chunk, table)
+            unassigned += int(chunk_days.isna().sum())
+            for day, day_rows in chunk.groupby(chunk_days):
+                path = day_file(table, day, backfill_dir)
+                day_rows.to_csv(path, mode='a', header=day not in days, index=False)
+                days.add(day)
+                rows += len(day_rows)
+    return {'table': table, 'days': len(days), 'rows': rows, 'unassigned': unassigned}
+
+
+def day_slice_sql(table_name: str, day: str) -> str:
+    """Predicate selecting a raw table's rows on `day` (raw columns are VARCHAR)."""
+    column = partition_column(table_name)
+    next_day = (date.fromisoformat(day) + timedelta(days=1)).isoformat()
+    return (f"CAST({column} AS TIMESTAMP) >= CAST('{day}' AS TIMESTAMP) "
+            f"AND CAST({column} AS TIMESTAMP) < CAST('{next_day}' AS TIMESTAMP)")
+
+
+def load_raw_day(table_name: str, day: str, backfill_dir: str = BACKFILL_DIR, metrics: Instrumentation = None,
+                 dedup_state_dir: str = DEDUP_STATE_DIR):
+    """
+    Replace one day's slice of a raw table with the day's input file.
+    Returns the rows loaded, or None when the day has no input file (the
+    existing slice is kept and only reprocessed by dbt).
+    Rows outside the day and repeated keys within the day are dropped; loaded
+    keys are recorded in the table's key index so regular loads skip them.
+    A failed load is retried by loading the day again.
+    """
+    table = bare_table_name(table_name)
+    path = day_file(table, day, backfill_dir)
+    if not os.path.exists(path):
+        return None
+    metrics = metrics or Instrumentation(task='backfill', table=table)
+
+    with metrics.span('backfill.raw', day=day, bytes=os.path.getsize(path)) as span:
+        df = pd.read_csv(path, dtype=read_dtypes(table))
+        df = df[row_days(df, table) == day]
+        key = primary_key(table)
+        df = df[df[key].isna() | ~df[key].duplicated(keep='first')]
+
+        conn = get_hook().get_conn()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS raw.{table} (
+                    {', '.join([f"{col} VARCHAR" for col in df.columns])}
+                )
+            """)
+            cursor.execute(f"DELETE FROM raw.{table} WHERE {day_slice_sql(table, day)}")
+            rows = write_dataframe(conn, df, table) if not df.empty else 0
+        finally:
+            cursor.close()
+            conn.close()
+        span['rows'] = rows
+
+    key_index = KeyIndex(table, key, state_dir=dedup_state_dir, partition=f"backfill:{day}")
+    try:
+        key_index.record(df[key])
+    finally:
+        key_index.close()
+    return rows
+
+
+def run_dbt(args: list, project_dir: str, executable: str, target_path: str = None):
+    """
+    Run one dbt invocation, holding the warehouse lock on DuckDB. Concurrent
+    invocations need their own target path (run_results.json, compiled SQL)
+    and log path.
+    """
+    command = [executable, *args, '--target', dbt_target()]
+    if target_path:
+        command += ['--target-path', target_path, '--log-path', target_path]
+    with warehouse_lock():
+        result = subprocess.run(command, cwd=project_dir, env={**os.environ, 'DBT_PROFILES_DIR': project_dir},
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"dbt {' '.join(args)} failed with exit code {result.returncode}:\n{result.stdout[-2000:]}")
+    return result.stdout
+
+
+def day_models_selector(tables: list = None) -> str:
+    """dbt selector of the day-partitioned models, or only those downstream of the raw `tables`."""
+    if not tables:
+        return f"tag:{DAY_PARTITIONED_TAG}"
+    return ' '.join(f"tag:{DAY_PARTITIONED_TAG},source:ecommerce.{bare_table_name(t)}+" for t in tables)
+
+
+def run_dbt_day(day: str, project_dir: str, executable: str = 'dbt', tables: list = None,
+                target_dir: str = 'backfill'):
+    """Rebuild one day's slice of the day-partitioned models (downstream of `tables` only, when given)."""
+    return run_dbt(
+        ['run', '--select', day_models_selector(tables), '--vars', json.dumps({'backfill_day': day})],
+        project_dir, executable, target_path=os.path.join('target', target_dir, day),
+    )
+
+
+def prepare_models(project_dir: str, executable: str = 'dbt'):
+    """
+    Create any missing day-partitioned table before days run in parallel, so
+    concurrent first runs do not each create (and replace) the same table.
+    """
+    return run_dbt(
+        ['run', '--select', f"tag:{DAY_PARTITIONED_TAG}", '--vars', json.dumps({'backfill_day': EMPTY_DAY})],
+        project_dir, executable, target_path=os.path.join('target', 'backfill', 'prepare'),
+    )
+
+
+def rebuild_downstream(project_dir: str, executable: str = 'dbt'):
+    """Rebuild the models downstream of the day partitions that span all days."""
+    return run_dbt(
+        ['run', '--select', f"tag:{DAY_PARTITIONED_TAG}+", '--exclude', f"tag:{DAY_PARTITIONED_TAG}"],
+        project_dir, executable, target_path=os.path.join('target', 'backfill', 'rebuild'),
+    )
+
+
+def backfill_day(day: str, project_dir: str, executable: str = 'dbt', backfill_dir: str = BACKFILL_DIR) -> dict:
+    """Process one day partition: raw slices, then its dbt slices. Returns rows loaded per table."""
+    metrics = Instrumentation(task='backfill')
+    start = time.time()
+    rows = {}
+    for table in partitioned_tables():
+        loaded = load_raw_day(table, day, backfill_dir)
+        if loaded is not None:
+            rows[table] = loaded
+    with metrics.span('backfill.dbt', day=day):
+        run_dbt_day(day, project_dir, executable)
+    seconds = time.time() - start
+    metrics.record_span('backfill.day', start, start + seconds, day=day, rows=sum(rows.values()))
+    return {'day': day, 'rows': rows, 'seconds': round(seconds, 3)}
+
+
+class BackfillProgress:
+    """Thread-safe progress of a backfill: days done, throughput and ETA."""
+
+    def __init__(self, total_days: int, metrics: Instrumentation = None):
+        self.total_days = total_days
+        self.metrics = metrics or Instrumentation(task='backfill')
+        self.started = time.time()
+        self.done = 0
+        self.failed = []
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def summary(self) -> dict:
+        elapsed = max(time.time() - self.started, 1e-9)
+        remaining = self.total_days - self.done - len(self.failed)
+        finished = self.done + len(self.failed)
+        return {
+            'days_done': self.done,
+            'days_failed': len(self.failed),
+            'days_total': self.total_days,
+            'rows': self.rows,
+            'elapsed_seconds': round(elapsed, 1),
+            'rows_per_sec': round(self.rows / elapsed, 1),
+            'days_per_hour': round(finished * 3600 / elapsed, 1),
+            'eta_seconds': round(elapsed / finished * remaining, 1) if finished else None,
+        }
+
+    def day_done(self, result: dict) -> dict:
+        with self._lock:
+            self.done += 1
+            self.rows += sum(result['rows'].values())
+            summary = self.summary()
+        print(f"✓ [{summary['days_done'] + summary['days_failed']}/{self.total_days}] {result['day']}: "
+              f"{sum(result['rows'].values())} rows in {result['seconds']:.1f}s | "
+              f"{summary['rows_per_sec']} rows/s, {summary['days_per_hour']} days/h, ETA {summary['eta_seconds']}s")
+        self.metrics.metric('backfill.days_done', summary['days_done'])
+        self.metrics.metric('backfill.rows_per_sec', summary['rows_per_sec'])
+        return summary
+
+    def day_failed(self, day: str, error: Exception) -> dict:
+        with self._lock:
+            self.failed.append(day)
+            summary = self.summary()
+        print(f"⚠️  [{summary['days_done'] + summary['days_failed']}/{self.total_days}] {day} failed: {error}")
+        self.metrics.metric('backfill.days_failed', summary['days_failed'])
+        return summary
+
+
+def run_backfill(days: list, project_dir: str, executable: str = 'dbt', concurrency: int = DEFAULT_CONCURRENCY,
+                 backfill_dir: str = BACKFILL_DIR, rebuild: bool = True) -> dict:
+    """
+    Backfill `days` with up to `concurrency` days in flight. Failed days are
+    reported and leave the other days untouched; run them again to retry.
+    The cross-day models are rebuilt once every day succeeded.
+    """
+    if warehouse_backend() == DUCKDB and concurrency > 1:
+        # One writer per DuckDB file: dbt processes cannot share it
+        print("⚠️  DuckDB allows a single writer, running days one at a time")
+        concurrency = 1
+
+    metrics = Instrumentation(task='backfill')
+    progress = BackfillProgress(len(days), metrics)
+    with metrics.span('backfill.run', days=len(days), concurrency=concurrency) as span:
+        prepare_models(project_dir, executable)
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+            futures = {pool.submit(backfill_day, day, project_dir, executable, backfill_dir): day for day in days}
+            for future in as_completed(futures):
+                try:
+                    progress.day_done(future.result())
+                except Exception as e:
+                    progress.day_failed(futures[future], e)
+
+        if rebuild and not progress.failed:
+            rebuild_downstream(project_dir, executable)
+        span['rows'] = progress.rows
+
+    summary = progress.summary()
+    summary['failed'] = sorted(progress.failed)
+    return summary
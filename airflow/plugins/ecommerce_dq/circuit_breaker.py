@@ -0,0 +1,176 @@
+"""
+Fail-fast quality gates for the pipeline.
+
+A gate runs a list of scalar SQL checks, each with a severity:
+- BLOCK: a failure opens the breaker and the DAG skips everything downstream
+- WARN: a failure is reported but the pipeline continues
+
+Gates run right after each feed's ingestion (raw checks, generated per
+table from raw_schema.json) and after dbt_test_staging (staging checks), so
+marts and the report are not built on bad data.
+
+A check may name a statistic that ecommerce_dq.table_metadata serves
+without a scan (the raw volume and freshness checks); its SQL runs only
+when that metadata is missing or stale.
+"""
+
+from ecommerce_dq.schema import (
+    RAW_SCHEMA_PATH, bare_table_name, foreign_keys, load_raw_schema, partition_column, table_columns,
+)
+from ecommerce_dq.table_metadata import FRESHNESS_HOURS, ROW_COUNT
+
+BLOCK = 'block'
+WARN = 'warn'
+
+# Mirrors the data quality vars in dbt_project.yml
+MAX_NULL_PERCENTAGE = 0.05
+MIN_COMPLETENESS_SCORE = 0.95
+MAX_QUARANTINE_RATE = 0.05
+FRESHNESS_THRESHOLD_HOURS = 24
+
+
+class Check:
+    """A scalar SQL check with bounds and a severity; `metadata` is a (statistic, table) answering it without the SQL."""
+
+    def __init__(self, name: str, sql: str, severity: str = BLOCK, min_value: float = None,
+                 max_value: float = None, metadata: tuple = None):
+        if severity not in (BLOCK, WARN):
+            raise ValueError(f"Unknown severity '{severity}' for check '{name}'")
+        self.name = name
+        self.sql = sql
+        self.severity = severity
+        self.min_value = min_value
+        self.max_value = max_value
+        self.metadata = metadata
+
+    def passes(self, value) -> bool:
+        """A missing value (e.g. empty table ratio) fails the check."""
+        if value is None:
+            return False
+        if self.min_value is not None and value < self.min_value:
+            return False
+        if self.max_value is not None and value > self.max_value:
+            return False
+        return True
+
+
+def null_rate_sql(table: str, column: str) -> str:
+    return f"""
+            SELECT SUM(CASE WHEN {column} IS NULL THEN 1 ELSE 0 END)::DOUBLE / NULLIF(COUNT(*), 0)
+            FROM {table}
+        """
+
+
+def freshness_hours_sql(table: str, column: str) -> str:
+    """Hours since the newest timestamp in a VARCHAR column."""
+    return f"""
+            SELECT DATEDIFF('second', MAX(CAST({column} AS TIMESTAMP)), CAST(CURRENT_TIMESTAMP AS TIMESTAMP)) / 3600.0
+            FROM {table}
+        """
+
+
+# Raw checks beyond the ones generated from the schema, by feed
+RAW_EXTRA_CHECKS = {
+    'customers': [
+        Check('raw_customers_null_email_rate', null_rate_sql('raw.customers', 'email'), WARN,
+              max_value=MAX_NULL_PERCENTAGE),
+    ],
+}
+
+
+def raw_checks(table_name: str, path: str = RAW_SCHEMA_PATH) -> list:
+    """
+    Raw gate checks of one feed, generated from raw_schema.json: the table
+    was loaded (BLOCK), its newest event is at most FRESHNESS_THRESHOLD_HOURS
+    old when it has a partition column (WARN), and each non-nullable foreign
+    key is null in at most MAX_NULL_PERCENTAGE of the rows (BLOCK). Plus
+    RAW_EXTRA_CHECKS.
+    """
+    table = bare_table_name(table_name)
+    checks = [Check(f"raw_{table}_loaded", f"SELECT COUNT(*) FROM raw.{table}", BLOCK, min_value=1,
+                    metadata=(ROW_COUNT, f"raw.{table}"))]
+    event_column = partition_column(table, path)
+    if event_column:
+        checks.append(Check(f"raw_{table}_freshness_hours", freshness_hours_sql(f"raw.{table}", event_column), WARN,
+                            max_value=FRESHNESS_THRESHOLD_HOURS, metadata=(FRESHNESS_HOURS, f"raw.{table}")))
+    nullable = {col['name']: col.get('nullable', True) for col in table_columns(table, path)}
+    for fk_column in foreign_keys(table, path):
+        if not nullable[fk_column]:
+            checks.append(Check(f"raw_{table}_null_{fk_column}_rate", null_rate_sql(f"raw.{table}", fk_column),
+                                BLOCK, max_value=MAX_NULL_PERCENTAGE))
+    return checks + RAW_EXTRA_CHECKS.get(table, [])
+
+
+# Rows are counted in tables, not in the filtered staging views: a filterless
+# COUNT(*) of a table is served from metadata (stg_<t>_screened holds clean and
+# quarantined rows alike)
+STAGING_CHECKS = [
+    Check(
+        'orders_quarantine_rate',
+        """
+            SELECT q.n::DOUBLE / NULLIF(s.n, 0)
+            FROM (SELECT COUNT(*) as n FROM quarantine.orders) q
+            CROSS JOIN (SELECT COUNT(*) as n FROM staging.stg_orders_screened) s
+        """,
+        BLOCK,
+        max_value=MAX_QUARANTINE_RATE,
+    ),
+    Check(
+        'events_quarantine_rate',
+        """
+            SELECT q.n::DOUBLE / NULLIF(s.n, 0)
+            FROM (SELECT COUNT(*) as n FROM quarantine.events) q
+            CROSS JOIN (SELECT COUNT(*) as n FROM staging.stg_events_screened) s
+        """,
+        BLOCK,
+        max_value=MAX_QUARANTINE_RATE,
+    ),
+    Check(
+        'customers_email_completeness',
+        "SELECT COUNT(email)::DOUBLE / NULLIF(COUNT(*), 0) FROM staging.stg_customers",
+        WARN,
+        min_value=MIN_COMPLETENESS_SCORE,
+    ),
+]
+
+GATES = ('raw', 'staging')
+
+
+def gate_checks(gate: str, table_name: str = None, path: str = RAW_SCHEMA_PATH) -> list:
+    """Checks of a gate; the raw gate runs per feed (`table_name`) or over all feeds."""
+    if gate == 'staging':
+        return STAGING_CHECKS
+    if gate == 'raw':
+        tables = [table_name] if table_name else list(load_raw_schema(path))
+        return [check for table in tables for check in raw_checks(table, path)]
+    raise ValueError(f"Unknown gate '{gate}', expected one of {GATES}")
+
+
+def evaluate_checks(run_scalar, checks: list, read_metadata=None) -> list:
+    """
+    Run each check through `run_scalar(sql) -> value` and return one result
+    dict per check: name, severity, value, passed. With `read_metadata(statistic,
+    table) -> value or None`, checks that name a statistic try it first.
+    """
+    results = []
+    for check in checks:
+        value = read_metadata(*check.metadata) if read_metadata and check.metadata else None
+        if value is None:
+            value = run_scalar(check.sql)
+        results.append({
+            'name': check.name,
+            'severity': check.severity,
+            'value': value,
+            'passed': check.passes(value),
+        })
+    return results
+
+
+def blocking_failures(results: list) -> list:
+    """Results of failed BLOCK checks."""
+    return [r for r in results if r['severity'] == BLOCK and not r['passed']]
+
+
+def should_continue(results: list) -> bool:
+    """True when no blocking check failed (breaker stays closed)."""
+    return not blocking_failures(results)
@@ -0,0 +1,203 @@
+"""
+Builds the data quality pipeline DAG from raw_schema.json.
+
+Every feed (table) in the schema gets its own partition listing, mapped
+ingest tasks in the pool ingest_<table>, and a raw quality gate; feeds are
+ingested after the feeds their foreign keys reference. Adding a feed is a
+schema edit, not a DAG edit.
+
+Parse time only pays for building the tasks: the callables live in
+ecommerce_dq.tasks and import pandas and the warehouse drivers when they
+run (see benchmarks/dag_parse_benchmark.py for the parse budget).
+"""
+
+import os
+
+from airflow import DAG
+from airflow.operators.bash import BashOperator
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
+from airflow.utils.task_group import TaskGroup
+
+from ecommerce_dq import tasks
+from ecommerce_dq.operators import DeferrableCommandOperator, DeferrableWarehouseQueryOperator
+from ecommerce_dq.schema import RAW_SCHEMA_PATH, foreign_keys, load_raw_schema
+from ecommerce_dq.validation import QUALITY_REPORT_SQL, quality_checks
+from ecommerce_dq.warehouse import dbt_target, locked_command
+
+# dbt steps, quality validation and the report defer to the triggerer while the
+# warehouse works instead of holding a worker slot (needs a running triggerer)
+DEFERRABLE = os.getenv('DQ_DEFERRABLE', 'true').lower() == 'true'
+
+# One slot shared by every task that runs dbt, here and in the micro-batch and backfill DAGs, so
+# two dbt invocations never build the same models at once. Created with include_deferred,
+# so a deferred dbt step keeps its slot while the triggerer watches it.
+DBT_POOL = 'dbt_warehouse'
+
+# (task_id, dbt command, selected models, schemas read); the staging gate runs between the two layers.
+# The rows in the schemas read size each step's warehouse (ecommerce_dq.sizing)
+DBT_STEPS = [
+    ('dbt_run_staging', 'run', 'staging.* quarantine.*', ['raw']),
+    ('dbt_test_staging', 'test', 'staging.* quarantine.*', ['staging', 'quarantine']),
+    ('dbt_run_mart', 'run', 'intermediate.* mart.*', ['staging']),
+    ('dbt_test_mart', 'test', 'intermediate.* mart.*', ['intermediate', 'mart']),
+]
+
+
+def ingest_order(path: str = RAW_SCHEMA_PATH) -> dict:
+    """{table: [parent tables]} for the feeds in the schema, parents first."""
+    parents = {
+        table: sorted({parent for parent, _ in foreign_keys(table, path).values()} - {table})
+        for table in load_raw_schema(path)
+    }
+    ordered = {}
+    while len(ordered) < len(parents):
+        ready = [t for t in parents if t not in ordered and all(p in ordered or p not in parents for p in parents[t])]
+        if not ready:
+            raise ValueError(f"Foreign key cycle between feeds {sorted(set(parents) - set(ordered))}")
+        for table in ready:
+            ordered[table] = [p for p in parents[table] if p in parents]
+    return ordered
+
+
+def build_ingest_group(dag: DAG, path: str = RAW_SCHEMA_PATH) -> TaskGroup:
+    """Per feed: list partitions >> mapped ingest >> raw quality gate."""
+    with TaskGroup('ingest_data', tooltip='Ingest CSV data to Snowflake', dag=dag) as ingest_group:
+        ingest_tasks = {}
+        for table, parents in ingest_order(path).items():
+            list_partitions = PythonOperator(
+                task_id=f"list_{table}_partitions",
+                python_callable=tasks.list_ingest_partitions,
+                op_kwargs={'table_name': f"raw.{table}"},
+                dag=dag,
+            )
+
+            # One task instance per partition, running in parallel up to the table's pool slots
+            ingest_tasks[table] = PythonOperator.partial(
+                task_id=f"ingest_{table}",
+                python_callable=tasks.ingest_csv_to_snowflake,
+                pool=f"ingest_{table}",
+                dag=dag,
+            ).expand(op_kwargs=list_partitions.output)
+
+            # Foreign keys are probed against the key sets built by the parent feeds' ingest
+            for parent in parents:
+                ingest_tasks[parent] >> ingest_tasks[table]
+
+            # Circuit breaker on the feed's raw data, before any dbt model is built
+            ingest_tasks[table] >> ShortCircuitOperator(
+                task_id=f"{table}_quality_gate",
+                python_callable=tasks.run_quality_gate,
+                op_kwargs={'gate': 'raw', 'table_name': f"raw.{table}"},
+                # Skips by trigger rule, so alert_on_issues (all_done) still runs
+                ignore_downstream_trigger_rules=False,
+                dag=dag,
+            )
+    return ingest_group
+
+
+def build_dbt_group(dag: DAG) -> TaskGroup:
+    """dbt deps, then run/test of the staging and mart layers with the staging gate in between."""
+    target = dbt_target()
+    # Environment for the dbt tasks, on top of the worker's (SNOWFLAKE_*, DQ_DUCKDB_PATH)
+    env = {'DBT_PROFILES_DIR': tasks.DBT_PROJECT_DIR}
+
+    with TaskGroup('dbt_transformation', tooltip='Run DBT models', dag=dag) as dbt_group:
+        steps = [BashOperator(
+            task_id='dbt_deps',
+            bash_command=f"cd {tasks.DBT_PROJECT_DIR} && {tasks.DBT_EXECUTABLE} deps",
+            dag=dag,
+            env=env,
+            append_env=True,
+        )]
+        for task_id, command, models, input_schemas in DBT_STEPS:
+            if task_id == 'dbt_run_mart':
+                # Circuit breaker: skip mart builds when staging checks fail
+                steps.append(ShortCircuitOperator(
+                    task_id='staging_quality_gate',
+                    python_callable=tasks.run_quality_gate,
+                    op_kwargs={'gate': 'staging'},
+                    ignore_downstream_trigger_rules=False,
+                    dag=dag,
+                ))
+            steps.append(DeferrableCommandOperator(
+                task_id=task_id,
+                # On DuckDB, dbt takes turns with every other process using the warehouse file
+                bash_command=locked_command(f"cd {tasks.DBT_PROJECT_DIR} && {tasks.DBT_EXECUTABLE} {command} "
+                                            f"--target {target} --models {models}"),
+                dag=dag,
+                on_success_callback=tasks.report_dbt_metrics,
+                on_failure_callback=tasks.report_dbt_metrics,
+                env=env,
+                append_env=True,
+                deferrable=DEFERRABLE,
+                pool=DBT_POOL,
+                sizing_step=task_id,
+                sizing_schemas=input_schemas,
+            ))
+        for upstream, downstream in zip(steps, steps[1:]):
+            upstream >> downstream
+
+        # Versioned Arrow cache of the feature tables for training jobs, once the mart passed its tests
+        dbt_group.get_child_by_label('dbt_test_mart') >> PythonOperator(
+            task_id='export_feature_cache',
+            python_callable=tasks.export_feature_cache,
+            dag=dag,
+        )
+    return dbt_group
+
+
+def build_pipeline_dag(dag_id: str, default_args: dict, description: str, schedule_interval='@daily',
+                       tags: list = None, path: str = RAW_SCHEMA_PATH) -> DAG:
+    """The pipeline DAG for the feeds in the raw schema at `path`."""
+    dag = DAG(
+        dag_id,
+        default_args=default_args,
+        description=description,
+        schedule_interval=schedule_interval,
+        catchup=False,
+        tags=tags,
+    )
+
+    # Task: Initialize warehouse schemas
+    init_snowflake = PythonOperator(
+        task_id='init_snowflake',
+        python_callable=tasks.init_warehouse,
+        dag=dag,
+    )
+
+    ingest_group = build_ingest_group(dag, path)
+    dbt_group = build_dbt_group(dag)
+
+    # Task: Data quality validation; the first row of each query is pushed to XCom as
+    # quality_results, a QueryResult per check read by column alias
+    validate_quality = DeferrableWarehouseQueryOperator(
+        task_id='validate_quality',
+        queries=quality_checks(path),
+        xcom_key='quality_results',
+        deferrable=DEFERRABLE,
+        sizing_step='validate_quality',
+        sizing_schemas=['staging', 'quarantine'],
+        dag=dag,
+    )
+
+    # Task: Alert on issues, including a circuit breaker that skipped validation
+    alert_task = PythonOperator(
+        task_id='alert_on_issues',
+        python_callable=tasks.alert_on_quality_issues,
+        op_kwargs={'gate_task_ids': sorted(t.task_id for t in dag.tasks if isinstance(t, ShortCircuitOperator))},
+        trigger_rule='all_done',
+        dag=dag,
+    )
+
+    # Task: Generate quality report
+    generate_report = DeferrableWarehouseQueryOperator(
+        task_id='generate_quality_report',
+        queries={'data_quality_report': QUALITY_REPORT_SQL},
+        deferrable=DEFERRABLE,
+        sizing_step='generate_quality_report',
+        sizing_schemas=['staging', 'quarantine', 'mart'],
+        dag=dag,
+    )
+
+    init_snowflake >> ingest_group >> dbt_group >> validate_quality >> [alert_task, generate_report]
+    return dag
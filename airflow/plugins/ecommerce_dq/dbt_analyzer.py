@@ -0,0 +1,225 @@
+"""
+Performance analysis of dbt invocations.
+
+After each dbt run/test step, `analyze_run()` reads target/run_results.json
+and target/manifest.json and:
+- appends every node's execution time, rows affected and bytes scanned to a
+  persistent history (<DQ_DATA_DIR>/state/dbt_history/history.sqlite)
+- computes the critical path through the executed nodes' dependency graph
+- flags nodes whose runtime regressed beyond a tolerance against the median
+  of their recent successful runs
+- reports the node that dominates end-to-end latency
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+
+from ecommerce_dq.schema import DATA_DIR
+
+DBT_HISTORY_DIR = os.getenv('DQ_DBT_HISTORY_DIR', os.path.join(DATA_DIR, 'state', 'dbt_history'))
+
+# Regression detection
+DEFAULT_TOLERANCE = 0.5
+MIN_REGRESSION_SECONDS = 1.0
+HISTORY_WINDOW = 10
+MIN_HISTORY_RUNS = 3
+
+SUCCESS_STATUSES = ('success', 'pass')
+
+
+def load_json(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_nodes(run_results: dict, bytes_scanned: dict = None) -> list:
+    """
+    Flatten run_results into one record per node.
+    `bytes_scanned` maps query IDs to bytes scanned (from the warehouse
+    query history); adapters that report bytes in adapter_response are used directly.
+    """
+    bytes_scanned = bytes_scanned or {}
+    nodes = []
+    for result in run_results['results']:
+        adapter_response = result.get('adapter_response') or {}
+        query_id = adapter_response.get('query_id')
+        nodes.append({
+            'unique_id': result['unique_id'],
+            'resource_type': result['unique_id'].split('.')[0],
+            'status': result['status'],
+            'execution_time': result['execution_time'],
+            'rows_affected': adapter_response.get('rows_affected'),
+            'bytes_scanned': bytes_scanned.get(query_id, adapter_response.get('bytes_processed')),
+            'query_id': query_id,
+        })
+    return nodes
+
+
+def critical_path(nodes: list, manifest: dict) -> tuple:
+    """
+    Longest execution-time path through the dependency graph of the executed
+    nodes. Returns (path of unique_ids, total seconds).
+    """
+    durations = {node['unique_id']: node['execution_time'] for node in nodes}
+    manifest_nodes = manifest.get('nodes', {})
+    parents = {
+        unique_id: [p for p in manifest_nodes.get(unique_id, {}).get('depends_on', {}).get('nodes', [])
+                    if p in durations]
+        for unique_id in durations
+    }
+
+    finish = {}
+    previous = {}
+
+    def longest_to(unique_id):
+        # Iterative DFS so deep graphs do not hit the recursion limit
+        stack = [unique_id]
+        while stack:
+            current = stack[-1]
+            pending = [p for p in parents[current] if p not in finish]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            if current in finish:
+                continue
+            best = max(parents[current], key=lambda p: finish[p], default=None)
+            previous[current] = best
+            finish[current] = durations[current] + (finish[best] if best else 0.0)
+
+    for unique_id in durations:
+        longest_to(unique_id)
+
+    if not finish:
+        return [], 0.0
+    end = max(finish, key=finish.get)
+    total = finish[end]
+    path = []
+    while end:
+        path.append(end)
+        end = previous[end]
+    return path[::-1], round(total, 3)
+
+
+class RunHistory:
+    """Persistent per-node execution history of dbt invocations."""
+
+    def __init__(self, state_dir: str = DBT_HISTORY_DIR):
+        os.makedirs(state_dir, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(state_dir, 'history.sqlite'))
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS node_runs (
+                invocation_id TEXT,
+                generated_at TEXT,
+                step TEXT,
+                unique_id TEXT,
+                resource_type TEXT,
+                status TEXT,
+                execution_time REAL,
+                rows_affected INTEGER,
+                bytes_scanned INTEGER,
+                query_id TEXT,
+                PRIMARY KEY (invocation_id, unique_id)
+            )
+        """)
+
+    def record(self, invocation_id: str, generated_at: str, step: str, nodes: list):
+        """Store one invocation; re-recording the same invocation replaces it."""
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO node_runs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(invocation_id, generated_at, step, n['unique_id'], n['resource_type'], n['status'],
+                  n['execution_time'], n['rows_affected'], n['bytes_scanned'], n['query_id'])
+                 for n in nodes],
+            )
+
+    def recent_times(self, unique_id: str, before_invocation: str, window: int = HISTORY_WINDOW) -> list:
+        """Execution times of the node's latest successful runs from other invocations."""
+        rows = self.conn.execute(
+            f"""
+                SELECT execution_time FROM node_runs
+                WHERE unique_id = ? AND invocation_id != ?
+                  AND status IN ({', '.join('?' for _ in SUCCESS_STATUSES)})
+                ORDER BY generated_at DESC
+                LIMIT ?
+            """,
+            (unique_id, before_invocation, *SUCCESS_STATUSES, window),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def find_regressions(nodes: list, history: RunHistory, invocation_id: str,
+                     tolerance: float = DEFAULT_TOLERANCE,
+                     min_seconds: float = MIN_REGRESSION_SECONDS) -> list:
+    """
+    Nodes slower than their historical median by more than `tolerance`
+    (relative) and `min_seconds` (absolute, to ignore noise on tiny nodes).
+    """
+    regressions = []
+    for node in nodes:
+        times = history.recent_times(node['unique_id'], invocation_id)
+        if len(times) < MIN_HISTORY_RUNS:
+            continue
+        baseline = statistics.median(times)
+        slowdown = node['execution_time'] - baseline
+        if slowdown > min_seconds and node['execution_time'] > baseline * (1 + tolerance):
+            regressions.append({
+                'unique_id': node['unique_id'],
+                'execution_time': node['execution_time'],
+                'baseline': round(baseline, 3),
+                'slowdown_pct': round(slowdown / baseline * 100, 1) if baseline else None,
+            })
+    return regressions
+
+
+def analyze_run(run_results_path: str, manifest_path: str, step: str, history: RunHistory = None,
+                bytes_scanned: dict = None, tolerance: float = DEFAULT_TOLERANCE) -> dict:
+    """
+    Record a dbt invocation in the history and return its performance report:
+    critical path, dominant node and regressions.
+    """
+    run_results = load_json(run_results_path)
+    manifest = load_json(manifest_path) if os.path.exists(manifest_path) else {}
+    nodes = parse_nodes(run_results, bytes_scanned)
+
+    invocation_id = run_results['metadata'].get('invocation_id') or run_results['metadata']['generated_at']
+    own_history = history is None
+    history = history or RunHistory()
+    try:
+        history.record(invocation_id, run_results['metadata']['generated_at'], step, nodes)
+        regressions = find_regressions(nodes, history, invocation_id, tolerance)
+    finally:
+        if own_history:
+            history.close()
+
+    path, path_seconds = critical_path(nodes, manifest)
+    durations = {node['unique_id']: node['execution_time'] for node in nodes}
+    dominant = max(path, key=durations.get) if path else None
+    elapsed = run_results.get('elapsed_time') or 0
+
+    return {
+        'step': step,
+        'invocation_id': invocation_id,
+        'nodes': len(nodes),
+        'elapsed_time': elapsed,
+        'critical_path': path,
+        'critical_path_seconds': path_seconds,
+        'dominant_node': dominant,
+        'dominant_share': round(durations[dominant] / elapsed, 3) if dominant and elapsed else None,
+        'regressions': regressions,
+    }
+
+
+def bytes_scanned_sql(query_ids: list) -> str:
+    """Snowflake query-history lookup of bytes scanned for the given query IDs."""
+    ids = ', '.join(f"'{query_id}'" for query_id in query_ids)
+    return f"""
+        SELECT query_id, bytes_scanned
+        FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY(RESULT_LIMIT => 10000))
+        WHERE query_id IN ({ids})
+    """
@@ -0,0 +1,289 @@
+"""
+Cross-run deduplication for ingestion, backed by a persistent key index.
+
+Each raw table keeps an index under <DQ_DATA_DIR>/state/dedup/<table>/:
+- a Bloom filter (bloom.npy + bloom.json) that answers "definitely new"
+  for most keys without touching disk
+- an exact SQLite key store (keys.sqlite) consulted only for the keys the
+  Bloom filter reports as possibly seen
+
+Keys are staged by `filter_new()` and only persisted by `commit()`, so a
+failed load can be retried without its rows being dropped as duplicates.
+
+Several partitions of one table may be ingested in parallel (mapped ingest
+tasks). `filter_new()` therefore claims its new keys in the store under a
+per-table file lock, and keys claimed by another in-flight partition count
+as duplicates. Claims left by an earlier attempt (task try) of the same
+partition, or older than CLAIM_TTL_SECONDS, are ignored so a crashed load
+can be retried. A live claim of the same partition by another load, e.g. the
+daily and micro-batch ingests of one landed file, still counts.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from ecommerce_dq.locks import FileLock, replace_file
+from ecommerce_dq.schema import DATA_DIR, bare_table_name
+
+DEDUP_STATE_DIR = os.getenv('DQ_DEDUP_STATE_DIR', os.path.join(DATA_DIR, 'state', 'dedup'))
+
+# Bloom filter sizing
+DEFAULT_CAPACITY = 1_000_000
+DEFAULT_ERROR_RATE = 0.001
+LOOKUP_BATCH_SIZE = 50_000
+
+# Claims older than this are treated as abandoned
+CLAIM_TTL_SECONDS = 6 * 3600
+
+
+def hash_keys(keys: pd.Series) -> np.ndarray:
+    """Vectorized, process-stable 64-bit hashes of key values."""
+    return pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy()
+
+
+class BloomFilter:
+    """Numpy-backed Bloom filter over 64-bit key hashes (double hashing)."""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: np.ndarray = None, count: int = 0,
+                 generation: int = 0):
+        self.num_bits = int(num_bits)
+        self.num_hashes = int(num_hashes)
+        self.bits = bits if bits is not None else np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+        self.count = count
+        self.generation = generation
+
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = DEFAULT_ERROR_RATE):
+        """Size a filter for `capacity` keys at the target false positive rate."""
+        capacity = max(int(capacity), 1)
+        num_bits = int(-capacity * np.log(error_rate) / (np.log(2) ** 2))
+        num_hashes = max(1, int(round(num_bits / capacity * np.log(2))))
+        return cls(num_bits, num_hashes)
+
+    @property
+    def capacity(self) -> int:
+        """Number of keys the filter was sized for."""
+        return int(self.num_bits * np.log(2) / self.num_hashes)
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        h1 = hashes.astype(np.uint64)
+        h2 = (h1 * np.uint64(0x9E3779B97F4A7C15)) >> np.uint64(17) | np.uint64(1)
+        rounds = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1[:, None] + rounds[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def add(self, hashes: np.ndarray):
+        """Add key hashes to the filter."""
+        if len(hashes) == 0:
+            return
+        positions = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), (1 << (positions & np.uint64(7))).astype(np.uint8))
+        self.count += len(hashes)
+
+    def might_contain(self, hashes: np.ndarray) -> np.ndarray:
+        """Boolean mask: False means the key was definitely never added."""
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(hashes)
+        hits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return hits.all(axis=1)
+
+    def save(self, directory: str):
+        """Persist the filter bits and sizing to `directory`, bumping its generation."""
+        self.generation += 1
+        meta = {'num_bits': self.num_bits, 'num_hashes': self.num_hashes, 'count': self.count,
+                'generation': self.generation}
+        replace_file(os.path.join(directory, 'bloom.npy'), lambda f: np.save(f, self.bits))
+        replace_file(os.path.join(directory, 'bloom.json'), lambda f: f.write(json.dumps(meta).encode()))
+
+    @staticmethod
+    def saved_generation(directory: str):
+        """Generation of the filter saved in `directory`, or None if there is none."""
+        meta_path = os.path.join(directory, 'bloom.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f).get('generation', 0)
+
+    @classmethod
+    def load(cls, directory: str):
+        """Load a filter saved with `save()`, or None if there is none."""
+        meta_path = os.path.join(directory, 'bloom.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        bits = np.load(os.path.join(directory, 'bloom.npy'))
+        return cls(meta['num_bits'], meta['num_hashes'], bits=bits, count=meta['count'],
+                   generation=meta.get('generation', 0))
+
+
+class KeyIndex:
+    """Persistent primary-key index used to drop duplicates before load."""
+
+    def __init__(self, table_name: str, key_column: str, state_dir: str = DEDUP_STATE_DIR,
+                 capacity: int = DEFAULT_CAPACITY, partition: str = None, attempt: int = 1):
+        self.table_name = bare_table_name(table_name)
+        self.key_column = key_column
+        self.directory = os.path.join(state_dir, self.table_name)
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Claims are owned by this load; `partition` identifies the input, `attempt` the retry of it
+        self.partition = partition or self.table_name
+        self.attempt = attempt
+        self.token = uuid.uuid4().hex
+        self.lock = FileLock(os.path.join(self.directory, 'lock'))
+
+        self.conn = sqlite3.connect(os.path.join(self.directory, 'keys.sqlite'), timeout=60)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY) WITHOUT ROWID")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS claims (
+                key TEXT PRIMARY KEY, partition TEXT, token TEXT, claimed_at REAL, attempt INTEGER
+            ) WITHOUT ROWID
+        """)
+        if 'attempt' not in {row[1] for row in self.conn.execute("PRAGMA table_info(claims)")}:
+            # Stores created before claims recorded their attempt
+            self.conn.execute("ALTER TABLE claims ADD COLUMN attempt INTEGER DEFAULT 1")
+
+        with self.lock:
+            self.bloom = BloomFilter.load(self.directory) or BloomFilter.for_capacity(capacity)
+        self._staged = pd.Series([], dtype=object)
+
+    def _refresh_bloom(self):
+        """Reload the filter if another load committed since it was read (call under the lock)."""
+        generation = BloomFilter.saved_generation(self.directory)
+        if generation is not None and generation != self.bloom.generation:
+            self.bloom = BloomFilter.load(self.directory)
+
+    def _live_claims(self) -> tuple:
+        """SQL filter and parameters for keys claimed by other in-flight loads."""
+        return (
+            "l.token != ? AND NOT (l.partition = ? AND l.attempt < ?) AND l.claimed_at > ?",
+            (self.token, self.partition, self.attempt, time.time() - CLAIM_TTL_SECONDS),
+        )
+
+    def _has_live_claims(self) -> bool:
+        condition, params = self._live_claims()
+        return self.conn.execute(f"SELECT 1 FROM claims l WHERE {condition} LIMIT 1", params).fetchone() is not None
+
+    def _seen_in_store(self, keys: pd.Series, include_claims: bool = False) -> set:
+        """Exact lookup of candidate keys in the on-disk store (and other loads' claims)."""
+        seen = set()
+        values = keys.tolist()
+        condition, params = self._live_claims()
+        for start in range(0, len(values), LOOKUP_BATCH_SIZE):
+            batch = values[start:start + LOOKUP_BATCH_SIZE]
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS candidates (key TEXT PRIMARY KEY) WITHOUT ROWID")
+            self.conn.execute("DELETE FROM candidates")
+            self.conn.executemany("INSERT OR IGNORE INTO candidates VALUES (?)", ((k,) for k in batch))
+            seen.update(row[0] for row in self.conn.execute(
+                "SELECT c.key FROM candidates c JOIN keys k ON k.key = c.key"
+            ))
+            if include_claims:
+                seen.update(row[0] for row in self.conn.execute(
+                    f"SELECT c.key FROM candidates c JOIN claims l ON l.key = c.key WHERE {condition}", params
+                ))
+        return seen
+
+    def filter_new(self, df: pd.DataFrame):
+        """
+        Drop rows whose key repeats within `df`, was committed by an earlier load
+        or is claimed by a load still in flight. The remaining keys are claimed.
+        Rows with a null key are kept (not_null tests report those).
+        Returns the filtered DataFrame and a dict of dedup stats.
+        """
+        keys = df[self.key_column]
+        has_key = keys.notna()
+
+        in_file_dup = has_key & keys.duplicated(keep='first')
+        candidates = has_key & ~in_file_dup
+
+        cross_load_dup = pd.Series(False, index=df.index)
+        candidate_keys = keys[candidates].astype(str)
+        with self.lock:
+            self._refresh_bloom()
+            maybe_seen = self.bloom.might_contain(hash_keys(candidate_keys))
+            if self._has_live_claims():
+                # Other loads' claims are not in the filter: check every candidate exactly
+                seen = self._seen_in_store(candidate_keys, include_claims=True)
+                cross_load_dup[candidate_keys.index] = candidate_keys.isin(seen).to_numpy()
+            elif maybe_seen.any():
+                seen = self._seen_in_store(candidate_keys[maybe_seen])
+                cross_load_dup[candidate_keys.index] = candidate_keys.isin(seen).to_numpy()
+            if not self._staged.empty:
+                cross_load_dup[candidate_keys.index] |= candidate_keys.isin(self._staged).to_numpy()
+
+            keep = ~(in_file_dup | cross_load_dup)
+            new_keys = keys[keep & has_key].astype(str)
+            claimed_at = time.time()
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO claims VALUES (?, ?, ?, ?, ?)",
+                    ((k, self.partition, self.token, claimed_at, self.attempt) for k in new_keys),
+                )
+        self._staged = pd.concat([self._staged, new_keys], ignore_index=True)
+
+        stats = {
+            'input_rows': len(df),
+            'in_file_duplicates': int(in_file_dup.sum()),
+            'cross_load_duplicates': int(cross_load_dup.sum()),
+            'output_rows': int(keep.sum()),
+        }
+        return df[keep], stats
+
+    def commit(self):
+        """Persist keys staged by `filter_new()` after a successful load."""
+        if self._staged.empty:
+            return
+        with self.lock:
+            with self.conn:
+                self.conn.execute("INSERT OR IGNORE INTO keys SELECT key FROM claims WHERE token = ?", (self.token,))
+                self.conn.execute("DELETE FROM claims WHERE token = ?", (self.token,))
+
+            self._refresh_bloom()
+            if self.bloom.count + len(self._staged) > self.bloom.capacity:
+                self._rebuild_bloom(2 * (self.bloom.count + len(self._staged)))
+            else:
+                self.bloom.add(hash_keys(self._staged))
+            self.bloom.save(self.directory)
+        self._staged = pd.Series([], dtype=object)
+
+    def record(self, keys: pd.Series):
+        """
+        Remember keys loaded without `filter_new()`, e.g. by a backfill that
+        replaces a day's slice, so regular loads still drop them.
+        """
+        keys = keys.dropna().astype(str).drop_duplicates()
+        claimed_at = time.time()
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO claims VALUES (?, ?, ?, ?, ?)",
+                    ((k, self.partition, self.token, claimed_at, self.attempt) for k in keys),
+                )
+        self._staged = pd.concat([self._staged, keys], ignore_index=True)
+        self.commit()
+
+    def abort(self):
+        """Release the claims of a failed load so other partitions can load those keys."""
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM claims WHERE token = ?", (self.token,))
+        self._staged = pd.Series([], dtype=object)
+
+    def _rebuild_bloom(self, capacity: int):
+        """Resize the Bloom filter from the exact store once it fills up."""
+        generation = self.bloom.generation
+        self.bloom = BloomFilter.for_capacity(capacity)
+        self.bloom.generation = generation
+        for chunk in pd.read_sql_query("SELECT key FROM keys", self.conn, chunksize=LOOKUP_BATCH_SIZE):
+            self.bloom.add(hash_keys(chunk['key']))
+
+    def close(self):
+        """Close the key store connection."""
+        self.conn.close()
@@ -0,0 +1,231 @@
+"""
+Submit-and-poll primitives behind the deferrable operators.
+
+A deferrable task submits its work, hands polling to the triggerer and
+resumes on completion, so it holds no worker slot while the warehouse is
+busy. Everything here is addressed by plain strings (query IDs, run
+directories) that survive serialization into a trigger.
+
+Warehouse queries:
+- snowflake: asynchronous queries (cursor.execute_async); status from the
+  connection, columns and first row fetched by query ID on resume
+- duckdb: a local stand-in that runs each query in a detached process and
+  records its status, columns and first row under <DQ_DATA_DIR>/state/deferred/queries/
+
+Commands (dbt) are launched detached, writing their output and exit code to
+a run directory the triggerer polls. While a command runs its wrapper touches
+a heartbeat file there; a command whose heartbeat goes stale without an exit
+code (killed, or its worker restarted) is reported as failed instead of being
+waited on forever.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+from ecommerce_dq.locks import replace_file
+from ecommerce_dq.schema import DATA_DIR
+from ecommerce_dq.warehouse import DUCKDB, DuckDBHook, get_hook, use_warehouse, warehouse_backend
+
+DEFERRED_STATE_DIR = os.getenv('DQ_DEFERRED_STATE_DIR', os.path.join(DATA_DIR, 'state', 'deferred'))
+
+# Heartbeat period of a detached command, and how stale the heartbeat may get before it counts as gone
+HEARTBEAT_SECONDS = float(os.getenv('DQ_COMMAND_HEARTBEAT_SECONDS', '10'))
+HEARTBEAT_TIMEOUT_SECONDS = float(os.getenv('DQ_COMMAND_HEARTBEAT_TIMEOUT_SECONDS', '120'))
+
+RUNNING = 'running'
+SUCCESS = 'success'
+ERROR = 'error'
+
+# Detached processes import ecommerce_dq from the plugins directory
+PLUGINS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _detached_env(env: dict = None) -> dict:
+    env = dict(os.environ if env is None else env)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in (PLUGINS_DIR, env.get('PYTHONPATH')) if p)
+    return env
+
+
+class SnowflakeQueryClient:
+    """Asynchronous Snowflake queries on one connection."""
+
+    def __init__(self):
+        self.conn = get_hook().get_conn()
+
+    def use_warehouse(self, warehouse: str = None):
+        """Run the queries submitted from now on on `warehouse`."""
+        use_warehouse(self.conn, warehouse)
+
+    def submit(self, sql: str) -> str:
+        with self.conn.cursor() as cursor:
+            cursor.execute_async(sql)
+            return cursor.sfqid
+
+    def status(self, query_id: str) -> tuple:
+        """(state, error message) of a submitted query."""
+        from snowflake.connector.errors import ProgrammingError
+
+        try:
+            status = self.conn.get_query_status_throw_if_error(query_id)
+        except ProgrammingError as e:
+            return ERROR, str(e)
+        return (RUNNING if self.conn.is_still_running(status) else SUCCESS), None
+
+    def fetch_first(self, query_id: str) -> tuple:
+        """(column names, first row) of a finished query."""
+        with self.conn.cursor() as cursor:
+            cursor.get_results_from_sfqid(query_id)
+            row = cursor.fetchone()
+            return [description[0] for description in cursor.description], row
+
+    def close(self):
+        self.conn.close()
+
+
+class LocalQueryClient:
+    """Local stand-in for asynchronous queries: one detached process per query against DuckDB."""
+
+    def __init__(self, state_dir: str = None, database_path: str = None):
+        self.directory = os.path.join(state_dir or DEFERRED_STATE_DIR, 'queries')
+        self.database_path = database_path or DuckDBHook().path
+        os.makedirs(self.directory, exist_ok=True)
+
+    def use_warehouse(self, warehouse: str = None):
+        """DuckDB has no warehouses."""
+
+    def _path(self, query_id: str, suffix: str) -> str:
+        return os.path.join(self.directory, f"{query_id}.{suffix}")
+
+    def submit(self, sql: str) -> str:
+        query_id = uuid.uuid4().hex
+        with open(self._path(query_id, 'sql'), 'w') as f:
+            f.write(sql)
+        subprocess.Popen(
+            [sys.executable, '-m', 'ecommerce_dq.deferral', self._path(query_id, 'sql'), self.database_path],
+            env=_detached_env(),
+            start_new_session=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return query_id
+
+    def _result(self, query_id: str):
+        path = self._path(query_id, 'json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def status(self, query_id: str) -> tuple:
+        result = self._result(query_id)
+        if result is None:
+            return RUNNING, None
+        return result['status'], result.get('error')
+
+    def fetch_first(self, query_id: str) -> tuple:
+        result = self._result(query_id)
+        row = result['row']
+        return result['columns'], (tuple(row) if row is not None else None)
+
+    def close(self):
+        pass
+
+
+def query_client(backend: str = None):
+    """Async query client for the configured (or given) backend."""
+    if (backend or warehouse_backend()) == DUCKDB:
+        return LocalQueryClient()
+    return SnowflakeQueryClient()
+
+
+def check_queries(client, query_ids: dict, finished: dict) -> dict:
+    """
+    Poll named queries once. `finished` collects the time each query was first
+    seen complete. Returns an event dict whose status is RUNNING until every
+    query succeeded, or ERROR on the first failure.
+    """
+    for name, query_id in query_ids.items():
+        if name in finished:
+            continue
+        state, message = client.status(query_id)
+        if state == ERROR:
+            return {'status': ERROR, 'query': name, 'query_id': query_id, 'message': message}
+        if state == SUCCESS:
+            finished[name] = time.time()
+    status = SUCCESS if len(finished) == len(query_ids) else RUNNING
+    return {'status': status, 'query_ids': query_ids, 'finished': finished}
+
+
+def run_query(sql_path: str, database_path: str):
+    """Entry point of the detached stand-in process: run one query, record status, columns and first row."""
+    with open(sql_path) as f:
+        sql = f.read()
+    try:
+        with DuckDBHook(database_path).get_conn() as conn:
+            cursor = conn.execute(sql)
+            row = cursor.fetchone()
+            columns = [description[0] for description in cursor.description]
+        result = {'status': SUCCESS, 'columns': columns, 'row': list(row) if row is not None else None}
+    except Exception as e:
+        result = {'status': ERROR, 'error': str(e)}
+    result_path = sql_path[:-len('.sql')] + '.json'
+    replace_file(result_path, lambda f: f.write(json.dumps(result, default=str).encode()))
+
+
+def launch_command(command: str, run_dir: str, env: dict = None, heartbeat_seconds: float = HEARTBEAT_SECONDS):
+    """
+    Start a shell command detached from this process; output, exit code, the
+    wrapper's pid and a heartbeat land in `run_dir`.
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    log_path = os.path.join(run_dir, 'output.log')
+    exit_path = os.path.join(run_dir, 'exit_code')
+    heartbeat_path = os.path.join(run_dir, 'heartbeat')
+    # Beats until the command exits or the wrapper itself is gone
+    heartbeat = f"( while kill -0 $$ 2>/dev/null; do touch '{heartbeat_path}'; sleep {heartbeat_seconds:g}; done ) &"
+    wrapped = (f"{heartbeat} beat=$!; ( {command} ) > '{log_path}' 2>&1; code=$?; kill $beat 2>/dev/null; "
+               f"echo $code > '{exit_path}.tmp' && mv '{exit_path}.tmp' '{exit_path}'")
+    # Alive from launch, before the wrapper's first beat
+    with open(heartbeat_path, 'w'):
+        pass
+    process = subprocess.Popen(
+        ['bash', '-c', wrapped],
+        env=env,
+        start_new_session=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    with open(os.path.join(run_dir, 'pid'), 'w') as f:
+        f.write(str(process.pid))
+
+
+def command_status(run_dir: str, heartbeat_timeout: float = HEARTBEAT_TIMEOUT_SECONDS) -> tuple:
+    """
+    (state, exit code) of a command started with `launch_command()`; ERROR
+    with no exit code when it is gone without one.
+    """
+    exit_path = os.path.join(run_dir, 'exit_code')
+    if not os.path.exists(exit_path):
+        heartbeat_path = os.path.join(run_dir, 'heartbeat')
+        if not os.path.exists(heartbeat_path) or time.time() - os.path.getmtime(heartbeat_path) > heartbeat_timeout:
+            return ERROR, None
+        return RUNNING, None
+    with open(exit_path) as f:
+        returncode = int(f.read().strip())
+    return (SUCCESS if returncode == 0 else ERROR), returncode
+
+
+def read_output(run_dir: str) -> str:
+    path = os.path.join(run_dir, 'output.log')
+    if not os.path.exists(path):
+        return ''
+    with open(path) as f:
+        return f.read()
+
+
+if __name__ == "__main__":
+    run_query(sys.argv[1], sys.argv[2])
@@ -0,0 +1,287 @@
+"""
+Versioned Arrow cache of the mart tables read by ML training jobs.
+
+export_feature_cache (after dbt_run_mart) writes mart.customer_features, and
+the other tables in DQ_FEATURE_CACHE_TABLES, to uncompressed Arrow IPC files
+under DQ_FEATURE_CACHE_DIR:
+
+    <cache>/<table>/v000042.arrow   one immutable file per version, sorted by key
+    <cache>/<table>/manifest.json   current version and the retained ones
+
+Consumers memory-map a version with open_cached(), so training starts
+without a warehouse query and without copying the data.
+
+Refreshes are incremental. The marts are rebuilt in full and stamp every row
+with a new _calculated_at, so changes are found by content: the warehouse
+returns one md5 per key (all columns but _calculated_at and the time-relative
+ones) and only new or changed rows are fetched. The new version is the
+previous one with those rows replaced and deleted keys dropped. Only the
+newest DQ_FEATURE_CACHE_KEEP_VERSIONS versions are kept.
+
+Time-relative columns (days since a date, computed against current_timestamp
+by dbt) change every day for every row. They are left out of the hash and
+re-derived from their anchor dates when a version is read, so a daily
+rebuild is not a full rewrite and cached values never go stale.
+"""
+
+import json
+import os
+import shutil
+import time
+from datetime import date, datetime, timezone
+
+from ecommerce_dq.locks import FileLock, replace_file
+from ecommerce_dq.schema import DATA_DIR
+
+CACHE_DIR = os.getenv('DQ_FEATURE_CACHE_DIR', os.path.join(DATA_DIR, 'cache', 'features'))
+CACHE_TABLES = [t for t in os.getenv('DQ_FEATURE_CACHE_TABLES', 'customer_features').split(',') if t]
+KEEP_VERSIONS = int(os.getenv('DQ_FEATURE_CACHE_KEEP_VERSIONS', '3'))
+
+# Also write a Parquet copy of each version, for readers without Arrow IPC support
+WRITE_PARQUET = os.getenv('DQ_FEATURE_CACHE_PARQUET', 'false').lower() == 'true'
+
+# Cacheable mart tables and their keys
+TABLE_KEYS = {
+    'customer_features': 'customer_id',
+    'daily_metrics': 'metric_date',
+}
+
+HASH_COLUMN = '_row_hash'
+# Excluded from the row hash: rewritten by every rebuild
+VOLATILE_COLUMNS = ('_calculated_at',)
+
+# {table: {column: anchor columns}}: days from the first non-NULL anchor to today, derived on read
+TIME_RELATIVE_COLUMNS = {
+    'customer_features': {
+        'days_since_last_order': ('last_order_date',),
+        'recency_days': ('last_order_date', 'signup_timestamp'),
+    },
+}
+
+# Beyond this share of changed keys, one full scan is cheaper than keyed fetches
+FULL_REFRESH_SHARE = 0.3
+FETCH_BATCH_KEYS = 1000
+
+
+def table_dir(table: str, cache_dir: str = None) -> str:
+    return os.path.join(cache_dir or CACHE_DIR, table)
+
+
+def load_manifest(table: str, cache_dir: str = None) -> dict:
+    path = os.path.join(table_dir(table, cache_dir), 'manifest.json')
+    if not os.path.exists(path):
+        return {'table': table, 'current': None, 'versions': []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(manifest: dict, cache_dir: str = None):
+    path = os.path.join(table_dir(manifest['table'], cache_dir), 'manifest.json')
+    replace_file(path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+
+
+def version_path(table: str, version: int, cache_dir: str = None, extension: str = 'arrow') -> str:
+    return os.path.join(table_dir(table, cache_dir), f"v{version:06d}.{extension}")
+
+
+def row_hash_sql(columns: list, table: str = None) -> str:
+    """
+    Portable md5 over the columns that are neither volatile nor time-relative,
+    cut to 64 bits to halve what a refresh transfers; NULL hashes differently from ''.
+    """
+    excluded = (*VOLATILE_COLUMNS, *TIME_RELATIVE_COLUMNS.get(table, {}))
+    parts = [f"COALESCE(CAST({c} AS VARCHAR), '~')" for c in columns if c not in excluded]
+    return f"SUBSTR(MD5(CONCAT_WS('|', {', '.join(parts)})), 1, 16)"
+
+
+def sql_literal(value) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def epoch_days(day: date) -> int:
+    return (day - date(1970, 1, 1)).days
+
+
+def anchor_days(cached, table: str) -> dict:
+    """{time-relative column: days since 1970-01-01 of its anchor date (float64, NaN without one)}."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    anchors = {}
+    for column, sources in TIME_RELATIVE_COLUMNS.get(table, {}).items():
+        if column not in cached.column_names or not set(sources) <= set(cached.column_names):
+            continue
+        anchor = pc.coalesce(*(pc.cast(cached.column(s), pa.date32(), safe=False) for s in sources))
+        anchors[column] = pc.cast(anchor, pa.int32()).to_numpy(zero_copy_only=False).astype('float64')
+    return anchors
+
+
+def derive_time_relative(cached, table: str, as_of: date = None):
+    """`cached` with its time-relative columns computed as of `as_of` (default: today, UTC)."""
+    import numpy as np
+    import pyarrow as pa
+
+    today = epoch_days(as_of or datetime.now(timezone.utc).date())
+    for column, days in anchor_days(cached, table).items():
+        index = cached.column_names.index(column)
+        missing = np.isnan(days)
+        values = pa.array(np.where(missing, 0, today - days).astype('int64'), mask=missing)
+        cached = cached.set_column(index, cached.schema.field(index), values.cast(cached.schema.field(index).type))
+    return cached
+
+
+def open_cached(table: str = 'customer_features', version: int = None, cache_dir: str = None,
+                columns: list = None, as_of: date = None):
+    """
+    Memory-map a cached version (default: the current one) as a zero-copy
+    pyarrow Table, with its time-relative columns (the only ones computed on
+    read) as of `as_of`. `columns` selects a subset; the row hash is left out.
+    """
+    import pyarrow as pa
+
+    manifest = load_manifest(table, cache_dir)
+    version = version or manifest['current']
+    if version is None:
+        raise FileNotFoundError(f"No cached version of '{table}' under {table_dir(table, cache_dir)}")
+    with pa.memory_map(version_path(table, version, cache_dir)) as source:
+        cached = derive_time_relative(pa.ipc.open_file(source).read_all(), table, as_of)
+    return cached.select(columns or [c for c in cached.column_names if c != HASH_COLUMN])
+
+
+def write_version(cached, table: str, version: int, cache_dir: str = None):
+    """Write one immutable version: uncompressed Arrow IPC, so readers can memory-map it."""
+    import pyarrow as pa
+
+    path = version_path(table, version, cache_dir)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, cached.schema) as writer:
+        writer.write_table(cached)
+    os.replace(tmp_path, path)
+    if WRITE_PARQUET:
+        import pyarrow.parquet as pq
+
+        pq.write_table(cached, version_path(table, version, cache_dir, 'parquet'))
+
+
+def evict_versions(manifest: dict, keep: int = None, cache_dir: str = None) -> list:
+    """Drop all but the newest `keep` versions; returns the evicted version numbers."""
+    # The current version is always kept
+    keep = max(KEEP_VERSIONS if keep is None else keep, 1)
+    versions = sorted(manifest['versions'], key=lambda v: v['version'])
+    evicted = versions[:-keep]
+    for entry in evicted:
+        for extension in ('arrow', 'parquet', 'index'):
+            path = version_path(manifest['table'], entry['version'], cache_dir, extension)
+            # Readers that already mapped a file keep their mapping
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+    manifest['versions'] = [v for v in versions if v not in evicted]
+    return [v['version'] for v in evicted]
+
+
+def changed_keys(previous, current_hashes) -> tuple:
+    """(new or changed keys, deleted keys) between a cached table and the warehouse's {key, row_hash}."""
+    import pyarrow.compute as pc
+
+    key = current_hashes.column_names[0]
+    if previous is None:
+        return current_hashes.column(key), None
+    # The key is one of the hashed columns, so a hash missing from the cache is a new or changed row
+    stale = pc.invert(pc.is_in(current_hashes.column(HASH_COLUMN), value_set=previous.column(HASH_COLUMN)))
+    deleted = pc.invert(pc.is_in(previous.column(key), value_set=current_hashes.column(key)))
+    return current_hashes.filter(stale).column(key), previous.filter(deleted).column(key)
+
+
+def fetch_rows(conn, table: str, key: str, columns: list, keys=None):
+    """Rows of mart.<table> with their row hash; only `keys` when given (in batches)."""
+    import pyarrow as pa
+
+    from ecommerce_dq.warehouse import read_arrow
+
+    select = f"SELECT {', '.join(columns)}, {row_hash_sql(columns, table)} AS {HASH_COLUMN} FROM mart.{table}"
+    if keys is None:
+        return read_arrow(conn, select)
+    keys = keys.to_pylist()
+    batches = [
+        read_arrow(conn, f"{select} WHERE {key} IN ({', '.join(sql_literal(k) for k in keys[i:i + FETCH_BATCH_KEYS])})")
+        for i in range(0, len(keys), FETCH_BATCH_KEYS)
+    ]
+    return pa.concat_tables(batches) if batches else None
+
+
+def refresh_cache(table: str, hook=None, cache_dir: str = None, keep: int = None, prepare=None) -> dict:
+    """
+    Bring the cache of mart.<table> up to date, writing a new version only
+    when rows changed. `prepare(table, version, cache_dir)` runs once the new
+    version is written and before the manifest makes it current (the lookup
+    index is built there); if it fails, the previous version stays current.
+    Returns a summary of the refresh.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    from ecommerce_dq.warehouse import get_hook, read_arrow
+
+    if table not in TABLE_KEYS:
+        raise ValueError(f"No cache key for '{table}', expected one of {sorted(TABLE_KEYS)}")
+    key = TABLE_KEYS[table]
+    os.makedirs(table_dir(table, cache_dir), exist_ok=True)
+    start = time.time()
+
+    with FileLock(os.path.join(table_dir(table, cache_dir), 'refresh.lock')):
+        manifest = load_manifest(table, cache_dir)
+        previous = None
+        if manifest['current'] is not None:
+            with pa.memory_map(version_path(table, manifest['current'], cache_dir)) as source:
+                previous = pa.ipc.open_file(source).read_all()
+
+        conn = (hook or get_hook()).get_conn()
+        try:
+            columns = read_arrow(conn, f"SELECT * FROM mart.{table} LIMIT 0").column_names
+            current_hashes = read_arrow(
+                conn, f"SELECT {key}, {row_hash_sql(columns, table)} AS {HASH_COLUMN} FROM mart.{table}"
+            )
+            changed, deleted = changed_keys(previous, current_hashes)
+
+            full = (previous is None or previous.column_names != columns + [HASH_COLUMN]
+                    or len(changed) > FULL_REFRESH_SHARE * max(len(current_hashes), 1))
+            if full:
+                cached = fetch_rows(conn, table, key, columns)
+            elif len(changed) or len(deleted):
+                drop = pa.chunked_array(changed.chunks + deleted.chunks, type=changed.type)
+                kept = previous.filter(pc.invert(pc.is_in(previous.column(key), value_set=drop)))
+                fetched = fetch_rows(conn, table, key, columns, changed)
+                cached = pa.concat_tables([kept, fetched.cast(kept.schema)] if fetched is not None else [kept])
+            else:
+                cached = None
+        finally:
+            conn.close()
+
+        summary = {
+            'table': table,
+            'refresh': 'full' if full else 'incremental',
+            'rows': len(current_hashes),
+            'changed': len(changed),
+            'deleted': 0 if deleted is None else len(deleted),
+        }
+        if cached is None:
+            summary.update(version=manifest['current'], evicted=[], seconds=round(time.time() - start, 3))
+            return summary
+
+        version = max([v['version'] for v in manifest['versions']], default=0) + 1
+        write_version(cached.sort_by(key).combine_chunks(), table, version, cache_dir)
+        if prepare is not None:
+            prepare(table, version, cache_dir)
+        manifest['versions'].append({
+            'version': version,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            **{k: summary[k] for k in ('refresh', 'rows', 'changed', 'deleted')},
+        })
+        manifest['current'] = version
+        evicted = evict_versions(manifest, keep, cache_dir)
+        save_manifest(manifest, cache_dir)
+
+    summary.update(version=version, evicted=evicted, seconds=round(time.time() - start, 3))
+    return summary
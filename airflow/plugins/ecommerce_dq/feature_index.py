@@ -0,0 +1,239 @@
+"""
+Point-lookup index over the feature cache for online scoring.
+
+build_index() runs for each new feature cache version, before the version is
+published as current, and writes next to it (see ecommerce_dq.feature_cache):
+
+    <cache>/<table>/v000042.index/hashes.npy     sorted 64-bit hashes of the keys
+    <cache>/<table>/v000042.index/buckets.npy    first row of each hash prefix in hashes
+    <cache>/<table>/v000042.index/keys.npy       the keys (fixed-width bytes), row-aligned with hashes
+    <cache>/<table>/v000042.index/features.npy   numeric features (float32), row-aligned with hashes
+    <cache>/<table>/v000042.index/meta.json      feature columns, hash seed, rows, version, time-relative columns
+
+FeatureLookup memory-maps the arrays. A batch of ids is hashed, located
+through the bucket of its hash prefix (about one key per bucket, so a few
+vectorized gathers instead of a binary search's chain of cache misses),
+checked against the stored keys and gathered, so thousands of customers
+take well under a millisecond. An LRU
+of recent customers sits in front for single gets. Only numeric columns are
+indexed (decimals and integers as float32, NULL as NaN): what a scoring
+model consumes, without the PII. Time-relative columns (days since a date)
+are stored as their anchor day and returned as of the day of the lookup, like
+the cache derives them on read.
+"""
+
+import json
+import os
+import shutil
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from ecommerce_dq.feature_cache import TABLE_KEYS, anchor_days, epoch_days, load_manifest, version_path
+
+LRU_SIZE = int(os.getenv('DQ_FEATURE_LRU_SIZE', '100000'))
+
+# Volatile or bookkeeping columns that are not features
+EXCLUDED_COLUMNS = ('_calculated_at', '_row_hash')
+
+# FNV-1a over 64-bit words, then murmur3's finalizer so the bucket prefix bits are well mixed
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+FMIX_MULTIPLIERS = (0xff51afd7ed558ccd, 0xc4ceb9fe1a85ec53)
+MAX_HASH_SEEDS = 16
+
+
+def index_dir(table: str, version: int, cache_dir: str = None) -> str:
+    return version_path(table, version, cache_dir, 'index')
+
+
+def feature_columns(schema, key: str) -> list:
+    """Numeric (integer, floating point, decimal) columns of a cached table."""
+    import pyarrow.types as pat
+
+    return [
+        field.name for field in schema
+        if field.name != key and field.name not in EXCLUDED_COLUMNS
+        and (pat.is_integer(field.type) or pat.is_floating(field.type) or pat.is_decimal(field.type))
+    ]
+
+
+def key_hashes(keys, seed: int = 0):
+    """Vectorized 64-bit hashes of fixed-width byte keys."""
+    import numpy as np
+
+    width = max(-(-keys.dtype.itemsize // 8) * 8, 8)
+    words = np.ascontiguousarray(keys, dtype=f"S{width}").view('<u8').reshape(len(keys), -1)
+    hashes = np.full(len(keys), FNV_OFFSET ^ seed, dtype=np.uint64)
+    for column in range(words.shape[1]):
+        hashes ^= words[:, column]
+        hashes *= np.uint64(FNV_PRIME)
+    for multiplier in FMIX_MULTIPLIERS:
+        hashes ^= hashes >> np.uint64(33)
+        hashes *= np.uint64(multiplier)
+    hashes ^= hashes >> np.uint64(33)
+    return hashes
+
+
+def bucket_bits(rows: int) -> int:
+    """Hash prefix length giving about one key per bucket."""
+    return min(max(rows - 1, 1).bit_length(), 32)
+
+
+def build_index(table: str = 'customer_features', version: int = None, cache_dir: str = None) -> dict:
+    """Write the lookup index of a cached version (default: the current one); returns its metadata."""
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    from ecommerce_dq.feature_cache import open_cached
+
+    version = version or load_manifest(table, cache_dir)['current']
+    cached = open_cached(table, version, cache_dir)
+    key = TABLE_KEYS[table]
+    columns = feature_columns(cached.schema, key)
+    anchors = anchor_days(cached, table)
+
+    keys = np.char.encode(pc.cast(cached.column(key), pa.string()).to_numpy(zero_copy_only=False).astype(str))
+    # Lookups need one row per hash; on the (unlikely) collision, re-hash with another seed
+    for seed in range(MAX_HASH_SEEDS):
+        hashes = key_hashes(keys, seed)
+        order = np.argsort(hashes, kind='stable')
+        if not np.any(hashes[order][1:] == hashes[order][:-1]):
+            break
+    else:
+        raise ValueError(f"Colliding key hashes in '{table}' v{version} with {MAX_HASH_SEEDS} seeds")
+    bits = bucket_bits(len(keys))
+    buckets = np.zeros(2 ** bits + 1, dtype=np.int64)
+    np.cumsum(np.bincount((hashes >> np.uint64(64 - bits)).astype(np.int64), minlength=2 ** bits), out=buckets[1:])
+    features = np.empty((len(keys), len(columns)), dtype=np.float32)
+    for i, column in enumerate(columns):
+        if column in anchors:
+            values = anchors[column]
+        else:
+            values = pc.cast(cached.column(column), pa.float64()).to_numpy(zero_copy_only=False)
+        features[:, i] = values[order]
+
+    path = index_dir(table, version, cache_dir)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    os.makedirs(tmp_path, exist_ok=True)
+    np.save(os.path.join(tmp_path, 'hashes.npy'), hashes[order])
+    np.save(os.path.join(tmp_path, 'buckets.npy'), buckets)
+    np.save(os.path.join(tmp_path, 'keys.npy'), keys[order])
+    np.save(os.path.join(tmp_path, 'features.npy'), features)
+    meta = {'table': table, 'key': key, 'version': version, 'rows': len(keys), 'columns': columns, 'seed': seed,
+            'bucket_bits': bits, 'time_relative': [c for c in columns if c in anchors]}
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.replace(tmp_path, path)
+    return meta
+
+
+class FeatureLookup:
+    """Batch and single-key reads of one cached table's features, by key."""
+
+    def __init__(self, table: str = 'customer_features', cache_dir: str = None, lru_size: int = None):
+        self.table = table
+        self.cache_dir = cache_dir
+        self.lru_size = LRU_SIZE if lru_size is None else lru_size
+        self.version = None
+        self.reload()
+
+    def reload(self) -> bool:
+        """
+        Switch to the current cached version if it changed; True when it did.
+        A version without an index keeps the loaded one serving.
+        """
+        import numpy as np
+
+        current = load_manifest(self.table, self.cache_dir)['current']
+        if current is None:
+            raise FileNotFoundError(f"No cached version of '{self.table}'")
+        if current == self.version:
+            return False
+        path = index_dir(self.table, current, self.cache_dir)
+        meta_path = os.path.join(path, 'meta.json')
+        if self.version is not None and not os.path.exists(meta_path):
+            print(f"⚠️  No index for {self.table} v{current}, still serving v{self.version}")
+            return False
+        with open(meta_path) as f:
+            meta = json.load(f)
+        # Plain ndarray views of the mappings: np.memmap adds overhead to every operation
+        self.hashes, self.buckets, self.keys, self.features = (
+            np.asarray(np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r'))
+            for name in ('hashes', 'buckets', 'keys', 'features')
+        )
+        self.columns = meta['columns']
+        self.time_relative = set(meta.get('time_relative', []))
+        self.seed = meta['seed']
+        self.bucket_shift = np.uint64(64 - meta['bucket_bits'])
+        self.version = current
+        self._lru = OrderedDict()
+        return True
+
+    def positions(self, ids):
+        """Row of each id in the index, -1 when unknown."""
+        import numpy as np
+
+        try:
+            queries = np.array(ids, dtype=bytes)
+        except UnicodeEncodeError:
+            queries = np.array([str(i).encode() for i in ids], dtype=bytes)
+        if not len(queries) or not len(self.keys):
+            return np.full(len(queries), -1)
+        hashes = key_hashes(queries.astype(self.keys.dtype), self.seed)
+        bucket = (hashes >> self.bucket_shift).astype(np.int64)
+        rows, end = self.buckets[bucket], self.buckets[bucket + 1]
+        # Walk each bucket (sorted, a few keys at most) up to the first hash >= the id's
+        last = len(self.keys) - 1
+        while True:
+            step = (rows < end) & (self.hashes[np.minimum(rows, last)] < hashes)
+            if not step.any():
+                break
+            rows += step
+        rows[rows > last] = 0
+        # Compared at full width, so an id longer than the indexed keys never matches a truncation
+        found = self.keys[rows] == queries
+        return np.where(found, rows, -1)
+
+    def batch_get(self, ids, columns: list = None) -> tuple:
+        """
+        (features, found) for a batch of ids: a float32 matrix with one row
+        per id (NaN for unknown ids) in the order of `columns` (default: all),
+        and a boolean mask of the ids that were found.
+        """
+        import numpy as np
+
+        rows = self.positions(ids)
+        found = rows >= 0
+        columns = columns or self.columns
+        features = np.asarray(self.features[np.where(found, rows, 0)][:, [self.columns.index(c) for c in columns]])
+        today = self._today()
+        for i, column in enumerate(columns):
+            if column in self.time_relative:
+                features[:, i] = today - features[:, i]
+        features[~found] = np.nan
+        return features, found
+
+    @staticmethod
+    def _today() -> int:
+        return epoch_days(datetime.now(timezone.utc).date())
+
+    def get(self, id_, columns: list = None):
+        """Features of one id as {column: value}, or None when unknown; recent ids are served from the LRU."""
+        values = self._lru.get(id_)
+        if values is not None:
+            self._lru.move_to_end(id_)
+        else:
+            row = self.positions([id_])[0]
+            if row < 0:
+                return None
+            values = dict(zip(self.columns, self.features[row].tolist()))
+            if self.lru_size:
+                self._lru[id_] = values
+                if len(self._lru) > self.lru_size:
+                    self._lru.popitem(last=False)
+        # Cached as anchor days, so entries stay valid across midnight
+        today = self._today()
+        return {c: today - values[c] if c in self.time_relative else values[c] for c in columns or self.columns}
@@ -0,0 +1,237 @@
+"""
+Structured spans and metrics for pipeline tasks.
+
+Tasks wrap their hot paths in `span()` blocks and record counters/gauges
+with `metric()`. Every span reports its duration, the process peak RSS and
+rows/sec when it carries a row count. Records go to the exporters listed in
+DQ_METRICS_EXPORTERS (comma-separated):
+- statsd: DogStatsD-style UDP lines to DQ_STATSD_HOST:DQ_STATSD_PORT
+- otel:   OpenTelemetry API spans/histograms (SDK configured by the deployment)
+- file:   JSON lines appended to DQ_METRICS_FILE (used by tests)
+"""
+
+import json
+import os
+import resource
+import socket
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRIC_PREFIX = 'ecommerce_dq'
+
+COUNTER = 'c'
+GAUGE = 'g'
+TIMING = 'ms'
+
+# Span attributes that are exported as metric tags
+METRIC_TAGS = ('table', 'check', 'node', 'status')
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux)."""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class StatsDExporter:
+    """Fire-and-forget UDP exporter using DogStatsD tag syntax."""
+
+    def __init__(self, host: str = 'localhost', port: int = 8125, prefix: str = METRIC_PREFIX):
+        self.address = (host, int(port))
+        self.prefix = prefix
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    @staticmethod
+    def format_line(prefix: str, name: str, value, metric_type: str, tags: dict) -> str:
+        line = f"{prefix}.{name}:{value}|{metric_type}"
+        if tags:
+            line += '|#' + ','.join(f"{k}:{v}" for k, v in sorted(tags.items()))
+        return line
+
+    def export_metric(self, name: str, value, metric_type: str, tags: dict):
+        line = self.format_line(self.prefix, name, value, metric_type, tags)
+        try:
+            self.sock.sendto(line.encode(), self.address)
+        except OSError:
+            pass  # metrics must never fail a task
+
+    def export_span(self, span: dict):
+        """StatsD has no spans; spans are exported as their derived metrics."""
+
+
+class OpenTelemetryExporter:
+    """Exports through the OpenTelemetry API; a no-op unless an SDK is configured."""
+
+    def __init__(self, prefix: str = METRIC_PREFIX):
+        from opentelemetry import metrics, trace
+
+        self.prefix = prefix
+        self.tracer = trace.get_tracer(prefix)
+        self.meter = metrics.get_meter(prefix)
+        self.instruments = {}
+
+    def export_metric(self, name: str, value, metric_type: str, tags: dict):
+        full_name = f"{self.prefix}.{name}"
+        if full_name not in self.instruments:
+            if metric_type == COUNTER:
+                self.instruments[full_name] = self.meter.create_counter(full_name)
+            else:
+                self.instruments[full_name] = self.meter.create_histogram(full_name)
+        instrument = self.instruments[full_name]
+        if metric_type == COUNTER:
+            instrument.add(value, attributes=tags)
+        else:
+            instrument.record(value, attributes=tags)
+
+    def export_span(self, span: dict):
+        otel_span = self.tracer.start_span(
+            span['name'],
+            start_time=int(span['start_time'] * 1e9),
+            attributes={k: v for k, v in span['attributes'].items() if v is not None},
+        )
+        otel_span.end(end_time=int(span['end_time'] * 1e9))
+
+
+class FileExporter:
+    """Appends every span and metric as a JSON line."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _write(self, record: dict):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+    def export_metric(self, name: str, value, metric_type: str, tags: dict):
+        self._write({'kind': 'metric', 'name': name, 'value': value, 'type': metric_type,
+                     'tags': tags, 'timestamp': time.time()})
+
+    def export_span(self, span: dict):
+        self._write({'kind': 'span', **span})
+
+
+def exporters_from_env() -> list:
+    """Build exporters from DQ_METRICS_EXPORTERS and their settings."""
+    exporters = []
+    for name in filter(None, os.getenv('DQ_METRICS_EXPORTERS', 'statsd').split(',')):
+        name = name.strip()
+        if name == 'statsd':
+            exporters.append(StatsDExporter(
+                os.getenv('DQ_STATSD_HOST', 'localhost'), os.getenv('DQ_STATSD_PORT', '8125')
+            ))
+        elif name == 'otel':
+            exporters.append(OpenTelemetryExporter())
+        elif name == 'file':
+            exporters.append(FileExporter(os.getenv('DQ_METRICS_FILE', '/opt/airflow/logs/dq_metrics.jsonl')))
+        else:
+            raise ValueError(f"Unknown metrics exporter '{name}'")
+    return exporters
+
+
+class Instrumentation:
+    """Entry point used by tasks to emit spans and metrics."""
+
+    def __init__(self, exporters: list = None, **tags):
+        self.exporters = exporters_from_env() if exporters is None else exporters
+        self.tags = tags
+
+    def metric(self, name: str, value, metric_type: str = GAUGE, **tags):
+        """Emit one metric with the instrumentation's default tags."""
+        all_tags = {**self.tags, **tags}
+        for exporter in self.exporters:
+            exporter.export_metric(name, value, metric_type, all_tags)
+
+    def record_span(self, name: str, start_time: float, end_time: float, **attributes):
+        """
+        Export a finished span and its derived metrics: duration, plus rows,
+        bytes, rows/sec and peak RSS (this process) when the span carries them.
+        """
+        attrs = {**self.tags, **attributes}
+        duration_s = max(end_time - start_time, 0.0)
+        attrs['duration_ms'] = round(duration_s * 1000, 3)
+        attrs.setdefault('peak_rss_mb', peak_rss_mb())
+        if attrs.get('rows') is not None and duration_s > 0:
+            attrs['rows_per_sec'] = round(attrs['rows'] / duration_s, 1)
+
+        span = {'name': name, 'start_time': start_time, 'end_time': end_time, 'attributes': attrs}
+        for exporter in self.exporters:
+            exporter.export_span(span)
+
+        # Only low-cardinality attributes become metric tags (no chunk numbers or query IDs)
+        tags = {k: v for k, v in attrs.items() if k in self.tags or k in METRIC_TAGS}
+        self.metric(f"{name}.duration_ms", attrs['duration_ms'], TIMING, **tags)
+        for key in ('rows', 'bytes'):
+            if attrs.get(key) is not None:
+                self.metric(f"{name}.{key}", attrs[key], COUNTER, **tags)
+        for key in ('rows_per_sec', 'peak_rss_mb'):
+            if attrs.get(key) is not None:
+                self.metric(f"{name}.{key}", attrs[key], GAUGE, **tags)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Time a block. The yielded dict can be filled with attributes such as
+        rows, bytes or query_id before the block exits.
+        """
+        attrs = dict(attributes)
+        start = time.time()
+        start_perf = time.perf_counter()
+        attrs['status'] = 'ok'
+        try:
+            yield attrs
+        except Exception:
+            attrs['status'] = 'error'
+            raise
+        finally:
+            self.record_span(name, start, start + time.perf_counter() - start_perf, **attrs)
+
+    def query(self, cursor, sql: str, name: str):
+        """Execute a query, emit its elapsed time and query ID, return the first row."""
+        with self.span('query', check=name) as span:
+            cursor.execute(sql)
+            span['query_id'] = getattr(cursor, 'sfqid', None)
+            return cursor.fetchone()
+
+
+def _parse_dbt_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def emit_dbt_run_results(instrumentation: Instrumentation, run_results_path: str, not_before: float = None) -> int:
+    """
+    Export one span per dbt node from run_results.json, with its status,
+    rows affected and warehouse query ID. Results written before
+    `not_before` (a stale file from an earlier invocation) are ignored.
+    Returns the number of nodes exported.
+    """
+    if not os.path.exists(run_results_path):
+        return 0
+    with open(run_results_path) as f:
+        run_results = json.load(f)
+
+    generated_at = _parse_dbt_timestamp(run_results['metadata']['generated_at'])
+    if not_before is not None and generated_at < not_before:
+        return 0
+
+    for result in run_results['results']:
+        timings = result.get('timing') or []
+        if timings:
+            start = _parse_dbt_timestamp(timings[0]['started_at'])
+        else:
+            start = generated_at - result['execution_time']
+        adapter_response = result.get('adapter_response') or {}
+        instrumentation.record_span(
+            'dbt.node',
+            start,
+            start + result['execution_time'],
+            node=result['unique_id'],
+            peak_rss_mb=None,  # measured in the dbt process, not here
+            status=result['status'],
+            rows=adapter_response.get('rows_affected'),
+            query_id=adapter_response.get('query_id'),
+        )
+
+    elapsed = run_results.get('elapsed_time', 0)
+    instrumentation.record_span('dbt.invocation', generated_at - elapsed, generated_at,
+                                nodes=len(run_results['results']), peak_rss_mb=None)
+    return len(run_results['results'])
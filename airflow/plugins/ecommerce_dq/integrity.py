@@ -0,0 +1,115 @@
+"""
+Referential integrity checks between child feeds and customers.
+
+At ingest time the parent keys (customers.customer_id) are kept as a sorted
+array of 64-bit key hashes under <DQ_DATA_DIR>/state/integrity/. Child
+chunks (orders, events) are probed against it with a vectorized binary
+search instead of an anti-join. The equivalent warehouse-side check is
+`ecommerce_dq.validation.orphan_check_sql()`.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from ecommerce_dq.dedup import hash_keys
+from ecommerce_dq.locks import FileLock, replace_file
+from ecommerce_dq.schema import DATA_DIR, bare_table_name
+
+INTEGRITY_STATE_DIR = os.getenv('DQ_INTEGRITY_STATE_DIR', os.path.join(DATA_DIR, 'state', 'integrity'))
+
+PROBE_CHUNK_SIZE = 1_000_000
+ORPHAN_SAMPLE_SIZE = 10
+
+
+class ParentKeySet:
+    """Compact, persistent set of parent keys stored as sorted uint64 hashes."""
+
+    def __init__(self, table_name: str, key_column: str, state_dir: str = INTEGRITY_STATE_DIR,
+                 hashes: np.ndarray = None):
+        self.table_name = bare_table_name(table_name)
+        self.key_column = key_column
+        self.path = os.path.join(state_dir, f"{self.table_name}.{key_column}.npy")
+        self.hashes = hashes if hashes is not None else np.zeros(0, dtype=np.uint64)
+
+    @classmethod
+    def load(cls, table_name: str, key_column: str, state_dir: str = INTEGRITY_STATE_DIR):
+        """Load the persisted key set, or None if the parent was never ingested."""
+        keyset = cls(table_name, key_column, state_dir)
+        if not os.path.exists(keyset.path):
+            return None
+        keyset.hashes = np.load(keyset.path)
+        return keyset
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def add(self, keys: pd.Series):
+        """Merge new parent keys into the set."""
+        keys = keys.dropna()
+        self.hashes = np.union1d(self.hashes, hash_keys(keys))
+
+    def save(self):
+        """
+        Persist the key set, merged with whatever is on disk so partitions of
+        the parent table ingested in parallel do not overwrite each other.
+        """
+        with FileLock(f"{self.path}.lock"):
+            if os.path.exists(self.path):
+                self.hashes = np.union1d(self.hashes, np.load(self.path))
+            replace_file(self.path, lambda f: np.save(f, self.hashes))
+
+    def contains(self, keys: pd.Series) -> np.ndarray:
+        """Boolean mask of keys present in the set (vectorized binary search)."""
+        if len(self.hashes) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        probe = hash_keys(keys)
+        pos = np.searchsorted(self.hashes, probe)
+        pos[pos == len(self.hashes)] = 0
+        return self.hashes[pos] == probe
+
+
+def check_orphans(df: pd.DataFrame, fk_column: str, keyset: ParentKeySet,
+                  chunk_size: int = PROBE_CHUNK_SIZE, sample_size: int = ORPHAN_SAMPLE_SIZE) -> dict:
+    """
+    Probe `df[fk_column]` against the parent key set chunk by chunk.
+    Null foreign keys are counted separately and are not orphans.
+    """
+    report = {
+        'checked_rows': 0,
+        'null_keys': 0,
+        'orphan_rows': 0,
+        'orphan_sample': [],
+    }
+    for start in range(0, len(df), chunk_size):
+        keys = df[fk_column].iloc[start:start + chunk_size]
+        present = keys.notna()
+        non_null = keys[present]
+
+        orphans = non_null[~keyset.contains(non_null)]
+
+        report['checked_rows'] += len(keys)
+        report['null_keys'] += int((~present).sum())
+        report['orphan_rows'] += len(orphans)
+        for key in orphans.astype(str).unique():
+            if len(report['orphan_sample']) >= sample_size:
+                break
+            if key not in report['orphan_sample']:
+                report['orphan_sample'].append(key)
+    return report
+
+
+def merge_orphan_reports(total: dict, report: dict, sample_size: int = ORPHAN_SAMPLE_SIZE) -> dict:
+    """Fold the `check_orphans()` report of one ingest chunk into a running total."""
+    if not total:
+        return dict(report, orphan_sample=list(report['orphan_sample']))
+    for key in ('checked_rows', 'null_keys', 'orphan_rows'):
+        total[key] += report[key]
+    for key in report['orphan_sample']:
+        if len(total['orphan_sample']) >= sample_size:
+            break
+        if key not in total['orphan_sample']:
+            total['orphan_sample'].append(key)
+    return total
+
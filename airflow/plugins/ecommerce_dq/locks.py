@@ -0,0 +1,45 @@
+"""
+Cross-process locks for state shared by parallel ingest tasks.
+
+Mapped ingest tasks of one table run in separate worker processes and share
+the dedup key index, the parent key sets and (on the DuckDB backend) the
+warehouse file. Each is guarded by an advisory flock on a sidecar lock file.
+"""
+
+import fcntl
+import os
+
+
+class FileLock:
+    """Exclusive advisory lock on `path`; usable as a context manager."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a')
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def release(self):
+        if self._file is None:
+            return
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def replace_file(path: str, write):
+    """Write `path` atomically: `write(f)` fills a temp file that then replaces it."""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
@@ -0,0 +1,118 @@
+"""
+Micro-batch ingestion of event files as they land, for minutes-level freshness.
+
+Producers drop event files into <DQ_DATA_DIR>/raw/events/ (the ingest's
+partition directory), writing under another name and renaming to *.csv
+once complete. The ecommerce_microbatch DAG runs continuously, one batch at
+a time:
+1. wait_for_event_files: a deferrable sensor (NewFilesSensor) waits on the
+   triggerer until files that are not in the ingest manifest
+   (ecommerce_dq.table_metadata) exist, up to DQ_MICROBATCH_MAX_FILES,
+   oldest first. A file the daily pipeline loaded as byte ranges counts
+   as loaded once all its ranges are recorded
+2. ingest_event_batch: each file goes through the regular ingest (dedup,
+   RI probes, manifest), recording the event days it touched
+3. refresh_event_days: for each touched day, the day-partitioned dbt
+   models downstream of raw.events, daily_metrics included, rebuild that
+   day's slice (ecommerce_dq.backfill.run_dbt_day); other days and the
+   cross-day customer_features wait for the daily pipeline
+
+The end-to-end lag of each file, from landing (its mtime) to its days'
+metrics being rebuilt, is reported per batch and checked against
+DQ_MICROBATCH_LAG_TARGET_SECONDS.
+
+The daily pipeline's list_events_partitions skips landed files already in
+the manifest. A file both pick up before either has recorded it is loaded
+once: both ingests use the file path as partition id, and the key claims
+(ecommerce_dq.dedup) of one live load drop its rows from the other.
+"""
+
+import glob
+import os
+import time
+
+from ecommerce_dq.partitions import PARTITION_BYTES, file_loaded
+from ecommerce_dq.schema import DATA_DIR, bare_table_name
+from ecommerce_dq.table_metadata import INGEST_STATE_DIR, read_manifest
+
+MICROBATCH_TABLE = os.getenv('DQ_MICROBATCH_TABLE', 'raw.events')
+MAX_FILES = int(os.getenv('DQ_MICROBATCH_MAX_FILES', '20'))
+POLL_INTERVAL = float(os.getenv('DQ_MICROBATCH_POLL_SECONDS', '10'))
+LAG_TARGET_SECONDS = float(os.getenv('DQ_MICROBATCH_LAG_TARGET_SECONDS', '300'))
+
+DBT_TARGET_DIR = 'microbatch'
+
+
+def landing_dir(table_name: str = MICROBATCH_TABLE, raw_dir: str = None) -> str:
+    return os.path.join(raw_dir or os.path.join(DATA_DIR, 'raw'), bare_table_name(table_name))
+
+
+def new_files(table_name: str = MICROBATCH_TABLE, raw_dir: str = None, max_files: int = MAX_FILES,
+              state_dir: str = INGEST_STATE_DIR, target_bytes: int = PARTITION_BYTES) -> list:
+    """Landed files not ingested yet, oldest first: [{csv_path, arrived_at}]."""
+    loaded = read_manifest(table_name, state_dir)['loads']
+    landed = []
+    for path in glob.glob(os.path.join(landing_dir(table_name, raw_dir), '*.csv')):
+        try:
+            # Loaded whole, or range by range by the daily pipeline when over the partition size
+            if file_loaded(path, loaded, target_bytes):
+                continue
+            landed.append({'csv_path': path, 'arrived_at': os.path.getmtime(path)})
+        except FileNotFoundError:
+            # Removed since the listing
+            continue
+    landed.sort(key=lambda f: (f['arrived_at'], f['csv_path']))
+    return landed[:max_files]
+
+
+def lag_report(files: list, refreshed_at: float, target_seconds: float = LAG_TARGET_SECONDS) -> dict:
+    """End-to-end lag of a batch, from each file's arrival to its metrics being rebuilt."""
+    lags = sorted(refreshed_at - f['arrived_at'] for f in files)
+    return {
+        'files': len(lags),
+        'lag_p50_seconds': round(lags[len(lags) // 2], 1) if lags else None,
+        'lag_max_seconds': round(lags[-1], 1) if lags else None,
+        'target_seconds': target_seconds,
+        'within_target': bool(lags) and lags[-1] <= target_seconds,
+    }
+
+
+def ingest_event_batch(table_name: str = MICROBATCH_TABLE, **context) -> dict:
+    """Ingest the files found by the sensor; returns them with the event days loaded."""
+    from ecommerce_dq.tasks import ingest_csv_to_snowflake
+
+    batch = context['ti'].xcom_pull(task_ids='wait_for_event_files')
+    days = set()
+    rows = 0
+    for landed in batch['files']:
+        summary = ingest_csv_to_snowflake(table_name, landed['csv_path'], **context)
+        days.update(summary['days'])
+        rows += summary['rows']
+    print(f"✓ Micro-batch of {len(batch['files'])} files: {rows} rows over days {sorted(days)}")
+    return {**batch, 'rows': rows, 'days': sorted(days), 'ingested_at': time.time()}
+
+
+def refresh_event_days(table_name: str = MICROBATCH_TABLE, **context) -> dict:
+    """Rebuild the day slices touched by the batch, then report its end-to-end lag."""
+    from ecommerce_dq.backfill import run_dbt_day
+    from ecommerce_dq.instrumentation import Instrumentation
+    from ecommerce_dq.tasks import DBT_EXECUTABLE, DBT_PROJECT_DIR
+
+    batch = context['ti'].xcom_pull(task_ids='ingest_event_batch')
+    metrics = Instrumentation(task='microbatch', table=bare_table_name(table_name))
+    # One day at a time: the day slices of different days share tables, and DuckDB has a single writer
+    for day in batch['days']:
+        with metrics.span('microbatch.refresh_day', day=day):
+            run_dbt_day(day, DBT_PROJECT_DIR, DBT_EXECUTABLE, tables=[table_name], target_dir=DBT_TARGET_DIR)
+        print(f"✓ Refreshed day {day}")
+
+    report = lag_report(batch['files'], time.time())
+    report.update(rows=batch['rows'], days=batch['days'],
+                  detection_seconds=round(batch['detected_at'] - min(f['arrived_at'] for f in batch['files']), 1))
+    metrics.metric('microbatch.lag_seconds', report['lag_max_seconds'])
+    metrics.metric('microbatch.lag_p50_seconds', report['lag_p50_seconds'])
+    metrics.metric('microbatch.rows', report['rows'])
+    status = '✓' if report['within_target'] else '⚠️ '
+    print(f"{status} Arrival-to-metrics lag: p50 {report['lag_p50_seconds']}s, max {report['lag_max_seconds']}s "
+          f"(target {report['target_seconds']:.0f}s; detection {report['detection_seconds']}s)")
+    return report
@@ -0,0 +1,270 @@
+"""
+Deferrable operators for warehouse queries and dbt commands, and a
+deferrable sensor on landing files.
+
+With deferrable=True the task submits its work, defers to a trigger and
+frees its worker slot until the work completes; the triggerer does the
+waiting. With deferrable=False the task blocks in the worker, as a
+PythonOperator / BashOperator would.
+
+Given a `sizing_step`, the query and command operators run on the warehouse
+ecommerce_dq.sizing picks for the rows in `sizing_schemas`, and record the
+runtime in the step's history.
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import time
+from datetime import timedelta
+
+from airflow.exceptions import AirflowException
+from airflow.models import BaseOperator
+
+from ecommerce_dq.deferral import (
+    DEFERRED_STATE_DIR,
+    ERROR,
+    HEARTBEAT_TIMEOUT_SECONDS,
+    launch_command,
+    query_client,
+    read_output,
+)
+from ecommerce_dq.instrumentation import Instrumentation
+from ecommerce_dq.microbatch import MAX_FILES, new_files
+from ecommerce_dq.results import QueryResult
+from ecommerce_dq.sizing import SizingDecision, choose_warehouse, finish_step, input_rows
+from ecommerce_dq.triggers import DEFAULT_POLL_INTERVAL, CommandTrigger, NewFilesTrigger, WarehouseQueryTrigger
+from ecommerce_dq.warehouse import get_hook, use_warehouse, warehouse_backend
+
+# Deferral timeout of a command task without an execution_timeout of its own
+COMMAND_TIMEOUT = timedelta(minutes=float(os.getenv('DQ_COMMAND_TIMEOUT_MINUTES', '120')))
+
+
+def size_step(step: str, schemas: list):
+    """The warehouse for a step reading `schemas`, or None when the step is not sized."""
+    if not step:
+        return None
+    conn = get_hook().get_conn()
+    try:
+        rows = input_rows(conn, schemas or [])
+    finally:
+        conn.close()
+    return choose_warehouse(step, rows, metrics=Instrumentation(task=step))
+
+
+class DeferrableWarehouseQueryOperator(BaseOperator):
+    """
+    Run named queries on the configured warehouse and return {name: QueryResult}
+    (each query's first row by column name), also pushed to XCom under
+    `xcom_key` when given. Deferred queries are submitted together and run
+    concurrently on the warehouse.
+    """
+
+    template_fields = ('queries',)
+    ui_color = '#e8f4fd'
+
+    def __init__(self, *, queries: dict, xcom_key: str = None, poll_interval: float = DEFAULT_POLL_INTERVAL,
+                 deferrable: bool = True, sizing_step: str = None, sizing_schemas: list = None, **kwargs):
+        super().__init__(**kwargs)
+        self.queries = queries
+        self.xcom_key = xcom_key
+        self.poll_interval = poll_interval
+        self.deferrable = deferrable
+        self.sizing_step = sizing_step
+        self.sizing_schemas = sizing_schemas
+
+    def execute(self, context):
+        sizing = size_step(self.sizing_step, self.sizing_schemas)
+        if not self.deferrable:
+            return self._execute_blocking(context, sizing)
+
+        submitted_at = time.time()
+        client = query_client()
+        try:
+            if sizing:
+                client.use_warehouse(sizing.warehouse)
+            query_ids = {name: client.submit(sql) for name, sql in self.queries.items()}
+        finally:
+            client.close()
+        for name, query_id in query_ids.items():
+            print(f"✓ Submitted query '{name}': {query_id}")
+
+        self.defer(
+            trigger=WarehouseQueryTrigger(query_ids, warehouse_backend(), submitted_at, self.poll_interval),
+            method_name='execute_complete',
+            kwargs={'sizing': sizing.as_dict() if sizing else None},
+            timeout=self.execution_timeout,
+        )
+
+    def execute_complete(self, context, event, sizing: dict = None):
+        """Resume after the trigger fired: fetch each query's columns and first row by query ID."""
+        if event['status'] == ERROR:
+            raise AirflowException(f"Query '{event['query']}' ({event['query_id']}) failed: {event['message']}")
+
+        metrics = Instrumentation(task=self.task_id)
+        results = {}
+        client = query_client()
+        try:
+            for name, query_id in event['query_ids'].items():
+                results[name] = QueryResult(name, *client.fetch_first(query_id))
+                metrics.record_span('query', event['submitted_at'], event['finished'][name],
+                                    check=name, query_id=query_id, deferred=True)
+        finally:
+            client.close()
+        finished = max(event['finished'].values(), default=time.time())
+        metrics.record_span(self.task_id, event['submitted_at'], finished)
+        if sizing:
+            finish_step(SizingDecision.from_dict(sizing), finished - event['submitted_at'], metrics=metrics)
+        return self._publish(context, results)
+
+    def _execute_blocking(self, context, sizing: SizingDecision = None):
+        metrics = Instrumentation(task=self.task_id)
+        conn = get_hook().get_conn()
+        cursor = conn.cursor()
+        try:
+            if sizing:
+                use_warehouse(conn, sizing.warehouse)
+            started = time.time()
+            with metrics.span(self.task_id):
+                results = {
+                    name: QueryResult.from_cursor(name, cursor, metrics.query(cursor, sql, name))
+                    for name, sql in self.queries.items()
+                }
+            if sizing:
+                finish_step(sizing, time.time() - started, metrics=metrics)
+        finally:
+            cursor.close()
+            conn.close()
+        return self._publish(context, results)
+
+    def _publish(self, context, results: dict) -> dict:
+        for name, result in results.items():
+            print(f"✓ Query '{name}': {result.as_dict()}")
+        if self.xcom_key:
+            context['ti'].xcom_push(key=self.xcom_key, value=results)
+        return results
+
+
+class DeferrableCommandOperator(BaseOperator):
+    """
+    Run a bash command (a dbt invocation) detached from the worker and defer
+    until it exits. Output is written to a run directory under
+    DQ_DEFERRED_STATE_DIR and echoed to the task log on resume. The task
+    fails when the command is gone without an exit code, or after
+    `execution_timeout` (default COMMAND_TIMEOUT) deferred.
+    `env` / `append_env` behave as on BashOperator.
+    """
+
+    template_fields = ('bash_command', 'env')
+    ui_color = '#f0ede4'
+
+    def __init__(self, *, bash_command: str, env: dict = None, append_env: bool = False,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, deferrable: bool = True, sizing_step: str = None,
+                 sizing_schemas: list = None, **kwargs):
+        super().__init__(**kwargs)
+        self.bash_command = bash_command
+        self.env = env
+        self.append_env = append_env
+        self.poll_interval = poll_interval
+        self.deferrable = deferrable
+        self.sizing_step = sizing_step
+        self.sizing_schemas = sizing_schemas
+
+    def _command_env(self, sizing: SizingDecision = None) -> dict:
+        if self.env is None:
+            env = os.environ.copy()
+        else:
+            env = {**os.environ, **self.env} if self.append_env else dict(self.env)
+        if sizing and sizing.warehouse:
+            # Read by the dbt profile (dbt/profiles.yml)
+            env['SNOWFLAKE_WAREHOUSE'] = sizing.warehouse
+        return env
+
+    @staticmethod
+    def run_dir(ti) -> str:
+        """Run directory of one try of one task instance."""
+        run_id = re.sub(r'[^A-Za-z0-9_.-]', '_', ti.run_id)
+        return os.path.join(DEFERRED_STATE_DIR, 'commands', ti.dag_id, run_id, ti.task_id,
+                            f"{ti.map_index}-{ti.try_number}")
+
+    def execute(self, context):
+        sizing = size_step(self.sizing_step, self.sizing_schemas)
+        started = time.time()
+        if not self.deferrable:
+            result = subprocess.run(['bash', '-c', self.bash_command], env=self._command_env(sizing),
+                                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+            print(result.stdout)
+            if result.returncode != 0:
+                raise AirflowException(f"Command failed with exit code {result.returncode}")
+            if sizing:
+                finish_step(sizing, time.time() - started, metrics=Instrumentation(task=self.task_id))
+            return
+
+        run_dir = self.run_dir(context['ti'])
+        shutil.rmtree(run_dir, ignore_errors=True)
+        launch_command(self.bash_command, run_dir, self._command_env(sizing))
+        print(f"✓ Launched command, output in {run_dir}")
+
+        self.defer(
+            trigger=CommandTrigger(run_dir, self.poll_interval),
+            method_name='execute_complete',
+            kwargs={'sizing': sizing.as_dict() if sizing else None, 'started': started},
+            timeout=self.execution_timeout or COMMAND_TIMEOUT,
+        )
+
+    def execute_complete(self, context, event, sizing: dict = None, started: float = None):
+        """Resume after the command exited: echo its output and fail on a non-zero exit code."""
+        print(read_output(event['run_dir']))
+        if event['status'] == ERROR and event['returncode'] is None:
+            raise AirflowException(f"Command stopped without an exit code: no heartbeat in {event['run_dir']} "
+                                   f"for over {HEARTBEAT_TIMEOUT_SECONDS:.0f}s (killed, or its worker restarted)")
+        if event['status'] == ERROR:
+            raise AirflowException(f"Command failed with exit code {event['returncode']}")
+        if sizing:
+            # Includes up to one poll interval of the triggerer noticing the exit
+            finish_step(SizingDecision.from_dict(sizing), time.time() - started,
+                        metrics=Instrumentation(task=self.task_id))
+
+
+class NewFilesSensor(BaseOperator):
+    """
+    Wait until files of `table_name` have landed that the ingest has not
+    loaded yet, and return {'files': [{csv_path, arrived_at}], 'detected_at'}
+    for the oldest `max_files` of them (see ecommerce_dq.microbatch).
+    """
+
+    ui_color = '#e6f1f2'
+
+    def __init__(self, *, table_name: str, raw_dir: str = None, max_files: int = MAX_FILES,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, deferrable: bool = True, **kwargs):
+        super().__init__(**kwargs)
+        self.table_name = table_name
+        self.raw_dir = raw_dir
+        self.max_files = max_files
+        self.poll_interval = poll_interval
+        self.deferrable = deferrable
+
+    def execute(self, context):
+        files = new_files(self.table_name, self.raw_dir, self.max_files)
+        if files:
+            return self._publish({'files': files, 'detected_at': time.time()})
+        if not self.deferrable:
+            while not files:
+                time.sleep(self.poll_interval)
+                files = new_files(self.table_name, self.raw_dir, self.max_files)
+            return self._publish({'files': files, 'detected_at': time.time()})
+
+        self.defer(
+            trigger=NewFilesTrigger(self.table_name, self.raw_dir, self.max_files, self.poll_interval),
+            method_name='execute_complete',
+            timeout=self.execution_timeout,
+        )
+
+    def execute_complete(self, context, event):
+        """Resume after files landed."""
+        return self._publish(event)
+
+    def _publish(self, event: dict) -> dict:
+        print(f"✓ {len(event['files'])} new files for {self.table_name}: {[f['csv_path'] for f in event['files']]}")
+        return event
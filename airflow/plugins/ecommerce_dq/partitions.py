@@ -0,0 +1,132 @@
+"""
+Partitioned ingest inputs for the dynamically mapped ingest tasks.
+
+A raw table's input is <raw_dir>/<table>.csv and/or any number of partition
+files under <raw_dir>/<table>/*.csv. Files larger than
+DQ_INGEST_PARTITION_BYTES are split into newline-aligned byte ranges, so a
+single large file still spreads across workers. A range is read with the
+file's header line prepended; fields must not contain embedded newlines.
+
+Partition files are written once (the micro-batch DAG's landing layout), so
+the ones the ingest manifest already records as loaded, whole or range by
+range, are not listed again. <table>.csv is listed on every run.
+"""
+
+import glob
+import io
+import os
+
+from ecommerce_dq.schema import bare_table_name
+
+DEFAULT_PARTITION_BYTES = 256 * 1024 ** 2
+PARTITION_BYTES = int(os.getenv('DQ_INGEST_PARTITION_BYTES', DEFAULT_PARTITION_BYTES))
+
+
+def table_files(table_name: str, raw_dir: str) -> list:
+    """Input files of a raw table: <table>.csv plus <table>/*.csv, in name order."""
+    table = bare_table_name(table_name)
+    single = os.path.join(raw_dir, f"{table}.csv")
+    files = [single] if os.path.exists(single) else []
+    return files + sorted(glob.glob(os.path.join(raw_dir, table, '*.csv')))
+
+
+def byte_ranges(path: str, target_bytes: int = PARTITION_BYTES) -> list:
+    """
+    Split a CSV into (start, end) byte ranges of about `target_bytes`, each
+    starting on a line boundary after the header. A file with no data rows has none.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.readline()
+        start = f.tell()
+        ranges = []
+        while start < size:
+            f.seek(min(start + target_bytes, size))
+            if f.tell() < size:
+                f.readline()
+            end = f.tell()
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def file_ranges(path: str, target_bytes: int = PARTITION_BYTES) -> list:
+    """(start, end) of each partition of a file: [(None, None)] for the whole file up to `target_bytes`."""
+    if os.path.getsize(path) <= target_bytes:
+        return [(None, None)]
+    return byte_ranges(path, target_bytes)
+
+
+def partition_id(csv_path: str, start: int = None, end: int = None) -> str:
+    """Stable identifier of a partition, shared by retries of its ingest task."""
+    if start is None and end is None:
+        return csv_path
+    return f"{csv_path}:{start}-{end}"
+
+
+def file_loaded(path: str, loads: dict, target_bytes: int = PARTITION_BYTES) -> bool:
+    """Whether the manifest `loads` record `path`, as one partition or as each of its byte ranges."""
+    if path in loads:
+        return True
+    return all(partition_id(path, start, end) in loads for start, end in file_ranges(path, target_bytes))
+
+
+def discover_partitions(table_name: str, raw_dir: str, target_bytes: int = PARTITION_BYTES,
+                        loads: dict = None) -> list:
+    """
+    One ingest partition per file, or per byte range of files larger than
+    `target_bytes`: dicts of ingest_csv_to_snowflake keyword arguments.
+    Partition files already recorded in the manifest `loads` are skipped.
+    """
+    directory = os.path.join(raw_dir, bare_table_name(table_name))
+    partitions = []
+    for path in table_files(table_name, raw_dir):
+        if loads and os.path.dirname(path) == directory and file_loaded(path, loads, target_bytes):
+            continue
+        for start, end in file_ranges(path, target_bytes):
+            if start is None:
+                partitions.append({'table_name': table_name, 'csv_path': path})
+            else:
+                partitions.append({'table_name': table_name, 'csv_path': path, 'start': start, 'end': end})
+    return partitions
+
+
+class CsvRange(io.RawIOBase):
+    """Read-only view of the header line plus bytes [start, end) of a CSV file."""
+
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, 'rb')
+        self._pending = self._file.readline()
+        self._file.seek(start)
+        self._remaining = end - start
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        size = len(buffer)
+        data = self._pending[:size]
+        self._pending = self._pending[len(data):]
+        if len(data) < size and self._remaining > 0:
+            body = self._file.read(min(size - len(data), self._remaining))
+            self._remaining -= len(body)
+            data += body
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        """Bytes handed out so far."""
+        return self._position
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_partition(csv_path: str, start: int = None, end: int = None):
+    """Binary file object over a whole CSV, or over one byte range of it."""
+    if start is None and end is None:
+        return open(csv_path, 'rb')
+    return CsvRange(csv_path, start, end)
@@ -0,0 +1,66 @@
+"""
+Typed results of the warehouse check queries.
+
+A check query returns one row. QueryResult keeps that row together with its
+column names (the query's aliases), so consumers read
+`results['orders_validity'].negative_amounts` instead of positional indexes.
+
+It serializes to a versioned dict through the serialize / deserialize /
+__version__ protocol of Airflow's XCom serialization, so it round-trips
+through XCom (allow `ecommerce_dq\\..*` in allowed_deserialization_classes).
+"""
+
+
+class QueryResult:
+    """First row of a named query, addressable by column name."""
+
+    __version__ = 1
+
+    def __init__(self, name: str, columns: list, values=None):
+        # Snowflake upper-cases unquoted aliases, DuckDB keeps them as written
+        columns = [str(column).lower() for column in columns]
+        values = tuple(values) if values is not None else (None,) * len(columns)
+        if len(values) != len(columns):
+            raise ValueError(f"Result '{name}' has {len(values)} values for {len(columns)} columns")
+        self.name = name
+        self.columns = columns
+        self.values = values
+
+    @classmethod
+    def from_cursor(cls, name: str, cursor, row):
+        """Build from a DB-API cursor's description and the row fetched from it."""
+        return cls(name, [description[0] for description in cursor.description], row)
+
+    def __getattr__(self, column: str):
+        if column.startswith('_') or 'columns' not in self.__dict__:
+            raise AttributeError(column)
+        try:
+            return self.values[self.columns.index(column)]
+        except ValueError:
+            raise AttributeError(f"Result '{self.name}' has no column '{column}' (columns: {self.columns})") from None
+
+    def __getitem__(self, column: str):
+        try:
+            return getattr(self, column)
+        except AttributeError as e:
+            raise KeyError(column) from e
+
+    def as_dict(self) -> dict:
+        return dict(zip(self.columns, self.values))
+
+    def __eq__(self, other):
+        if not isinstance(other, QueryResult):
+            return NotImplemented
+        return (self.name, self.columns, self.values) == (other.name, other.columns, other.values)
+
+    def __repr__(self):
+        return f"QueryResult({self.name!r}, {self.as_dict()})"
+
+    def serialize(self) -> dict:
+        return {'name': self.name, 'columns': self.columns, 'values': list(self.values)}
+
+    @classmethod
+    def deserialize(cls, data: dict, version: int):
+        if version > cls.__version__:
+            raise TypeError(f"QueryResult version {version} is newer than supported ({cls.__version__})")
+        return cls(data['name'], data['columns'], data['values'])
@@ -0,0 +1,81 @@
+"""
+Access to the raw table definitions in data/schemas/raw_schema.json.
+"""
+
+import json
+import os
+from functools import lru_cache
+
+DATA_DIR = os.getenv('DQ_DATA_DIR', '/opt/airflow/data')
+RAW_SCHEMA_PATH = os.getenv('DQ_RAW_SCHEMA_PATH', os.path.join(DATA_DIR, 'schemas', 'raw_schema.json'))
+
+
+@lru_cache(maxsize=None)
+def load_raw_schema(path: str = RAW_SCHEMA_PATH) -> dict:
+    """Load and cache the raw schema definition."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def bare_table_name(table_name: str) -> str:
+    """Strip any schema prefix, e.g. 'raw.orders' -> 'orders'."""
+    return table_name.split('.')[-1].lower()
+
+
+def table_columns(table_name: str, path: str = RAW_SCHEMA_PATH) -> list:
+    """Return the column definitions for a raw table."""
+    return load_raw_schema(path)[bare_table_name(table_name)]['columns']
+
+
+def primary_key(table_name: str, path: str = RAW_SCHEMA_PATH) -> str:
+    """Return the primary key column of a raw table."""
+    for col in table_columns(table_name, path):
+        if col.get('primary_key'):
+            return col['name']
+    raise KeyError(f"No primary key declared for '{table_name}' in raw schema")
+
+
+def foreign_keys(table_name: str, path: str = RAW_SCHEMA_PATH) -> dict:
+    """Return {column: (parent_table, parent_column)} for a raw table's foreign keys."""
+    fks = {}
+    for col in table_columns(table_name, path):
+        if col.get('foreign_key'):
+            parent_table, parent_column = col['foreign_key'].split('.')
+            fks[col['name']] = (parent_table, parent_column)
+    return fks
+
+
+def referenced_columns(table_name: str, path: str = RAW_SCHEMA_PATH) -> list:
+    """Return the columns of a raw table that other tables reference as a foreign key."""
+    table = bare_table_name(table_name)
+    referenced = []
+    for other in load_raw_schema(path):
+        for parent_table, parent_column in foreign_keys(other, path).values():
+            if parent_table == table and parent_column not in referenced:
+                referenced.append(parent_column)
+    return referenced
+
+
+def read_dtypes(table_name: str, path: str = RAW_SCHEMA_PATH) -> dict:
+    """
+    pandas dtypes for reading a raw CSV. Raw tables are VARCHAR, so values
+    stay text: columns marked "encoding": "category" (a handful of distinct
+    values) are dictionary-encoded, everything else is an Arrow-backed string.
+    """
+    return {
+        col['name']: 'category' if col.get('encoding') == 'category' else 'string[pyarrow]'
+        for col in table_columns(table_name, path)
+    }
+
+
+def partition_column(table_name: str, path: str = RAW_SCHEMA_PATH):
+    """
+    The timestamp column that assigns a raw table's rows to days (backfill
+    partitions), or None for dimension tables loaded whole.
+    """
+    return load_raw_schema(path)[bare_table_name(table_name)].get('partition_column')
+
+
+def staging_model(table_name: str, path: str = RAW_SCHEMA_PATH):
+    """The dbt staging model built from a raw table, or None when the feed has none yet."""
+    return load_raw_schema(path)[bare_table_name(table_name)].get('staging_model')
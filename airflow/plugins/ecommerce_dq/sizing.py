@@ -0,0 +1,206 @@
+"""
+Warehouse right-sizing per pipeline step.
+
+Each ingest partition, dbt command, quality gate and validation query set
+runs on a warehouse picked for its input, instead of every step sharing
+the connection's SNOWFLAKE_WAREHOUSE:
+
+- DQ_WAREHOUSES names one warehouse per size, e.g.
+  XSMALL=DQ_WH_XS,SMALL=DQ_WH_S,MEDIUM=DQ_WH_M,LARGE=DQ_WH_L; only those
+  sizes are candidates. Unset, decisions are logged but not applied, and
+  runtimes stay out of the history since the connection's default ran them.
+- The input is measured before the step runs: file bytes for an ingest
+  partition, rows in the schemas a dbt step or check set reads.
+- Each size up doubles the compute, so a step is estimated to take
+  input x (XSMALL seconds per unit) / 2^size. The rate comes from the
+  step's recent runs on comparable inputs (within HISTORY_INPUT_RATIO),
+  normalized to XSMALL, or from DEFAULT_XSMALL_SECONDS_PER_UNIT without
+  any.
+- The smallest size estimated to finish within DQ_SIZING_TARGET_SECONDS
+  wins, or the largest candidate when none does.
+
+Decisions and the runtimes that follow are printed, exported as sizing.*
+metrics and appended to the step's history at
+<DQ_DATA_DIR>/state/sizing/<step>.json, which the next decisions learn
+from. decide() is pure; on the DuckDB stand-in choosing a warehouse is a
+no-op, so the policy runs offline end to end.
+"""
+
+import json
+import os
+import re
+import statistics
+from datetime import datetime
+
+from ecommerce_dq.locks import FileLock, replace_file
+from ecommerce_dq.schema import DATA_DIR
+
+SIZES = ('XSMALL', 'SMALL', 'MEDIUM', 'LARGE', 'XLARGE', 'XXLARGE')
+
+SIZING_STATE_DIR = os.getenv('DQ_SIZING_STATE_DIR', os.path.join(DATA_DIR, 'state', 'sizing'))
+TARGET_SECONDS = float(os.getenv('DQ_SIZING_TARGET_SECONDS', '300'))
+
+BYTES = 'bytes'
+ROWS = 'rows'
+# XSMALL seconds per unit of input before a step has history: ~20 MB/s loaded, ~500k rows/s transformed
+DEFAULT_XSMALL_SECONDS_PER_UNIT = {BYTES: 1 / (20 * 2 ** 20), ROWS: 1 / 500_000}
+
+# Runs kept per step, and how far (either way) a past input may be from the current one to count
+HISTORY_RUNS = 20
+HISTORY_INPUT_RATIO = 4
+
+
+def credits_per_hour(size: str) -> int:
+    return 2 ** SIZES.index(size)
+
+
+def warehouse_set(spec: str = None) -> dict:
+    """{size: warehouse} from a SIZE=WAREHOUSE,... spec (default: DQ_WAREHOUSES), smallest size first."""
+    spec = os.getenv('DQ_WAREHOUSES', '') if spec is None else spec
+    warehouses = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        size, _, name = (part.strip() for part in item.partition('='))
+        size = size.upper().replace('-', '')
+        # Names go into USE WAREHOUSE unquoted
+        if size not in SIZES or not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_$]*', name):
+            raise ValueError(f"Invalid warehouse '{item}' in DQ_WAREHOUSES, expected SIZE=NAME with SIZE in {SIZES}")
+        warehouses[size] = name
+    return {size: warehouses[size] for size in SIZES if size in warehouses}
+
+
+class SizingDecision:
+    """Warehouse picked for one run of a step, with the input and estimate behind it."""
+
+    def __init__(self, step: str, size: str, warehouse: str, input_size: float, unit: str,
+                 estimated_seconds: float, history_runs: int = 0):
+        self.step = step
+        self.size = size
+        # None: the connection's default warehouse
+        self.warehouse = warehouse
+        self.input_size = input_size
+        self.unit = unit
+        self.estimated_seconds = estimated_seconds
+        self.history_runs = history_runs
+
+    def as_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, values: dict):
+        return cls(**values)
+
+    def __eq__(self, other):
+        if not isinstance(other, SizingDecision):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"SizingDecision({self.as_dict()})"
+
+    def describe(self) -> str:
+        basis = f"{self.history_runs} past runs" if self.history_runs else 'default rate'
+        return (f"{self.size} ({self.warehouse or 'connection default'}) for {self.input_size:,.0f} {self.unit}, "
+                f"estimated {self.estimated_seconds:.1f}s from {basis}")
+
+
+def history_path(step: str, state_dir: str = None) -> str:
+    return os.path.join(state_dir or SIZING_STATE_DIR, f"{step}.json")
+
+
+def read_history(step: str, state_dir: str = None) -> list:
+    path = history_path(step, state_dir)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)['runs']
+
+
+def record_run(decision: SizingDecision, seconds: float, state_dir: str = None) -> list:
+    """Append a finished run to its step's history, keeping the last HISTORY_RUNS."""
+    path = history_path(decision.step, state_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Mapped ingest partitions of one table record their runs in parallel
+    with FileLock(f"{path}.lock"):
+        runs = read_history(decision.step, state_dir)
+        runs.append({
+            'size': decision.size,
+            'input_size': decision.input_size,
+            'unit': decision.unit,
+            'seconds': round(seconds, 3),
+            'estimated_seconds': round(decision.estimated_seconds, 3),
+            'finished_at': datetime.now().isoformat(),
+        })
+        runs = runs[-HISTORY_RUNS:]
+        replace_file(path, lambda f: f.write(json.dumps({'step': decision.step, 'runs': runs}, indent=2).encode()))
+    return runs
+
+
+def xsmall_rate(history: list, input_size: float, unit: str) -> tuple:
+    """
+    (XSMALL seconds per unit, runs used): the median over past runs with a
+    comparable input in the same unit, or the default rate when there are none.
+    """
+    rates = [
+        run['seconds'] * credits_per_hour(run['size']) / run['input_size']
+        for run in history
+        if run['unit'] == unit and run['input_size'] > 0 and run['size'] in SIZES
+        and input_size / HISTORY_INPUT_RATIO <= run['input_size'] <= input_size * HISTORY_INPUT_RATIO
+    ]
+    if not rates:
+        return DEFAULT_XSMALL_SECONDS_PER_UNIT[unit], 0
+    return statistics.median(rates), len(rates)
+
+
+def decide(step: str, input_size: float, unit: str = ROWS, history: list = (), warehouses: dict = None,
+           target_seconds: float = TARGET_SECONDS) -> SizingDecision:
+    """The smallest candidate size estimated to run `step` on `input_size` within `target_seconds`."""
+    if unit not in DEFAULT_XSMALL_SECONDS_PER_UNIT:
+        raise ValueError(f"Unknown input unit '{unit}', expected one of {tuple(DEFAULT_XSMALL_SECONDS_PER_UNIT)}")
+    warehouses = warehouses or {}
+    candidates = list(warehouses) or list(SIZES)
+    rate, runs = xsmall_rate(history, input_size, unit)
+    for size in candidates:
+        estimated = input_size * rate / credits_per_hour(size)
+        if estimated <= target_seconds:
+            break
+    return SizingDecision(step, size, warehouses.get(size), input_size, unit, estimated, runs)
+
+
+def choose_warehouse(step: str, input_size: float, unit: str = ROWS, state_dir: str = None,
+                     metrics=None) -> SizingDecision:
+    """decide() with the step's history and the configured warehouses; logs the decision."""
+    decision = decide(step, input_size, unit, read_history(step, state_dir), warehouse_set())
+    print(f"✓ Warehouse for '{step}': {decision.describe()}")
+    if metrics is not None:
+        metrics.metric('sizing.size_index', SIZES.index(decision.size), step=step, size=decision.size)
+        metrics.metric('sizing.estimated_seconds', round(decision.estimated_seconds, 3), step=step,
+                       size=decision.size)
+    return decision
+
+
+def finish_step(decision: SizingDecision, seconds: float, state_dir: str = None, metrics=None):
+    """
+    Log a sized step's runtime and add it to the step's history. When no
+    warehouse was applied, the connection's default ran the step at an
+    unknown size: the runtime is logged but kept out of the history.
+    """
+    if decision.warehouse is None:
+        print(f"✓ '{decision.step}' ran {seconds:.1f}s on the connection default "
+              f"(DQ_WAREHOUSES unset, not added to the sizing history)")
+        if metrics is not None:
+            metrics.metric('sizing.seconds', round(seconds, 3), step=decision.step)
+        return read_history(decision.step, state_dir)
+    credits = credits_per_hour(decision.size) * seconds / 3600
+    print(f"✓ '{decision.step}' ran {seconds:.1f}s on {decision.size} "
+          f"(estimated {decision.estimated_seconds:.1f}s, ~{credits:.4f} credits)")
+    if metrics is not None:
+        metrics.metric('sizing.seconds', round(seconds, 3), step=decision.step, size=decision.size)
+        metrics.metric('sizing.credits', round(credits, 6), step=decision.step, size=decision.size)
+    return record_run(decision, seconds, state_dir)
+
+
+def input_rows(conn, schemas) -> int:
+    """Rows in the base tables of `schemas`, from table statistics."""
+    from ecommerce_dq.warehouse import table_row_counts
+
+    return sum(sum(table_row_counts(conn, schema).values()) for schema in schemas)
@@ -0,0 +1,115 @@
+"""
+Row counts and freshness of the raw tables, answered from metadata.
+
+Every ingest records what it loaded in a per-table manifest under
+<DQ_DATA_DIR>/state/ingest/<table>.json, one entry per partition:
+
+    {"table": "orders", "loads": {"<partition id>": {"rows": 1200, "max_event_time": "...", "loaded_at": "..."}}}
+
+The raw gate's volume and freshness checks run on every load, so they are
+answered from the manifest and from the warehouse's table statistics
+(warehouse.table_row_counts) instead of scanning the VARCHAR raw tables.
+The manifest is trusted only while its row total matches the table's row
+count: rows loaded or deleted outside the ingest (a backfill, a manual fix)
+make it stale, and the check falls back to its SQL scan, as it does when
+there is no manifest or no statistics.
+"""
+
+import json
+import os
+from datetime import datetime
+
+from ecommerce_dq.locks import FileLock, replace_file
+from ecommerce_dq.schema import DATA_DIR, bare_table_name
+
+INGEST_STATE_DIR = os.getenv('DQ_INGEST_STATE_DIR', os.path.join(DATA_DIR, 'state', 'ingest'))
+
+ROW_COUNT = 'row_count'
+FRESHNESS_HOURS = 'freshness_hours'
+STATISTICS = (ROW_COUNT, FRESHNESS_HOURS)
+
+
+def manifest_path(table_name: str, state_dir: str = INGEST_STATE_DIR) -> str:
+    return os.path.join(state_dir, f"{bare_table_name(table_name)}.json")
+
+
+def read_manifest(table_name: str, state_dir: str = INGEST_STATE_DIR) -> dict:
+    path = manifest_path(table_name, state_dir)
+    if not os.path.exists(path):
+        return {'table': bare_table_name(table_name), 'loads': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def event_time_summary(df, column: str) -> tuple:
+    """(newest parseable timestamp of `column` as an ISO string or None, YYYY-MM-DD days present) of a raw chunk."""
+    import pandas as pd
+
+    times = pd.to_datetime(df[column].astype(object), errors='coerce')
+    newest = times.max()
+    days = sorted(times.dropna().dt.strftime('%Y-%m-%d').unique())
+    return (None if pd.isna(newest) else newest.isoformat()), days
+
+
+def record_load(table_name: str, partition: str, rows: int, event_time: str = None,
+                state_dir: str = INGEST_STATE_DIR) -> dict:
+    """Add a loaded chunk to its partition's entry; retries of a partition add to the same entry."""
+    path = manifest_path(table_name, state_dir)
+    os.makedirs(state_dir, exist_ok=True)
+    # Mapped ingest tasks of one table record their loads in parallel
+    with FileLock(f"{path}.lock"):
+        manifest = read_manifest(table_name, state_dir)
+        entry = manifest['loads'].setdefault(partition, {'rows': 0, 'max_event_time': None})
+        entry['rows'] += rows
+        if event_time and (entry['max_event_time'] is None or event_time > entry['max_event_time']):
+            entry['max_event_time'] = event_time
+        entry['loaded_at'] = datetime.now().isoformat()
+        replace_file(path, lambda f: f.write(json.dumps(manifest, indent=2).encode()))
+    return manifest
+
+
+def manifest_totals(manifest: dict) -> tuple:
+    """(rows loaded, newest event time) over all loads of a manifest."""
+    loads = manifest['loads'].values()
+    event_times = [load['max_event_time'] for load in loads if load.get('max_event_time')]
+    return sum(load['rows'] for load in loads), max(event_times, default=None)
+
+
+class TableMetadata:
+    """
+    Metadata-served statistics of the raw tables on one warehouse connection.
+    Each returns None when the metadata is missing or stale, meaning: scan.
+    """
+
+    def __init__(self, conn, state_dir: str = INGEST_STATE_DIR):
+        self.conn = conn
+        self.state_dir = state_dir
+        self._row_counts = None
+
+    def table_rows(self, table_name: str):
+        """Row count from the warehouse statistics of the raw schema (fetched once)."""
+        from ecommerce_dq.warehouse import table_row_counts
+
+        if self._row_counts is None:
+            self._row_counts = table_row_counts(self.conn, 'raw')
+        return self._row_counts.get(bare_table_name(table_name))
+
+    def row_count(self, table_name: str):
+        rows = self.table_rows(table_name)
+        manifest = read_manifest(table_name, self.state_dir)
+        if rows is None or (manifest['loads'] and manifest_totals(manifest)[0] != rows):
+            return None
+        return rows
+
+    def freshness_hours(self, table_name: str, now: datetime = None):
+        """Hours since the newest loaded event, when the manifest accounts for every row."""
+        loaded, newest = manifest_totals(read_manifest(table_name, self.state_dir))
+        if newest is None or loaded != self.table_rows(table_name):
+            return None
+        newest = datetime.fromisoformat(newest)
+        return ((now or datetime.now(newest.tzinfo)) - newest).total_seconds() / 3600
+
+    def read(self, statistic: str, table_name: str):
+        if statistic not in STATISTICS:
+            raise ValueError(f"Unknown statistic '{statistic}', expected one of {STATISTICS}")
+        return getattr(self, statistic)(table_name)
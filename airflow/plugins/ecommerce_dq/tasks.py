@@ -0,0 +1,389 @@
+"""
+Callables of the pipeline DAG's Python tasks (see ecommerce_dq.dag_factory).
+
+Kept out of the DAG file so that parsing it stays cheap: pandas, the
+warehouse drivers and the other heavy modules are imported inside each
+callable, when the task runs on a worker.
+"""
+
+import itertools
+import os
+import time
+
+from ecommerce_dq.schema import DATA_DIR
+
+DBT_PROJECT_DIR = os.getenv('DQ_DBT_PROJECT_DIR', '/opt/airflow/dbt')
+DBT_EXECUTABLE = os.getenv('DQ_DBT_EXECUTABLE', 'dbt')
+
+# Rows per ingest chunk: bounds memory and gives per-chunk timings
+INGEST_CHUNK_ROWS = int(os.getenv('DQ_INGEST_CHUNK_ROWS', '500000'))
+
+# Written by every dbt run/test; read by the dbt tasks' performance callbacks
+DBT_RUN_RESULTS_PATH = os.path.join(DBT_PROJECT_DIR, 'target', 'run_results.json')
+DBT_MANIFEST_PATH = os.path.join(DBT_PROJECT_DIR, 'target', 'manifest.json')
+
+
+def list_ingest_partitions(table_name: str, **context):
+    """
+    Discover the input partitions of a raw table; the result expands into one
+    mapped ingest task per partition.
+    """
+    from ecommerce_dq.partitions import discover_partitions
+    from ecommerce_dq.table_metadata import read_manifest
+    
+    # Landed files the micro-batch DAG (or an earlier run) already loaded are not read again
+    loads = read_manifest(table_name)['loads']
+    partitions = discover_partitions(table_name, os.path.join(DATA_DIR, 'raw'), loads=loads)
+    print(f"✓ {len(partitions)} ingest partitions for {table_name}")
+    return partitions
+
+
+def ingest_csv_to_snowflake(table_name: str, csv_path: str, start: int = None, end: int = None, **context):
+    """
+    Ingest CSV data into the warehouse raw tables, chunk by chunk.
+    `start`/`end` restrict the load to one byte range of the file (a partition).
+    Rows whose primary key was already seen (in this partition, another one or an earlier load) are dropped.
+    Foreign keys are probed against the parent key sets built at ingest time.
+    Each chunk emits read / convert / upload spans; the read span carries the frame's memory footprint.
+    Loaded rows and the newest event time are recorded in the table's ingest manifest (ecommerce_dq.table_metadata).
+    The load runs on the warehouse sized for the partition's bytes (ecommerce_dq.sizing).
+    Returns the rows loaded and the days (of the partition column) they fall on.
+    """
+    import pandas as pd
+    
+    from ecommerce_dq.dedup import KeyIndex
+    from ecommerce_dq.instrumentation import Instrumentation
+    from ecommerce_dq.integrity import ParentKeySet, check_orphans, merge_orphan_reports
+    from ecommerce_dq.partitions import open_partition, partition_id
+    from ecommerce_dq.schema import (
+        bare_table_name, foreign_keys, partition_column, primary_key, read_dtypes, referenced_columns,
+    )
+    from ecommerce_dq.sizing import BYTES, choose_warehouse, finish_step
+    from ecommerce_dq.table_metadata import event_time_summary, record_load
+    from ecommerce_dq.warehouse import get_hook, use_warehouse, write_dataframe
+    
+    metrics = Instrumentation(task='ingest', table=bare_table_name(table_name))
+    hook = get_hook()
+    
+    partition = partition_id(csv_path, start, end)
+    # The try number tells a retry's own stale claims from a concurrent load of the same file
+    attempt = getattr(context.get('ti'), 'try_number', 1)
+    key_index = KeyIndex(table_name, primary_key(table_name), partition=partition, attempt=attempt)
+    event_column = partition_column(table_name)
+    
+    # Foreign keys are probed against parent key sets, keys other tables reference are recorded
+    parent_keysets = {}
+    for fk_column, (parent_table, parent_column) in foreign_keys(table_name).items():
+        keyset = ParentKeySet.load(parent_table, parent_column)
+        if keyset is None:
+            print(f"⚠️  No key set for {parent_table}.{parent_column}, skipping RI check on {fk_column}")
+            continue
+        parent_keysets[fk_column] = keyset
+    referenced_keysets = {
+        column: ParentKeySet.load(table_name, column) or ParentKeySet(table_name, column)
+        for column in referenced_columns(table_name)
+    }
+    
+    dedup_totals = {}
+    ri_reports = {}
+    loaded_rows = 0
+    loaded_days = set()
+    table_created = False
+    
+    input_bytes = os.path.getsize(csv_path) if start is None else end - start
+    
+    conn = hook.get_conn()
+    cursor = conn.cursor()
+    
+    try:
+        sizing = choose_warehouse(f"ingest_{bare_table_name(table_name)}", input_bytes, BYTES, metrics=metrics)
+        use_warehouse(conn, sizing.warehouse)
+        started = time.time()
+        with open_partition(csv_path, start, end) as f, metrics.span('ingest.file', bytes=input_bytes) as file_span:
+            # Compact, schema-driven dtypes: categoricals and Arrow-backed strings instead of objects
+            chunks = pd.read_csv(f, chunksize=INGEST_CHUNK_ROWS, dtype=read_dtypes(table_name))
+            bytes_read = 0
+            for chunk_number in itertools.count():
+                read_start = time.time()
+                df = next(chunks, None)
+                if df is None:
+                    break
+                metrics.record_span('ingest.read', read_start, time.time(), chunk=chunk_number,
+                                    rows=len(df), bytes=f.tell() - bytes_read,
+                                    frame_bytes=int(df.memory_usage(deep=True).sum()))
+                bytes_read = f.tell()
+                
+                with metrics.span('ingest.convert', chunk=chunk_number) as span:
+                    # Drop duplicate keys before load
+                    df, dedup_stats = key_index.filter_new(df)
+                    for key, value in dedup_stats.items():
+                        dedup_totals[key] = dedup_totals.get(key, 0) + value
+                    
+                    # Referential integrity: probe foreign keys against parent key sets
+                    for fk_column, keyset in parent_keysets.items():
+                        report = check_orphans(df, fk_column, keyset)
+                        ri_reports[fk_column] = merge_orphan_reports(ri_reports.get(fk_column), report)
+                    span['rows'] = len(df)
+                
+                if df.empty:
+                    continue
+                
+                with metrics.span('ingest.upload', chunk=chunk_number) as span:
+                    if not table_created:
+                        cursor.execute(f"""
+                            CREATE TABLE IF NOT EXISTS {table_name} (
+                                {', '.join([f"{col} VARCHAR" for col in df.columns])}
+                            )
+                        """)
+                        table_created = True
+                    
+                    # Write dataframe to the warehouse
+                    nrows = write_dataframe(conn, df, table_name)
+                    span['rows'] = nrows
+                    loaded_rows += nrows
+                    
+                    # Remember loaded keys only once the chunk is loaded
+                    key_index.commit()
+                    newest, days = event_time_summary(df, event_column) if event_column else (None, [])
+                    record_load(table_name, partition, nrows, newest)
+                    loaded_days.update(days)
+                    for column, keyset in referenced_keysets.items():
+                        keyset.add(df[column])
+                        keyset.save()
+            
+            file_span['rows'] = loaded_rows
+        
+        print(f"✓ Dedup {table_name}: {dedup_totals}")
+        for fk_column, report in ri_reports.items():
+            parent_table, parent_column = foreign_keys(table_name)[fk_column]
+            print(f"✓ RI check {table_name}.{fk_column} -> {parent_table}.{parent_column}: {report}")
+        if ri_reports:
+            context['ti'].xcom_push(key='ri_report', value=ri_reports)
+        
+        metrics.metric('ingest.in_file_duplicates', dedup_totals.get('in_file_duplicates', 0))
+        metrics.metric('ingest.cross_load_duplicates', dedup_totals.get('cross_load_duplicates', 0))
+        if loaded_rows:
+            print(f"✓ Loaded {loaded_rows} rows into {table_name}")
+        else:
+            # Still recorded, so the partition counts as ingested
+            record_load(table_name, partition, 0)
+            print(f"✓ No new rows for {table_name}")
+        finish_step(sizing, time.time() - started, metrics=metrics)
+        return {'table': table_name, 'rows': loaded_rows, 'days': sorted(loaded_days)}
+        
+    except Exception:
+        # Release this partition's key claims so the rows are not dropped elsewhere
+        key_index.abort()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+        key_index.close()
+
+
+def run_quality_gate(gate: str, table_name: str = None, **context):
+    """
+    Circuit breaker: run the checks for a pipeline stage (the raw stage per
+    feed, `table_name`) and push results to XCom.
+    Returns False when a blocking check fails, skipping the pipeline downstream;
+    alert_on_issues still runs and reports the failures.
+    """
+    from ecommerce_dq.circuit_breaker import blocking_failures, evaluate_checks, gate_checks
+    from ecommerce_dq.instrumentation import Instrumentation
+    from ecommerce_dq.schema import bare_table_name
+    from ecommerce_dq.sizing import choose_warehouse, finish_step, input_rows
+    from ecommerce_dq.table_metadata import TableMetadata
+    from ecommerce_dq.warehouse import get_hook, use_warehouse
+    
+    if table_name:
+        gate_name = f"{gate}:{bare_table_name(table_name)}"
+        metrics = Instrumentation(task=f"{gate}_quality_gate", table=bare_table_name(table_name))
+    else:
+        gate_name = gate
+        metrics = Instrumentation(task=f"{gate}_quality_gate")
+    hook = get_hook()
+    checks = gate_checks(gate, table_name)
+    check_names = {check.sql: check.name for check in checks}
+    
+    conn = hook.get_conn()
+    cursor = conn.cursor()
+    # Volume and freshness checks are answered from the ingest manifest and table statistics when current
+    table_metadata = TableMetadata(conn)
+    scanned = set()
+    
+    def run_scalar(sql):
+        scanned.add(check_names[sql])
+        return metrics.query(cursor, sql, check_names[sql])[0]
+    
+    try:
+        # Sized for the rows the gate's checks read: the feed's raw table, or the staging schema
+        rows = (table_metadata.table_rows(table_name) or 0) if table_name else input_rows(conn, [gate])
+        sizing = choose_warehouse(f"{gate}_quality_gate", rows, metrics=metrics)
+        use_warehouse(conn, sizing.warehouse)
+        started = time.time()
+        with metrics.span('quality_gate') as span:
+            results = evaluate_checks(run_scalar, checks, table_metadata.read)
+            span['metadata_checks'] = len(results) - len(scanned)
+        finish_step(sizing, time.time() - started, metrics=metrics)
+    finally:
+        cursor.close()
+        conn.close()
+    
+    for result in results:
+        status = '✓' if result['passed'] else '✗'
+        source = '' if result['name'] in scanned else ' (metadata)'
+        print(f"{status} Gate '{gate_name}' check '{result['name']}' [{result['severity']}]: {result['value']}{source}")
+    
+    context['ti'].xcom_push(key='gate_results', value=results)
+    
+    failures = blocking_failures(results)
+    if failures:
+        print(f"⚠️  CIRCUIT BREAKER OPEN at '{gate_name}' gate, skipping downstream tasks:")
+        for failure in failures:
+            print(f"  - {failure['name']}: {failure['value']}")
+        return False
+    
+    return True
+
+
+def alert_on_quality_issues(gate_task_ids: list = (), **context):
+    """
+    Check quality results and alert if thresholds are breached. Runs even when
+    a circuit breaker skipped validation: the blocking failures of the gates in
+    `gate_task_ids` are alerted on first.
+    """
+    from ecommerce_dq.circuit_breaker import blocking_failures
+    from ecommerce_dq.instrumentation import Instrumentation
+    from ecommerce_dq.validation import RI_CHECK_SUFFIX
+    
+    metrics = Instrumentation(task='alert_on_issues')
+    
+    issues = []
+    
+    # Gates that opened their circuit breaker (gates skipped by an earlier one pushed nothing)
+    for task_id in gate_task_ids:
+        for failure in blocking_failures(context['ti'].xcom_pull(key='gate_results', task_ids=task_id) or []):
+            issues.append(f"Circuit breaker open at '{task_id}': {failure['name']} = {failure['value']}")
+    
+    results = context['ti'].xcom_pull(key='quality_results', task_ids='validate_quality')
+    if results is None:
+        if not issues:
+            issues.append("Quality validation produced no results (validate_quality did not succeed)")
+        results = {}
+    
+    # Check email completeness
+    customers = results.get('customers_completeness')
+    if customers is not None and customers.email_completeness < 0.95:  # 95% threshold
+        issues.append(f"Customer email completeness: {customers.email_completeness:.2%}")
+    
+    # Check for negative amounts
+    orders = results.get('orders_validity')
+    if orders is not None and orders.negative_amounts > 0:
+        issues.append(f"Found {orders.negative_amounts} orders with negative amounts")
+    
+    # Check for invalid statuses
+    if orders is not None and orders.invalid_statuses > 0:
+        issues.append(f"Found {orders.invalid_statuses} orders with invalid status")
+    
+    # Check for invalid event types
+    if 'events_quality' in results and results['events_quality'].invalid_event_types > 0:
+        issues.append(f"Found {results['events_quality'].invalid_event_types} events with invalid types")
+    
+    # Check for orphaned foreign keys, one generated check per feed (see ecommerce_dq.validation)
+    for name, result in results.items():
+        if name.endswith(RI_CHECK_SUFFIX) and result.orphan_rows > 0:
+            issues.append(f"Found {result.orphan_rows} {name[:-len(RI_CHECK_SUFFIX)]} rows with unknown foreign keys")
+    
+    metrics.metric('alert.issues', len(issues))
+    if issues:
+        print("⚠️  DATA QUALITY ISSUES DETECTED:")
+        for issue in issues:
+            print(f"  - {issue}")
+        # In production: send to Slack, PagerDuty, etc.
+    else:
+        print("✓ All data quality checks passed!")
+    
+    return issues
+
+
+def report_dbt_metrics(context):
+    """
+    Callback for the dbt run/test tasks: export per-model timings, rows and
+    query IDs from the run_results.json written by this task's invocation,
+    record them in the run history and report the critical path, the
+    dominant model and any runtime regressions.
+    """
+    from ecommerce_dq.dbt_analyzer import analyze_run, bytes_scanned_sql, load_json, parse_nodes
+    from ecommerce_dq.instrumentation import Instrumentation, emit_dbt_run_results
+    from ecommerce_dq.warehouse import get_hook
+    
+    ti = context['ti']
+    metrics = Instrumentation(task=ti.task_id)
+    not_before = ti.start_date.timestamp() if ti.start_date else None
+    nodes = emit_dbt_run_results(metrics, DBT_RUN_RESULTS_PATH, not_before=not_before)
+    print(f"✓ Exported dbt metrics for {nodes} nodes")
+    if not nodes:
+        return
+    
+    # Bytes scanned is not in run_results; look it up in the query history
+    query_ids = [n['query_id'] for n in parse_nodes(load_json(DBT_RUN_RESULTS_PATH)) if n['query_id']]
+    bytes_scanned = {}
+    if query_ids:
+        bytes_scanned = dict(get_hook().get_records(bytes_scanned_sql(query_ids)))
+    
+    report = analyze_run(DBT_RUN_RESULTS_PATH, DBT_MANIFEST_PATH, ti.task_id, bytes_scanned=bytes_scanned)
+    print(f"✓ Critical path ({report['critical_path_seconds']}s of {report['elapsed_time']:.1f}s): "
+          f"{' -> '.join(report['critical_path'])}")
+    print(f"✓ Dominant node: {report['dominant_node']} ({report['dominant_share']:.0%} of elapsed)"
+          if report['dominant_share'] is not None else f"✓ Dominant node: {report['dominant_node']}")
+    if report['regressions']:
+        print("⚠️  DBT RUNTIME REGRESSIONS:")
+        for regression in report['regressions']:
+            print(f"  - {regression['unique_id']}: {regression['execution_time']:.1f}s "
+                  f"(median {regression['baseline']:.1f}s, +{regression['slowdown_pct']}%)")
+    ti.xcom_push(key='dbt_performance', value=report)
+
+
+def export_feature_cache(**context):
+    """
+    Refresh the versioned Arrow cache of the ML feature tables
+    (see ecommerce_dq.feature_cache) with the rows changed by this run.
+    A new version is published once its point-lookup index
+    (ecommerce_dq.feature_index) is built.
+    """
+    from functools import partial
+    
+    from ecommerce_dq.feature_cache import CACHE_TABLES, refresh_cache
+    from ecommerce_dq.feature_index import build_index, index_dir
+    from ecommerce_dq.instrumentation import Instrumentation
+    
+    def index_version(metrics, table, version, cache_dir=None):
+        with metrics.span('feature_index.build') as span:
+            meta = build_index(table, version, cache_dir)
+            span['rows'] = meta['rows']
+        print(f"✓ Indexed {table} v{meta['version']}: {meta['rows']} keys, {len(meta['columns'])} features")
+    
+    summaries = []
+    for table in CACHE_TABLES:
+        metrics = Instrumentation(task='export_feature_cache', table=table)
+        with metrics.span('feature_cache.refresh') as span:
+            summary = refresh_cache(table, prepare=partial(index_version, metrics))
+            span['rows'] = summary['rows']
+        metrics.metric('feature_cache.changed_rows', summary['changed'] + summary['deleted'])
+        print(f"✓ Cached {table} v{summary['version']} ({summary['refresh']}): {summary['changed']} changed, "
+              f"{summary['deleted']} deleted of {summary['rows']} rows in {summary['seconds']}s")
+        if summary['evicted']:
+            print(f"✓ Evicted {table} versions {summary['evicted']}")
+        # An unchanged version cached before it had an index
+        if not os.path.exists(index_dir(table, summary['version'])):
+            index_version(metrics, table, summary['version'])
+        summaries.append(summary)
+    return summaries
+
+
+def init_warehouse(**context):
+    """Create the pipeline schemas in the configured warehouse."""
+    from ecommerce_dq.warehouse import init_schemas, warehouse_backend
+    
+    init_schemas()
+    print(f"✓ Schemas ready on {warehouse_backend()}")
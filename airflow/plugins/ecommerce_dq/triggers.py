@@ -0,0 +1,108 @@
+"""
+Triggers polled by the Airflow triggerer on behalf of the deferrable operators.
+
+Polling calls are synchronous (Snowflake connector, local files), so they run
+in the event loop's default executor instead of blocking the triggerer.
+"""
+
+import asyncio
+import time
+
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+
+from ecommerce_dq.deferral import RUNNING, check_queries, command_status, query_client
+from ecommerce_dq.microbatch import new_files
+
+DEFAULT_POLL_INTERVAL = 5.0
+
+
+class WarehouseQueryTrigger(BaseTrigger):
+    """Fires once every named query has finished, or on the first failure."""
+
+    def __init__(self, query_ids: dict, backend: str, submitted_at: float,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__()
+        self.query_ids = query_ids
+        self.backend = backend
+        self.submitted_at = submitted_at
+        self.poll_interval = poll_interval
+
+    def serialize(self):
+        return (
+            'ecommerce_dq.triggers.WarehouseQueryTrigger',
+            {
+                'query_ids': self.query_ids,
+                'backend': self.backend,
+                'submitted_at': self.submitted_at,
+                'poll_interval': self.poll_interval,
+            },
+        )
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        client = await loop.run_in_executor(None, query_client, self.backend)
+        finished = {}
+        try:
+            while True:
+                event = await loop.run_in_executor(None, check_queries, client, self.query_ids, finished)
+                if event['status'] != RUNNING:
+                    yield TriggerEvent({**event, 'submitted_at': self.submitted_at})
+                    return
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            client.close()
+
+
+class CommandTrigger(BaseTrigger):
+    """Fires when a command started with `launch_command()` exits, or is gone without an exit code."""
+
+    def __init__(self, run_dir: str, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__()
+        self.run_dir = run_dir
+        self.poll_interval = poll_interval
+
+    def serialize(self):
+        return (
+            'ecommerce_dq.triggers.CommandTrigger',
+            {'run_dir': self.run_dir, 'poll_interval': self.poll_interval},
+        )
+
+    async def run(self):
+        while True:
+            state, returncode = command_status(self.run_dir)
+            if state != RUNNING:
+                yield TriggerEvent({'status': state, 'returncode': returncode, 'run_dir': self.run_dir})
+                return
+            await asyncio.sleep(self.poll_interval)
+
+
+class NewFilesTrigger(BaseTrigger):
+    """Fires when files of a table land that the ingest has not loaded yet (ecommerce_dq.microbatch)."""
+
+    def __init__(self, table_name: str, raw_dir: str = None, max_files: int = None,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__()
+        self.table_name = table_name
+        self.raw_dir = raw_dir
+        self.max_files = max_files
+        self.poll_interval = poll_interval
+
+    def serialize(self):
+        return (
+            'ecommerce_dq.triggers.NewFilesTrigger',
+            {
+                'table_name': self.table_name,
+                'raw_dir': self.raw_dir,
+                'max_files': self.max_files,
+                'poll_interval': self.poll_interval,
+            },
+        )
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            files = await loop.run_in_executor(None, new_files, self.table_name, self.raw_dir, self.max_files)
+            if files:
+                yield TriggerEvent({'files': files, 'detected_at': time.time()})
+                return
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,99 @@
+"""
+Post-transformation quality validations run by validate_quality, and the
+quality report.
+
+The business checks on the staging models are written by hand; the
+referential integrity checks are generated from the foreign keys in
+raw_schema.json, for every feed that declares a "staging_model". Each
+query's first row is read by column alias (ecommerce_dq.results.QueryResult).
+
+Row counts are taken from tables rather than the staging views: a
+filterless COUNT(*) of a table is answered from metadata (Snowflake) or
+row counts alone (DuckDB), where counting a view scans its VARCHAR source.
+stg_customers is a 1:1 view over raw.customers; stg_<t>_screened holds the
+rows of stg_<t> plus those routed to quarantine.<t>.
+
+Only string building here: the DAG imports this at parse time.
+"""
+
+from ecommerce_dq.schema import RAW_SCHEMA_PATH, foreign_keys, load_raw_schema, staging_model
+
+BUSINESS_CHECKS = {
+    'customers_completeness': """
+        SELECT 
+            COUNT(*) as total_rows,
+            COUNT(customer_id) as non_null_customer_id,
+            COUNT(email) as non_null_email,
+            COUNT(email)::DOUBLE / COUNT(*) as email_completeness
+        FROM staging.stg_customers
+    """,
+    'orders_validity': """
+        SELECT 
+            (SELECT COUNT(*) FROM staging.stg_orders_screened) as total_orders,
+            COALESCE(SUM(CASE WHEN dq_reason LIKE '%NEGATIVE_AMOUNT%' THEN 1 ELSE 0 END), 0) as negative_amounts,
+            COALESCE(SUM(CASE WHEN dq_reason LIKE '%INVALID_STATUS%' THEN 1 ELSE 0 END), 0) as invalid_statuses
+        FROM quarantine.orders
+    """,
+    'events_quality': """
+        SELECT 
+            (SELECT COUNT(*) FROM staging.stg_events_screened) as total_events,
+            COALESCE(SUM(CASE WHEN dq_reason LIKE '%INVALID_EVENT_TYPE%' THEN 1 ELSE 0 END), 0) as invalid_event_types,
+            (SELECT COUNT(DISTINCT customer_id) FROM staging.stg_events) as unique_customers
+        FROM quarantine.events
+    """,
+}
+
+QUALITY_REPORT_SQL = """
+    CREATE OR REPLACE TABLE mart.data_quality_report AS
+    SELECT
+        CURRENT_TIMESTAMP as report_timestamp,
+        'DAILY_PIPELINE' as pipeline_name,
+        (SELECT COUNT(*) FROM raw.customers) as customers_count,
+        (SELECT COUNT(*) FROM staging.stg_orders_screened) - (SELECT COUNT(*) FROM quarantine.orders) as orders_count,
+        (SELECT COUNT(*) FROM staging.stg_events_screened) - (SELECT COUNT(*) FROM quarantine.events) as events_count,
+        (SELECT AVG(order_amount_quality_score) FROM mart.daily_metrics) as avg_order_quality,
+        (SELECT AVG(event_type_quality_score) FROM mart.daily_metrics) as avg_event_quality
+"""
+
+RI_CHECK_SUFFIX = '_referential_integrity'
+
+
+def orphan_check_sql(child_table: str, fk_column: str, parent_table: str, parent_column: str) -> str:
+    """Warehouse-side equivalent of `integrity.check_orphans()` (anti-join pushdown)."""
+    return f"""
+        SELECT 
+            COUNT(*) as orphan_rows,
+            COUNT(DISTINCT c.{fk_column}) as orphan_keys
+        FROM {child_table} c
+        WHERE c.{fk_column} IS NOT NULL
+          AND NOT EXISTS (
+              SELECT 1 FROM {parent_table} p
+              WHERE p.{parent_column} = c.{fk_column}
+          )
+    """
+
+
+def referential_integrity_checks(path: str = RAW_SCHEMA_PATH) -> dict:
+    """
+    {<table>_referential_integrity: orphan check SQL} for each foreign key
+    whose child and parent feeds both have a staging model.
+    """
+    checks = {}
+    for table in load_raw_schema(path):
+        child_model = staging_model(table, path)
+        for fk_column, (parent_table, parent_column) in foreign_keys(table, path).items():
+            parent_model = staging_model(parent_table, path)
+            if not (child_model and parent_model):
+                continue
+            name = f"{table}{RI_CHECK_SUFFIX}"
+            if len(foreign_keys(table, path)) > 1:
+                name = f"{table}_{fk_column}{RI_CHECK_SUFFIX}"
+            checks[name] = orphan_check_sql(
+                f"staging.{child_model}", fk_column, f"staging.{parent_model}", parent_column
+            )
+    return checks
+
+
+def quality_checks(path: str = RAW_SCHEMA_PATH) -> dict:
+    """Every query run by validate_quality, by name."""
+    return {**BUSINESS_CHECKS, **referential_integrity_checks(path)}
@@ -0,0 +1,231 @@
+"""
+Pluggable warehouse backend for the pipeline tasks.
+
+DQ_WAREHOUSE_BACKEND selects where ingestion, quality checks and dbt run:
+- snowflake (default): the 'snowflake_default' Airflow connection,
+  write_pandas for loads, dbt target 'dev'
+- duckdb: an embedded DuckDB file at DQ_DUCKDB_PATH, dbt target 'local'
+  (dbt-duckdb), so the whole DAG runs offline
+
+Task code only uses the hook surface both backends share: get_conn(),
+get_first(), get_records() and run().
+
+DuckDB allows one read-write process per database file, so DuckDB
+connections hold a file lock until closed and parallel tasks (e.g. mapped
+ingest partitions) take turns. dbt opens the file from its own process, so
+dbt invocations take the same lock: warehouse_lock() around a subprocess,
+locked_command() for a shell command.
+"""
+
+import contextlib
+import os
+import shlex
+
+from ecommerce_dq.locks import FileLock
+from ecommerce_dq.schema import DATA_DIR, bare_table_name
+
+SNOWFLAKE = 'snowflake'
+DUCKDB = 'duckdb'
+BACKENDS = (SNOWFLAKE, DUCKDB)
+
+SNOWFLAKE_CONN_ID = 'snowflake_default'
+DEFAULT_DUCKDB_PATH = os.path.join(DATA_DIR, 'local', 'warehouse.duckdb')
+
+# dbt profile target per backend (dbt/profiles.yml)
+DBT_TARGETS = {SNOWFLAKE: 'dev', DUCKDB: 'local'}
+
+# Schemas created by the init_snowflake task
+SCHEMAS = ['raw', 'staging', 'quarantine', 'intermediate', 'mart']
+
+
+def warehouse_backend() -> str:
+    """The configured backend name."""
+    backend = os.getenv('DQ_WAREHOUSE_BACKEND', SNOWFLAKE).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown warehouse backend '{backend}', expected one of {BACKENDS}")
+    return backend
+
+
+def duckdb_path() -> str:
+    return os.getenv('DQ_DUCKDB_PATH', DEFAULT_DUCKDB_PATH)
+
+
+def dbt_target() -> str:
+    """dbt target matching the configured backend."""
+    return DBT_TARGETS[warehouse_backend()]
+
+
+def warehouse_lock():
+    """
+    The DuckDB file's cross-process lock, held by DuckDBHook connections, for
+    another process (dbt) to use the file; a no-op on Snowflake.
+    """
+    if warehouse_backend() == DUCKDB:
+        return FileLock(f"{duckdb_path()}.lock")
+    return contextlib.nullcontext()
+
+
+def locked_command(command: str) -> str:
+    """`command` holding warehouse_lock() while it runs (flock(1) on the same lock file); unchanged on Snowflake."""
+    if warehouse_backend() != DUCKDB:
+        return command
+    lock_path = f"{duckdb_path()}.lock"
+    return (f"mkdir -p {shlex.quote(os.path.dirname(os.path.abspath(lock_path)))} && "
+            f"flock {shlex.quote(lock_path)} bash -c {shlex.quote(command)}")
+
+
+class LockedConnection:
+    """DuckDB connection that holds the database's cross-process lock until closed."""
+
+    def __init__(self, conn, lock: FileLock):
+        self._conn = conn
+        self._lock = lock
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        try:
+            self._conn.close()
+        finally:
+            self._lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DuckDBHook:
+    """SnowflakeHook-compatible subset (get_conn, get_first, get_records, run) over a DuckDB file."""
+
+    def __init__(self, database_path: str = None):
+        self.path = database_path or duckdb_path()
+
+    def get_conn(self):
+        import duckdb
+
+        lock = FileLock(f"{self.path}.lock")
+        lock.acquire()
+        try:
+            return LockedConnection(duckdb.connect(self.path), lock)
+        except Exception:
+            lock.release()
+            raise
+
+    def get_first(self, sql: str):
+        with self.get_conn() as conn:
+            return conn.execute(sql).fetchone()
+
+    def get_records(self, sql: str):
+        with self.get_conn() as conn:
+            return conn.execute(sql).fetchall()
+
+    def run(self, sql: str):
+        """Execute one or more ';'-separated statements."""
+        with self.get_conn() as conn:
+            conn.execute(sql)
+
+
+def get_hook():
+    """Hook for the configured backend."""
+    if warehouse_backend() == DUCKDB:
+        return DuckDBHook()
+    from airflow.providers.snowflake.hooks.snowflake import SnowflakeHook
+
+    return SnowflakeHook(snowflake_conn_id=SNOWFLAKE_CONN_ID)
+
+
+def write_dataframe(conn, df, table_name: str, schema: str = 'RAW') -> int:
+    """
+    Append a DataFrame to an existing table on `conn`, matching columns by
+    name. NaN is loaded as NULL on both backends. Returns the rows written.
+    """
+    table = bare_table_name(table_name)
+    if warehouse_backend() == DUCKDB:
+        import pyarrow as pa
+
+        conn.register('_write_dataframe_df', pa.Table.from_pandas(df, preserve_index=False))
+        try:
+            conn.execute(f"INSERT INTO {schema}.{table} BY NAME SELECT * FROM _write_dataframe_df")
+        finally:
+            conn.unregister('_write_dataframe_df')
+        return len(df)
+
+    from snowflake.connector.pandas_tools import write_pandas
+
+    success, nchunks, nrows, _ = write_pandas(
+        conn=conn,
+        df=df,
+        table_name=table,
+        database=os.getenv('SNOWFLAKE_DATABASE'),
+        schema=schema,
+    )
+    return nrows
+
+
+def read_arrow(conn, sql: str):
+    """Run a query on `conn` and return its rows as a pyarrow Table with lower-case column names."""
+    import pyarrow as pa
+
+    if warehouse_backend() == DUCKDB:
+        result = conn.execute(sql)
+        # fetch_arrow_table() was renamed to_arrow_table() in DuckDB 1.4
+        table = result.to_arrow_table() if hasattr(result, 'to_arrow_table') else result.fetch_arrow_table()
+    else:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+            table = cursor.fetch_arrow_all()
+            if table is None:
+                # The connector returns None instead of an empty table
+                table = pa.table({d[0]: pa.array([], pa.null()) for d in cursor.description})
+        finally:
+            cursor.close()
+    # Snowflake upper-cases unquoted names, DuckDB keeps them as written
+    return table.rename_columns([name.lower() for name in table.column_names])
+
+
+def table_row_counts(conn, schema: str) -> dict:
+    """
+    {table: rows} for the base tables of `schema`, from table statistics:
+    Snowflake's information_schema row counts, and on DuckDB a filterless
+    COUNT(*) per table, which reads no column data. Views have none.
+    """
+    if warehouse_backend() == DUCKDB:
+        tables = [row[0] for row in conn.execute(
+            f"SELECT table_name FROM duckdb_tables() WHERE schema_name = '{schema.lower()}'"
+        ).fetchall()]
+        if not tables:
+            return {}
+        counts = ' UNION ALL '.join(f"SELECT '{t}', COUNT(*) FROM {schema}.{t}" for t in tables)
+        return {table.lower(): rows for table, rows in conn.execute(counts).fetchall()}
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT table_name, row_count FROM information_schema.tables "
+            "WHERE table_schema = %s AND table_type = 'BASE TABLE'",
+            (schema.upper(),),
+        )
+        return {table.lower(): rows for table, rows in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def use_warehouse(conn, warehouse: str = None):
+    """Run the rest of `conn`'s session on `warehouse` (None: keep the connection's). No-op on DuckDB."""
+    if not warehouse or warehouse_backend() == DUCKDB:
+        return
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"USE WAREHOUSE {warehouse}")
+    finally:
+        cursor.close()
+
+
+def init_schemas(hook=None):
+    """Create the pipeline schemas if they do not exist."""
+    hook = hook or get_hook()
+    hook.run(';\n'.join(f"CREATE SCHEMA IF NOT EXISTS {schema}" for schema in SCHEMAS))
@@ -0,0 +1,87 @@
+"""
+XCom backend that keeps large payloads out of the Airflow metadata database.
+
+Values are serialized as Airflow does (JSON through its XCom encoder, so
+typed results such as QueryResult round-trip). Payloads larger than
+DQ_XCOM_OFFLOAD_BYTES are gzip-compressed and written under DQ_XCOM_STORE,
+a local path or an fsspec URL such as s3://bucket/xcom (needs the matching
+fsspec filesystem, e.g. s3fs); the database row only holds a reference.
+
+Enable with AIRFLOW__CORE__XCOM_BACKEND=ecommerce_dq.xcom.CompressedXComBackend.
+"""
+
+import gzip
+import json
+import os
+import re
+
+import fsspec
+from airflow.models.xcom import BaseXCom
+from airflow.utils.json import XComDecoder
+
+from ecommerce_dq.schema import DATA_DIR
+
+XCOM_STORE = os.getenv('DQ_XCOM_STORE', os.path.join(DATA_DIR, 'state', 'xcom'))
+OFFLOAD_BYTES = int(os.getenv('DQ_XCOM_OFFLOAD_BYTES', '4096'))
+
+REFERENCE_KEY = '__dq_xcom_payload__'
+
+
+def _safe(part) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(part))
+
+
+def payload_url(dag_id: str, run_id: str, task_id: str, map_index: int, key: str, store: str = None) -> str:
+    """Location of one XCom's payload; a retry overwrites the previous try's."""
+    store = (store or XCOM_STORE).rstrip('/')
+    return '/'.join([store, _safe(dag_id), _safe(run_id), _safe(task_id), f"{_safe(key)}-{map_index}.json.gz"])
+
+
+def write_payload(url: str, data: bytes) -> int:
+    """Compress and store a serialized value; returns the compressed size."""
+    compressed = gzip.compress(data)
+    fs, path = fsspec.core.url_to_fs(url)
+    fs.makedirs(path.rsplit('/', 1)[0], exist_ok=True)
+    with fs.open(path, 'wb') as f:
+        f.write(compressed)
+    return len(compressed)
+
+
+def read_payload(url: str) -> bytes:
+    with fsspec.open(url, 'rb') as f:
+        return gzip.decompress(f.read())
+
+
+def is_reference(value) -> bool:
+    return isinstance(value, dict) and REFERENCE_KEY in value
+
+
+class CompressedXComBackend(BaseXCom):
+    """BaseXCom that offloads payloads above OFFLOAD_BYTES to compressed files."""
+
+    @staticmethod
+    def serialize_value(value, *, key=None, task_id=None, dag_id=None, run_id=None, map_index=None):
+        data = BaseXCom.serialize_value(value, key=key, task_id=task_id, dag_id=dag_id, run_id=run_id,
+                                        map_index=map_index)
+        if len(data) <= OFFLOAD_BYTES or dag_id is None:
+            return data
+
+        url = payload_url(dag_id, run_id, task_id, -1 if map_index is None else map_index, key)
+        compressed_bytes = write_payload(url, data)
+        reference = {REFERENCE_KEY: url, 'bytes': len(data), 'compressed_bytes': compressed_bytes}
+        return json.dumps(reference).encode('UTF-8')
+
+    @staticmethod
+    def deserialize_value(result):
+        value = BaseXCom.deserialize_value(result)
+        if is_reference(value):
+            return json.loads(read_payload(value[REFERENCE_KEY]).decode('UTF-8'), cls=XComDecoder)
+        return value
+
+    def orm_deserialize_value(self):
+        """Listing XComs in the webserver shows the reference instead of fetching the payload."""
+        value = BaseXCom._deserialize_value(self, True)
+        if is_reference(value):
+            return (f"<{value['bytes']} bytes, {value['compressed_bytes']} compressed, "
+                    f"stored at {value[REFERENCE_KEY]}>")
+        return value
@@ -0,0 +1,187 @@
+"""
+Parse-time benchmark for the pipeline DAG.
+
+The scheduler's DAG processor re-parses every DAG file continuously, so
+parse latency is paid all the time, not once per run. This times a DagBag
+parse of the DAG file for raw schemas with a growing number of feeds (the
+real feeds plus synthetic copies of events) and checks it against a budget:
+
+- a fixed budget for the real schema plus a marginal budget per extra feed,
+  so adding a feed does not make parsing noticeably slower
+- no heavy module (pandas, numpy, pyarrow, warehouse drivers) is imported
+  while parsing; they belong inside the task callables
+
+Each measurement runs in a fresh interpreter with Airflow already imported
+and one trivial DAG parsed, as in a running DAG processor; the median of
+--repeats runs is reported. Needs an environment with Airflow installed
+(AIRFLOW_HOME pointing at an initialized home).
+
+Usage:
+    python benchmarks/dag_parse_benchmark.py
+    python benchmarks/dag_parse_benchmark.py --feeds 3,30,100 --repeats 5
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+PLUGINS_DIR = os.path.join(REPO_ROOT, 'airflow', 'plugins')
+DAG_PATH = os.path.join(REPO_ROOT, 'airflow', 'dags', 'ecommerce_data_quality_pipeline.py')
+RAW_SCHEMA_PATH = os.path.join(REPO_ROOT, 'data', 'schemas', 'raw_schema.json')
+
+DEFAULT_FEEDS = [3, 30, 100]
+DEFAULT_REPEATS = 3
+
+# Parse budget: the real schema, and the extra cost allowed per additional feed.
+# The factory parses 3 feeds in ~55 ms and 100 in ~140 ms; importing pandas alone costs more than the budget
+BUDGET_MS = 250
+PER_FEED_BUDGET_MS = 5
+
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'duckdb', 'snowflake.connector')
+
+# Synthetic feeds are copies of this one (a child of customers)
+TEMPLATE_FEED = 'events'
+
+WARMUP_DAG = '''
+from datetime import datetime
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+
+with DAG('parse_benchmark_warmup', start_date=datetime(2025, 1, 1), schedule_interval=None):
+    EmptyOperator(task_id='noop')
+'''
+
+# Runs in the child interpreter: warm up, then time one parse of the DAG file
+PARSE_SCRIPT = '''
+import json, sys, time
+from airflow.models.dagbag import DagBag
+
+DagBag(dag_folder=sys.argv[1], include_examples=False)
+heavy = [m for m in sys.argv[3].split(',') if m in sys.modules]
+start = time.perf_counter()
+bag = DagBag(dag_folder=sys.argv[2], include_examples=False)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'parse_ms': round(elapsed * 1000, 1),
+    'tasks': sum(len(dag.tasks) for dag in bag.dags.values()),
+    'import_errors': {path: str(error) for path, error in bag.import_errors.items()},
+    'heavy_modules': [m for m in sys.argv[3].split(',') if m in sys.modules and m not in heavy],
+}))
+'''
+
+
+def synthetic_schema(feeds: int, path: str = RAW_SCHEMA_PATH) -> dict:
+    """The raw schema at `path`, padded to `feeds` feeds with copies of TEMPLATE_FEED."""
+    with open(path) as f:
+        schema = json.load(f)
+    if feeds < len(schema):
+        raise ValueError(f"At least {len(schema)} feeds (the real schema), got {feeds}")
+    for n in range(feeds - len(schema)):
+        name = f"{TEMPLATE_FEED}_{n:03d}"
+        feed = copy.deepcopy(schema[TEMPLATE_FEED])
+        feed['table_name'] = name
+        feed['description'] = f"Synthetic copy of {TEMPLATE_FEED} for the parse benchmark"
+        # No dbt model behind it: ingested and gated, but not validated
+        feed.pop('staging_model', None)
+        schema[name] = feed
+    return schema
+
+
+def budget_ms(feeds: int, base_feeds: int) -> float:
+    return BUDGET_MS + PER_FEED_BUDGET_MS * max(feeds - base_feeds, 0)
+
+
+def parse_once(dag_path: str, schema_path: str, work_dir: str, python: str) -> dict:
+    """Time one parse in a fresh interpreter."""
+    warmup_path = os.path.join(work_dir, 'warmup_dag.py')
+    if not os.path.exists(warmup_path):
+        with open(warmup_path, 'w') as f:
+            f.write(WARMUP_DAG)
+    env = {
+        **os.environ,
+        'DQ_RAW_SCHEMA_PATH': schema_path,
+        'PYTHONPATH': os.pathsep.join(p for p in (PLUGINS_DIR, os.environ.get('PYTHONPATH')) if p),
+    }
+    out = subprocess.run(
+        [python, '-c', PARSE_SCRIPT, warmup_path, dag_path, ','.join(HEAVY_MODULES)],
+        capture_output=True, text=True, env=env, check=True,
+    ).stdout
+    # Airflow may log to stdout; the result is the last line
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(feeds: int, dag_path: str, work_dir: str, repeats: int, python: str) -> dict:
+    schema_path = os.path.join(work_dir, f"raw_schema_{feeds}.json")
+    with open(schema_path, 'w') as f:
+        json.dump(synthetic_schema(feeds), f)
+    runs = [parse_once(dag_path, schema_path, work_dir, python) for _ in range(repeats)]
+    return {
+        'feeds': feeds,
+        'parse_ms': statistics.median(run['parse_ms'] for run in runs),
+        'tasks': runs[-1]['tasks'],
+        'import_errors': runs[-1]['import_errors'],
+        'heavy_modules': sorted({m for run in runs for m in run['heavy_modules']}),
+    }
+
+
+def check_budget(results: list, base_feeds: int) -> list:
+    """Budget violations: slow parses, import errors and heavy imports at parse time."""
+    violations = []
+    for result in results:
+        limit = budget_ms(result['feeds'], base_feeds)
+        if result['parse_ms'] > limit:
+            violations.append(f"{result['feeds']} feeds: parse {result['parse_ms']} ms > budget {limit:.0f} ms")
+        if result['import_errors']:
+            violations.append(f"{result['feeds']} feeds: import errors {result['import_errors']}")
+        if result['heavy_modules']:
+            violations.append(f"{result['feeds']} feeds: imported {', '.join(result['heavy_modules'])} at parse time")
+    return violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--feeds', default=','.join(map(str, DEFAULT_FEEDS)), help='Comma-separated feed counts')
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS)
+    parser.add_argument('--dag', default=DAG_PATH, help='DAG file to parse')
+    parser.add_argument('--python', default=sys.executable, help='Interpreter with Airflow installed')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    args = parser.parse_args(argv)
+
+    with open(RAW_SCHEMA_PATH) as f:
+        base_feeds = len(json.load(f))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix='dq_parse_bench_') as work_dir:
+        for feeds in sorted(int(n) for n in args.feeds.split(',')):
+            print(f"▶ {feeds} feeds ...")
+            results.append(measure(feeds, args.dag, work_dir, args.repeats, args.python))
+
+    print(f"\n{'feeds':>6} {'tasks':>6} {'parse_ms':>10} {'budget_ms':>10}  heavy modules")
+    for r in results:
+        print(f"{r['feeds']:>6} {r['tasks']:>6} {r['parse_ms']:>10} {budget_ms(r['feeds'], base_feeds):>10.0f}  "
+              f"{', '.join(r['heavy_modules']) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    violations = check_budget(results, base_feeds)
+    if violations:
+        print("\n❌ PARSE BUDGET EXCEEDED:")
+        for violation in violations:
+            print(f"  - {violation}")
+        return 1
+
+    print("\n✓ DAG parse within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Latency benchmark for online feature lookups (ecommerce_dq.feature_index).
+
+Builds a customer_features-shaped mart of --customers rows in an embedded
+DuckDB warehouse, exports it through the real feature cache and index
+build, warms the page cache with --warmup batches as a serving process
+would be, then times:
+- batch_get for each --batch-sizes (random ids, 1% unknown)
+- get for single ids, with an empty LRU (cold) and with the ids cached (warm)
+
+and reports p50/p99 per request. The run fails (exit code 1) when the p99
+of a batch of --budget-batch ids exceeds --budget-ms.
+
+Usage:
+    python benchmarks/feature_lookup_benchmark.py
+    python benchmarks/feature_lookup_benchmark.py --customers 5000000 --batch-sizes 1000,5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+
+DEFAULT_CUSTOMERS = 1_000_000
+DEFAULT_BATCH_SIZES = [1, 100, 1000, 5000]
+DEFAULT_REQUESTS = 500
+DEFAULT_WARMUP = 200
+SINGLE_GETS = 10_000
+UNKNOWN_SHARE = 0.01
+
+# Online scoring reads thousands of customers per request
+BUDGET_BATCH = 1000
+BUDGET_MS = 1.0
+
+# Numeric columns as in mart.customer_features (decimals from SUM, doubles from ratios)
+SYNTHETIC_MART_SQL = """
+    CREATE OR REPLACE TABLE mart.customer_features AS
+    SELECT
+        'CUST' || lpad(i::VARCHAR, 9, '0') as customer_id,
+        'user' || i || '@example.com' as email,
+        ['VIP', 'REGULAR', 'NEW'][1 + i % 3] as customer_segment,
+        (i % 40)::DECIMAL(38, 0) as total_orders,
+        (i % 30)::DECIMAL(38, 0) as completed_orders,
+        (i % 5)::DECIMAL(38, 0) as cancelled_orders,
+        round(random() * 5000, 2)::DECIMAL(38, 2) as total_spend,
+        random() * 500 as avg_order_value,
+        (i % 700)::BIGINT as customer_lifetime_days,
+        (i % 90)::DECIMAL(38, 0) as total_events,
+        (i % 60)::DECIMAL(38, 0) as page_views,
+        (i % 20)::DECIMAL(38, 0) as add_to_cart_events,
+        (i % 10)::DECIMAL(38, 0) as purchase_events,
+        (i % 50)::DECIMAL(38, 0) as total_sessions,
+        (i % 100)::BIGINT as active_days,
+        CASE WHEN i % 10 = 0 THEN NULL ELSE (i % 365)::BIGINT END as days_since_last_order,
+        random() * 4 as monthly_order_frequency,
+        random() as conversion_rate,
+        random() as cancellation_rate,
+        (i % 365)::BIGINT as recency_days,
+        (i % 40)::DECIMAL(38, 0) as frequency,
+        round(random() * 5000, 2)::DECIMAL(38, 2) as monetary_value,
+        CURRENT_TIMESTAMP as _calculated_at
+    FROM range({customers}) t(i)
+"""
+
+
+def customer_id(i: int) -> str:
+    return f"CUST{i:09d}"
+
+
+def percentiles(samples: list) -> dict:
+    ordered = sorted(samples)
+    return {
+        'p50_ms': round(ordered[len(ordered) // 2] * 1000, 4),
+        'p99_ms': round(ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)] * 1000, 4),
+    }
+
+
+def build_cache(work_dir: str, customers: int) -> dict:
+    """Synthetic mart -> feature cache -> lookup index, through the real code."""
+    os.environ['DQ_WAREHOUSE_BACKEND'] = 'duckdb'
+    os.environ['DQ_DUCKDB_PATH'] = os.path.join(work_dir, 'warehouse.duckdb')
+    sys.path.insert(0, os.path.join(REPO_ROOT, 'airflow', 'plugins'))
+    from ecommerce_dq.feature_cache import refresh_cache
+    from ecommerce_dq.feature_index import build_index
+    from ecommerce_dq.warehouse import get_hook, init_schemas
+
+    init_schemas()
+    get_hook().run(SYNTHETIC_MART_SQL.format(customers=customers))
+    start = time.perf_counter()
+    summary = refresh_cache('customer_features', cache_dir=work_dir)
+    export_s = time.perf_counter() - start
+    start = time.perf_counter()
+    meta = build_index('customer_features', summary['version'], cache_dir=work_dir)
+    return {'export_s': round(export_s, 2), 'index_s': round(time.perf_counter() - start, 2),
+            'features': len(meta['columns'])}
+
+
+def request_ids(rng: random.Random, customers: int, size: int) -> list:
+    return [customer_id(rng.randrange(customers)) if rng.random() >= UNKNOWN_SHARE else f"UNKNOWN{i}"
+            for i in range(size)]
+
+
+def time_batches(lookup, rng, customers: int, size: int, requests: int) -> dict:
+    samples = []
+    for _ in range(requests):
+        ids = request_ids(rng, customers, size)
+        start = time.perf_counter()
+        lookup.batch_get(ids)
+        samples.append(time.perf_counter() - start)
+    return {'batch': size, **percentiles(samples)}
+
+
+def time_single_gets(lookup, rng, customers: int) -> dict:
+    ids = request_ids(rng, customers, SINGLE_GETS)
+    results = {}
+    for label in ('cold', 'warm'):
+        samples = []
+        for id_ in ids:
+            start = time.perf_counter()
+            lookup.get(id_)
+            samples.append(time.perf_counter() - start)
+        results[label] = percentiles(samples)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--customers', type=int, default=DEFAULT_CUSTOMERS)
+    parser.add_argument('--batch-sizes', default=','.join(map(str, DEFAULT_BATCH_SIZES)))
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='Requests per batch size')
+    parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='Untimed batches before timing')
+    parser.add_argument('--budget-batch', type=int, default=BUDGET_BATCH)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    batch_sizes = sorted({int(n) for n in args.batch_sizes.split(',')} | {args.budget_batch})
+
+    with tempfile.TemporaryDirectory(prefix='dq_lookup_bench_') as work_dir:
+        print(f"▶ Building the feature cache and index for {args.customers} customers ...")
+        build = build_cache(work_dir, args.customers)
+        print(f"  ✓ {build}")
+
+        from ecommerce_dq.feature_index import FeatureLookup
+
+        lookup = FeatureLookup('customer_features', cache_dir=work_dir, lru_size=SINGLE_GETS)
+        for _ in range(args.warmup):
+            lookup.batch_get(request_ids(rng, args.customers, args.budget_batch))
+        batches = [time_batches(lookup, rng, args.customers, size, args.requests) for size in batch_sizes]
+        single = time_single_gets(lookup, rng, args.customers)
+
+    print(f"\n{'batch':>7} {'p50_ms':>10} {'p99_ms':>10} {'p99_us/id':>10}")
+    for b in batches:
+        print(f"{b['batch']:>7} {b['p50_ms']:>10} {b['p99_ms']:>10} {b['p99_ms'] * 1000 / b['batch']:>10.2f}")
+    for label, p in single.items():
+        print(f"{'get ' + label:>7} {p['p50_ms']:>10} {p['p99_ms']:>10}")
+
+    budget = next(b for b in batches if b['batch'] == args.budget_batch)
+    if budget['p99_ms'] > args.budget_ms:
+        print(f"\n❌ p99 of a {args.budget_batch}-id batch is {budget['p99_ms']} ms > {args.budget_ms} ms")
+        return 1
+    print(f"\n✓ p99 of a {args.budget_batch}-id batch within {args.budget_ms} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
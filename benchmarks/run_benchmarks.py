@@ -0,0 +1,364 @@
+"""
+End-to-end benchmark suite for the data quality pipeline.
+
+Runs the real pipeline code against the embedded DuckDB warehouse backend
+(DQ_WAREHOUSE_BACKEND=duckdb) standing in for Snowflake:
+1. generate  - generate_customers / generate_orders / generate_events to CSV
+2. memory    - in-memory size per table: object strings vs the schema's ingest dtypes
+3. ingest    - ingest_csv_to_snowflake for every partition of every raw table
+4. dbt       - dbt run --target local (staging, quarantine, intermediate, mart)
+5. validate  - the validate_quality task (quality checks, run blocking)
+
+Each stage runs in a fresh process and records latency, throughput and peak
+RSS. Results are compared against a stored baseline per scale factor and the
+run fails (exit code 1) when a stage regresses beyond the tolerance. A scale
+or stage without a baseline fails before anything runs (exit code 2): record
+one with --update-baseline, or measure only with --no-check.
+
+Usage:
+    python benchmarks/run_benchmarks.py --scale 1M
+    python benchmarks/run_benchmarks.py --scale 10M --scale 100M --tolerance 0.3
+    python benchmarks/run_benchmarks.py --scale 1M --update-baseline
+    python benchmarks/run_benchmarks.py --scale 50000 --no-check --output results.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+DBT_DIR = os.path.join(REPO_ROOT, 'dbt')
+DAG_PATH = os.path.join(REPO_ROOT, 'airflow', 'dags', 'ecommerce_data_quality_pipeline.py')
+RAW_SCHEMA_PATH = os.path.join(REPO_ROOT, 'data', 'schemas', 'raw_schema.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+# Total raw rows per scale factor (before injected duplicates)
+SCALES = {
+    'smoke': 21_000,
+    '1M': 1_000_000,
+    '10M': 10_000_000,
+    '100M': 100_000_000,
+}
+
+# customers : orders : events, as in generate_sample_data defaults (1000 : 5000 : 15000)
+TABLE_SHARES = {'customers': 1, 'orders': 5, 'events': 15}
+TABLES = list(TABLE_SHARES)
+STAGES = ['generate', 'memory', 'ingest', 'dbt', 'validate']
+
+GENERATE_CHUNK_ROWS = 1_000_000
+MEMORY_SAMPLE_ROWS = 1_000_000
+DEFAULT_TOLERANCE = 0.25
+
+
+def parse_scale(scale: str) -> int:
+    """Resolve a named scale ('1M') or a plain row count ('50000')."""
+    if scale in SCALES:
+        return SCALES[scale]
+    return int(scale)
+
+
+def split_rows(total_rows: int) -> dict:
+    """Split a total row count across the raw tables."""
+    total_share = sum(TABLE_SHARES.values())
+    return {table: max(1, total_rows * share // total_share) for table, share in TABLE_SHARES.items()}
+
+
+def warehouse_path(work_dir: str) -> str:
+    return os.path.join(work_dir, 'warehouse.duckdb')
+
+
+def csv_path(work_dir: str, table: str) -> str:
+    return os.path.join(work_dir, 'raw', f"{table}.csv")
+
+
+def _setup_pipeline_env(work_dir: str):
+    """Point the pipeline helpers at the benchmark work dir."""
+    os.environ['DQ_DATA_DIR'] = work_dir
+    os.environ['DQ_RAW_SCHEMA_PATH'] = RAW_SCHEMA_PATH
+    os.environ['DQ_WAREHOUSE_BACKEND'] = 'duckdb'
+    os.environ['DQ_DUCKDB_PATH'] = warehouse_path(work_dir)
+    os.environ['DQ_METRICS_EXPORTERS'] = 'file'
+    os.environ['DQ_METRICS_FILE'] = os.path.join(work_dir, 'metrics.jsonl')
+    # Tasks run in-process here, without a triggerer
+    os.environ['DQ_DEFERRABLE'] = 'false'
+    plugins_dir = os.path.join(REPO_ROOT, 'airflow', 'plugins')
+    if plugins_dir not in sys.path:
+        sys.path.insert(0, plugins_dir)
+
+
+def _load_dag_module():
+    """Import the DAG module (after _setup_pipeline_env selected the DuckDB backend)."""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location('ecommerce_data_quality_pipeline', DAG_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class BenchTaskInstance:
+    """Minimal TaskInstance for XCom calls made by the DAG callables."""
+
+    def __init__(self):
+        self.xcom = {}
+
+    def xcom_push(self, key, value):
+        self.xcom[key] = value
+
+    def xcom_pull(self, key, task_ids=None):
+        return self.xcom.get(key)
+
+
+def _raw_row_count(work_dir: str) -> int:
+    from ecommerce_dq.warehouse import DuckDBHook
+
+    hook = DuckDBHook(warehouse_path(work_dir))
+    return sum(hook.get_first(f"SELECT COUNT(*) FROM raw.{table}")[0] for table in TABLES)
+
+
+def stage_generate(work_dir: str, total_rows: int) -> int:
+    """Generate CSVs with the real generator, in chunks to bound memory."""
+    sys.path.insert(0, os.path.join(REPO_ROOT, 'scripts'))
+    import generate_sample_data as gen
+
+    os.makedirs(os.path.join(work_dir, 'raw'), exist_ok=True)
+    counts = split_rows(total_rows)
+
+    customers_df = gen.generate_customers(counts['customers'])
+    customers_df.to_csv(csv_path(work_dir, 'customers'), index=False)
+    rows = len(customers_df)
+
+    for table, generate in (('orders', gen.generate_orders), ('events', gen.generate_events)):
+        for offset in range(0, counts[table], GENERATE_CHUNK_ROWS):
+            n = min(GENERATE_CHUNK_ROWS, counts[table] - offset)
+            df = generate(customers_df, n, id_offset=offset)
+            df.to_csv(csv_path(work_dir, table), index=False, mode='a' if offset else 'w', header=not offset)
+            rows += len(df)
+    return rows
+
+
+def stage_memory(work_dir: str):
+    """
+    Compare the DataFrame footprint of each table read with object strings
+    (pandas defaults) and with the schema-driven ingest dtypes, on up to
+    MEMORY_SAMPLE_ROWS rows. Returns rows and per-table MB / reduction factor.
+    """
+    import pandas as pd
+
+    _setup_pipeline_env(work_dir)
+    from ecommerce_dq.schema import read_dtypes
+
+    rows = 0
+    tables = {}
+    for table in TABLES:
+        path = csv_path(work_dir, table)
+        default = pd.read_csv(path, nrows=MEMORY_SAMPLE_ROWS, dtype=str)
+        compact = pd.read_csv(path, nrows=MEMORY_SAMPLE_ROWS, dtype=read_dtypes(table))
+        object_bytes = default.memory_usage(deep=True).sum()
+        compact_bytes = compact.memory_usage(deep=True).sum()
+        tables[table] = {
+            'object_mb': round(object_bytes / 1024 ** 2, 2),
+            'compact_mb': round(compact_bytes / 1024 ** 2, 2),
+            'reduction': round(object_bytes / compact_bytes, 2),
+        }
+        rows += len(compact)
+    return rows, {'tables': tables}
+
+
+def stage_ingest(work_dir: str) -> int:
+    """Run ingest_csv_to_snowflake for every discovered partition of every raw table."""
+    _setup_pipeline_env(work_dir)
+    from ecommerce_dq.warehouse import init_schemas
+
+    from ecommerce_dq.tasks import ingest_csv_to_snowflake, list_ingest_partitions
+
+    init_schemas()
+
+    ti = BenchTaskInstance()
+    for table in TABLES:
+        for partition in list_ingest_partitions(f"raw.{table}"):
+            ingest_csv_to_snowflake(**partition, ti=ti)
+    return _raw_row_count(work_dir)
+
+
+def stage_dbt(work_dir: str, dbt_executable: str = 'dbt') -> int:
+    """Build every dbt model against the local target."""
+    _setup_pipeline_env(work_dir)
+    subprocess.run(
+        [dbt_executable, 'run', '--target', 'local', '--project-dir', DBT_DIR, '--profiles-dir', DBT_DIR],
+        check=True,
+        env=os.environ.copy(),
+    )
+    shutil.copy(os.path.join(DBT_DIR, 'target', 'run_results.json'), work_dir)
+    return _raw_row_count(work_dir)
+
+
+def stage_validate(work_dir: str) -> int:
+    """Run the validate_quality task against the built models."""
+    _setup_pipeline_env(work_dir)
+    dag_module = _load_dag_module()
+    dag_module.dag.get_task('validate_quality').execute({'ti': BenchTaskInstance()})
+    return _raw_row_count(work_dir)
+
+
+def _measure(stage_fn, *args) -> dict:
+    """Run a stage in the current (fresh) process and collect its metrics."""
+    start = time.perf_counter()
+    outcome = stage_fn(*args)
+    latency = time.perf_counter() - start
+    # Stages return a row count, optionally with stage-specific details
+    rows, details = outcome if isinstance(outcome, tuple) else (outcome, {})
+
+    # ru_maxrss is in KiB on Linux; children covers the dbt subprocess
+    peak_kb = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    return {
+        'latency_s': round(latency, 3),
+        'rows': rows,
+        'rows_per_s': round(rows / latency, 1) if latency > 0 else None,
+        'peak_rss_mb': round(peak_kb / 1024, 1),
+        **details,
+    }
+
+
+def run_stage(stage: str, work_dir: str, total_rows: int, dbt_executable: str) -> dict:
+    """Run one stage in a freshly spawned process so peak RSS is per stage."""
+    args = {
+        'generate': (stage_generate, work_dir, total_rows),
+        'memory': (stage_memory, work_dir),
+        'ingest': (stage_ingest, work_dir),
+        'dbt': (stage_dbt, work_dir, dbt_executable),
+        'validate': (stage_validate, work_dir),
+    }[stage]
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(_measure, *args).result()
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Compare {scale: {stage: metrics}} against the baseline.
+    Returns a list of regression messages (latency or peak RSS above tolerance).
+    """
+    regressions = []
+    for scale, stages in results.items():
+        for stage, metrics in stages.items():
+            reference = baseline.get(scale, {}).get(stage)
+            if not reference:
+                continue
+            for metric in ('latency_s', 'peak_rss_mb'):
+                limit = reference[metric] * (1 + tolerance)
+                if metrics[metric] > limit:
+                    regressions.append(
+                        f"{scale}/{stage}: {metric} {metrics[metric]} > {limit:.1f} "
+                        f"(baseline {reference[metric]}, tolerance {tolerance:.0%})"
+                    )
+    return regressions
+
+
+def missing_baselines(scales: list, stages: list, baseline: dict) -> list:
+    """'scale/stage' of every planned stage the baseline has no reference for."""
+    return [f"{scale}/{stage}" for scale in scales for stage in stages if not baseline.get(scale, {}).get(stage)]
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_results(results: dict):
+    print(f"\n{'scale':<8} {'stage':<10} {'latency_s':>10} {'rows':>12} {'rows/s':>12} {'peak_rss_mb':>12}")
+    for scale, stages in results.items():
+        for stage, m in stages.items():
+            print(f"{scale:<8} {stage:<10} {m['latency_s']:>10} {m['rows']:>12} {m['rows_per_s']:>12} {m['peak_rss_mb']:>12}")
+
+    for scale, stages in results.items():
+        if 'memory' not in stages:
+            continue
+        print(f"\n{'scale':<8} {'table':<10} {'object_mb':>10} {'compact_mb':>12} {'reduction':>10}")
+        for table, m in stages['memory']['tables'].items():
+            print(f"{scale:<8} {table:<10} {m['object_mb']:>10} {m['compact_mb']:>12} {m['reduction']:>9}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', action='append', help=f"Scale factor: {', '.join(SCALES)} or a row count")
+    parser.add_argument('--stages', default=','.join(STAGES), help='Comma-separated stages to run')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--no-check', action='store_true', help='Only measure, without comparing to the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument('--work-dir', help='Keep generated data here instead of a temp dir')
+    parser.add_argument('--dbt-executable', default='dbt')
+    parser.add_argument('--output', help='Write results JSON to this path')
+    args = parser.parse_args(argv)
+
+    scales = args.scale or ['1M']
+    stages = args.stages.split(',')
+
+    baseline = load_baseline(args.baseline)
+    check = not (args.update_baseline or args.no_check)
+    # Checked up front: a 10M/100M run takes hours, and without a reference it could not fail
+    missing = missing_baselines(scales, stages, baseline) if check else []
+    if missing:
+        print(f"❌ No baseline for {', '.join(missing)} in {args.baseline}: record one with --update-baseline "
+              f"on the benchmark host, or measure only with --no-check")
+        return 2
+
+    results = {}
+    for scale in scales:
+        total_rows = parse_scale(scale)
+        work_dir = args.work_dir or tempfile.mkdtemp(prefix=f"dq_bench_{scale}_")
+        work_dir = os.path.join(work_dir, scale) if args.work_dir else work_dir
+        os.makedirs(work_dir, exist_ok=True)
+
+        results[scale] = {}
+        for stage in stages:
+            print(f"▶ {scale} {stage} ...")
+            results[scale][stage] = run_stage(stage, work_dir, total_rows, args.dbt_executable)
+            print(f"  ✓ {results[scale][stage]}")
+
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        for scale, stage_results in results.items():
+            baseline.setdefault(scale, {}).update(stage_results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\n✓ Baseline updated: {args.baseline}")
+        return 0
+    if args.no_check:
+        return 0
+
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ PERFORMANCE REGRESSIONS:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print("\n✓ No performance regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
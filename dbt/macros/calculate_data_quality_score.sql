@@ -28,7 +28,7 @@ quality_metrics as (
             {% endif %}
             {% set ns.sum = ns.sum ~ col.name ~ '_nulls' %}
         {% endfor %}
-        ({{ ns.sum }})::float as total_nulls,
+        ({{ ns.sum }})::double as total_nulls,
         {{ adapter.get_columns_in_relation(model) | length }} * total_rows as total_cells
     from null_checks
     cross join row_counts
@@ -0,0 +1,42 @@
+{#-
+Per-day partitions for backfills.
+
+Running with --vars '{backfill_day: YYYY-MM-DD}' turns the models tagged
+day_partitioned into incremental appends of that day only:
+- day_partition_materialization() picks 'incremental' instead of 'table'
+- in_backfill_day(column) restricts the model's rows to the day
+- delete_day_slice(column), as a pre-hook, first deletes the day's rows, so
+  re-running a day replaces its slice and leaves every other day untouched
+
+Without the var the models are full-rebuild tables as before.
+-#}
+
+{% macro day_partition_materialization() -%}
+    {{ return('incremental' if var('backfill_day', none) else 'table') }}
+{%- endmacro %}
+
+
+{% macro backfill_day_bounds() -%}
+    {%- set day_start = "cast('" ~ var('backfill_day') ~ "' as " ~ dbt.type_timestamp() ~ ")" -%}
+    {{ return((day_start, dbt.dateadd('day', 1, day_start))) }}
+{%- endmacro %}
+
+
+{% macro in_backfill_day(column) -%}
+    {%- if var('backfill_day', none) -%}
+        {%- set bounds = backfill_day_bounds() -%}
+        ({{ column }} >= {{ bounds[0] }} and {{ column }} < {{ bounds[1] }})
+    {%- else -%}
+        (1 = 1)
+    {%- endif -%}
+{%- endmacro %}
+
+
+{% macro delete_day_slice(column) -%}
+    {%- if var('backfill_day', none) and execute -%}
+        {%- set existing = adapter.get_relation(this.database, this.schema, this.identifier) -%}
+        {%- if existing is not none -%}
+            delete from {{ this }} where {{ in_backfill_day(column) }}
+        {%- endif -%}
+    {%- endif -%}
+{%- endmacro %}
@@ -0,0 +1,19 @@
+{% macro dq_reason_codes(checks) %}
+
+/*
+Build a comma-separated list of data quality reason codes for a row.
+Returns null when no check fires, so `dq_reason is null` selects clean rows.
+Usage: dq_reason_codes({'NEGATIVE_AMOUNT': 'total_amount < 0'}) inside a select list
+*/
+
+nullif(
+    rtrim(
+        {% for code, condition in checks.items() %}
+        case when {{ condition }} then '{{ code }},' else '' end{{ " ||" if not loop.last }}
+        {% endfor %},
+        ','
+    ),
+    ''
+)
+
+{% endmacro %}
@@ -0,0 +1,15 @@
+{% macro generate_schema_name(custom_schema_name, node) -%}
+
+{#-
+Use the folder schema (staging, quarantine, intermediate, mart) as-is instead
+of prefixing it with the target schema, so every target exposes the same
+relation names the DAG queries (e.g. staging.stg_orders).
+-#}
+
+{%- if custom_schema_name is none -%}
+    {{ target.schema }}
+{%- else -%}
+    {{ custom_schema_name | trim }}
+{%- endif -%}
+
+{%- endmacro %}
@@ -9,7 +9,7 @@ with validation as (
     select
         count(*) as total_rows,
         count({{ column_name }}) as non_null_rows,
-        count({{ column_name }})::float / nullif(count(*), 0) as completeness_rate
+        count({{ column_name }})::double / nullif(count(*), 0) as completeness_rate
     from {{ model }}
 )
 
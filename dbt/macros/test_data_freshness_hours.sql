@@ -8,8 +8,8 @@ Usage: {{ test_data_freshness_hours('stg_orders', 'order_timestamp', 24) }}
 with freshness_check as (
     select
         max({{ timestamp_column }}) as max_timestamp,
-        current_timestamp() as check_timestamp,
-        datediff(hour, max({{ timestamp_column }}), current_timestamp()) as hours_since_last_record
+        {{ dbt.current_timestamp() }} as check_timestamp,
+        {{ dbt.datediff('max(' ~ timestamp_column ~ ')', dbt.current_timestamp(), 'hour') }} as hours_since_last_record
     from {{ model }}
 )
 
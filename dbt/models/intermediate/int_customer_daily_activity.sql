@@ -0,0 +1,84 @@
+{{
+  config(
+    materialized=day_partition_materialization(),
+    incremental_strategy='append',
+    pre_hook="{{ delete_day_slice('activity_date') }}",
+    tags=['intermediate', 'rollup', 'day_partitioned']
+  )
+}}
+
+/*
+Customer x day rollup of clean orders and events. customer_features and
+daily_metrics aggregate from here, so the event stream is scanned once per run.
+
+Every measure is additive (counts, sums) or mergeable (min/max), so both marts
+can re-aggregate it. Distinct sessions are not additive and come from
+int_customer_daily_sessions.
+*/
+
+with order_days as (
+    select
+        customer_id,
+        date_trunc('day', order_timestamp) as activity_date,
+        count(order_id) as orders,
+        count(total_amount) as priced_orders,
+        sum(total_amount) as order_amount,
+        sum(case when order_status = 'COMPLETED' then 1 else 0 end) as completed_orders,
+        sum(case when order_status = 'CANCELLED' then 1 else 0 end) as cancelled_orders,
+        
+        -- Closed orders (completed, cancelled or refunded) feed customer_features
+        sum(case when order_status in ('COMPLETED', 'CANCELLED', 'REFUNDED') then 1 else 0 end) as closed_orders,
+        count(case when order_status in ('COMPLETED', 'CANCELLED', 'REFUNDED') then total_amount end) as closed_priced_orders,
+        sum(case when order_status in ('COMPLETED', 'CANCELLED', 'REFUNDED') then total_amount end) as closed_order_amount,
+        min(case when order_status in ('COMPLETED', 'CANCELLED', 'REFUNDED') then order_timestamp end) as first_closed_order_at,
+        max(case when order_status in ('COMPLETED', 'CANCELLED', 'REFUNDED') then order_timestamp end) as last_closed_order_at
+        
+    from {{ ref('stg_orders') }}
+    where {{ in_backfill_day('order_timestamp') }}
+    group by customer_id, date_trunc('day', order_timestamp)
+),
+
+event_days as (
+    select
+        customer_id,
+        date_trunc('day', event_timestamp) as activity_date,
+        count(event_id) as events,
+        sum(case when event_type = 'PAGE_VIEW' then 1 else 0 end) as page_views,
+        sum(case when event_type = 'ADD_TO_CART' then 1 else 0 end) as add_to_cart_events,
+        sum(case when event_type = 'PURCHASE' then 1 else 0 end) as purchase_events
+        
+    from {{ ref('stg_events') }}
+    where {{ in_backfill_day('event_timestamp') }}
+    group by customer_id, date_trunc('day', event_timestamp)
+),
+
+final as (
+    select
+        coalesce(o.customer_id, e.customer_id) as customer_id,
+        coalesce(o.activity_date, e.activity_date) as activity_date,
+        
+        -- Order measures
+        coalesce(o.orders, 0) as orders,
+        coalesce(o.priced_orders, 0) as priced_orders,
+        o.order_amount,
+        coalesce(o.completed_orders, 0) as completed_orders,
+        coalesce(o.cancelled_orders, 0) as cancelled_orders,
+        coalesce(o.closed_orders, 0) as closed_orders,
+        coalesce(o.closed_priced_orders, 0) as closed_priced_orders,
+        o.closed_order_amount,
+        o.first_closed_order_at,
+        o.last_closed_order_at,
+        
+        -- Event measures
+        coalesce(e.events, 0) as events,
+        coalesce(e.page_views, 0) as page_views,
+        coalesce(e.add_to_cart_events, 0) as add_to_cart_events,
+        coalesce(e.purchase_events, 0) as purchase_events
+        
+    from order_days o
+    full outer join event_days e
+        on o.customer_id is not distinct from e.customer_id
+       and o.activity_date = e.activity_date
+)
+
+select * from final
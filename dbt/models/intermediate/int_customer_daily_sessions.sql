@@ -0,0 +1,27 @@
+{{
+  config(
+    materialized=day_partition_materialization(),
+    incremental_strategy='append',
+    pre_hook="{{ delete_day_slice('activity_date') }}",
+    tags=['intermediate', 'rollup', 'day_partitioned']
+  )
+}}
+
+/*
+Session-level rollup of clean events: one row per customer, day and session.
+
+Distinct session counts do not add up across customers or days (session ids
+are reused), so the marts count distinct session_id over these rows instead
+of summing a per-customer-day count: per day in daily_metrics, per customer
+in customer_features.
+*/
+
+select
+    customer_id,
+    date_trunc('day', event_timestamp) as activity_date,
+    session_id
+
+from {{ ref('stg_events') }}
+where session_id is not null
+  and {{ in_backfill_day('event_timestamp') }}
+group by customer_id, date_trunc('day', event_timestamp), session_id
@@ -9,32 +9,41 @@ with customer_base as (
     select * from {{ ref('stg_customers') }}
 ),
 
+-- The aggregates read the shared customer x day (and session) rollups instead of the staging views
 customer_orders as (
     select
         customer_id,
-        count(distinct order_id) as total_orders,
-        sum(case when order_status = 'COMPLETED' then 1 else 0 end) as completed_orders,
-        sum(case when order_status = 'CANCELLED' then 1 else 0 end) as cancelled_orders,
-        sum(total_amount) as total_spend,
-        avg(total_amount) as avg_order_value,
-        max(order_timestamp) as last_order_date,
-        min(order_timestamp) as first_order_date,
-        datediff(day, min(order_timestamp), max(order_timestamp)) as customer_lifetime_days
-    from {{ ref('stg_orders') }}
-    where order_status in ('COMPLETED', 'CANCELLED', 'REFUNDED')
+        sum(closed_orders) as total_orders,
+        sum(completed_orders) as completed_orders,
+        sum(cancelled_orders) as cancelled_orders,
+        sum(closed_order_amount) as total_spend,
+        sum(closed_order_amount) / nullif(sum(closed_priced_orders), 0) as avg_order_value,
+        max(last_closed_order_at) as last_order_date,
+        min(first_closed_order_at) as first_order_date,
+        {{ dbt.datediff('min(first_closed_order_at)', 'max(last_closed_order_at)', 'day') }} as customer_lifetime_days
+    from {{ ref('int_customer_daily_activity') }}
+    where closed_orders > 0
     group by customer_id
 ),
 
 customer_events as (
     select
         customer_id,
-        count(distinct event_id) as total_events,
-        sum(case when event_type = 'PAGE_VIEW' then 1 else 0 end) as page_views,
-        sum(case when event_type = 'ADD_TO_CART' then 1 else 0 end) as add_to_cart_events,
-        sum(case when event_type = 'PURCHASE' then 1 else 0 end) as purchase_events,
-        count(distinct session_id) as total_sessions,
-        count(distinct date_trunc('day', event_timestamp)) as active_days
-    from {{ ref('stg_events') }}
+        sum(events) as total_events,
+        sum(page_views) as page_views,
+        sum(add_to_cart_events) as add_to_cart_events,
+        sum(purchase_events) as purchase_events,
+        count(*) as active_days
+    from {{ ref('int_customer_daily_activity') }}
+    where events > 0
+    group by customer_id
+),
+
+customer_sessions as (
+    select
+        customer_id,
+        count(distinct session_id) as total_sessions
+    from {{ ref('int_customer_daily_sessions') }}
     group by customer_id
 ),
 
@@ -64,43 +73,44 @@ final as (
         coalesce(e.page_views, 0) as page_views,
         coalesce(e.add_to_cart_events, 0) as add_to_cart_events,
         coalesce(e.purchase_events, 0) as purchase_events,
-        coalesce(e.total_sessions, 0) as total_sessions,
+        coalesce(s.total_sessions, 0) as total_sessions,
         coalesce(e.active_days, 0) as active_days,
         
         -- Calculated features for ML
         case 
             when o.last_order_date is null then null
-            else datediff(day, o.last_order_date, current_timestamp())
+            else {{ dbt.datediff('o.last_order_date', dbt.current_timestamp(), 'day') }}
         end as days_since_last_order,
         
         case 
             when o.customer_lifetime_days > 0 
-            then o.total_orders::float / o.customer_lifetime_days * 30
+            then o.total_orders::double / o.customer_lifetime_days * 30
             else 0
         end as monthly_order_frequency,
         
         case 
-            when e.total_sessions > 0 
-            then e.purchase_events::float / e.total_sessions
+            when s.total_sessions > 0 
+            then e.purchase_events::double / s.total_sessions
             else 0
         end as conversion_rate,
         
         case
             when o.total_orders > 0 
-            then o.cancelled_orders::float / o.total_orders
+            then o.cancelled_orders::double / o.total_orders
             else 0
         end as cancellation_rate,
         
         -- RFM segmentation inputs
-        datediff(day, coalesce(o.last_order_date, c.signup_timestamp), current_timestamp()) as recency_days,
+        {{ dbt.datediff('coalesce(o.last_order_date, c.signup_timestamp)', dbt.current_timestamp(), 'day') }} as recency_days,
         coalesce(o.total_orders, 0) as frequency,
         coalesce(o.total_spend, 0) as monetary_value,
         
-        current_timestamp() as _calculated_at
+        {{ dbt.current_timestamp() }} as _calculated_at
         
     from customer_base c
     left join customer_orders o on c.customer_id = o.customer_id
     left join customer_events e on c.customer_id = e.customer_id
+    left join customer_sessions s on c.customer_id = s.customer_id
 )
 
 select * from final
@@ -1,44 +1,103 @@
 {{
   config(
-    materialized='table',
-    tags=['mart', 'metrics', 'monitoring']
+    materialized=day_partition_materialization(),
+    incremental_strategy='append',
+    pre_hook="{{ delete_day_slice('metric_date') }}",
+    tags=['mart', 'metrics', 'monitoring', 'day_partitioned']
   )
 }}
 
+-- Business metrics re-aggregate the shared customer x day rollup; distinct sessions come from the session rollup
 with daily_orders as (
     select
-        date_trunc('day', order_timestamp) as order_date,
-        count(distinct order_id) as total_orders,
-        count(distinct customer_id) as unique_customers,
-        sum(total_amount) as total_revenue,
-        avg(total_amount) as avg_order_value,
-        sum(case when order_status = 'COMPLETED' then 1 else 0 end) as completed_orders,
-        sum(case when order_status = 'CANCELLED' then 1 else 0 end) as cancelled_orders,
-        
-        -- Data quality metrics
-        sum(case when negative_amount_flag = 1 then 1 else 0 end) as negative_amount_count,
-        sum(case when invalid_status_flag = 1 then 1 else 0 end) as invalid_status_count,
-        count(distinct case when customer_id is null then order_id end) as missing_customer_count
+        activity_date as order_date,
+        sum(orders) as total_orders,
+        sum(case when customer_id is not null then 1 else 0 end) as unique_customers,
+        sum(order_amount) as total_revenue,
+        sum(order_amount) / nullif(sum(priced_orders), 0) as avg_order_value,
+        sum(completed_orders) as completed_orders,
+        sum(cancelled_orders) as cancelled_orders,
+        sum(case when customer_id is null then orders else 0 end) as missing_customer_count
         
-    from {{ ref('stg_orders') }}
+    from {{ ref('int_customer_daily_activity') }}
+    where orders > 0
+      and {{ in_backfill_day('activity_date') }}
+    group by activity_date
+),
+
+-- Data quality metrics come from the quarantine split, not re-evaluated flags
+daily_order_quarantine as (
+    select
+        date_trunc('day', order_timestamp) as order_date,
+        count(*) as quarantined_orders,
+        sum(case when dq_reason like '%NEGATIVE_AMOUNT%' then 1 else 0 end) as negative_amount_count,
+        sum(case when dq_reason like '%INVALID_STATUS%' then 1 else 0 end) as invalid_status_count
+    from {{ ref('quarantine_orders') }}
+    where {{ in_backfill_day('order_timestamp') }}
     group by date_trunc('day', order_timestamp)
 ),
 
 daily_events as (
     select
-        date_trunc('day', event_timestamp) as event_date,
-        count(distinct event_id) as total_events,
-        count(distinct customer_id) as active_users,
-        count(distinct session_id) as total_sessions,
-        
-        -- Data quality metrics
-        sum(case when invalid_event_type_flag = 1 then 1 else 0 end) as invalid_event_type_count,
-        count(distinct case when customer_id is null then event_id end) as missing_customer_count
+        activity_date as event_date,
+        sum(events) as total_events,
+        sum(case when customer_id is not null then 1 else 0 end) as active_users,
+        sum(case when customer_id is null then events else 0 end) as missing_customer_count
         
-    from {{ ref('stg_events') }}
+    from {{ ref('int_customer_daily_activity') }}
+    where events > 0
+      and {{ in_backfill_day('activity_date') }}
+    group by activity_date
+),
+
+daily_sessions as (
+    select
+        activity_date as event_date,
+        count(distinct session_id) as total_sessions
+    from {{ ref('int_customer_daily_sessions') }}
+    where {{ in_backfill_day('activity_date') }}
+    group by activity_date
+),
+
+daily_event_quarantine as (
+    select
+        date_trunc('day', event_timestamp) as event_date,
+        count(*) as quarantined_events,
+        sum(case when dq_reason like '%INVALID_EVENT_TYPE%' then 1 else 0 end) as invalid_event_type_count
+    from {{ ref('quarantine_events') }}
+    where {{ in_backfill_day('event_timestamp') }}
     group by date_trunc('day', event_timestamp)
 ),
 
+order_days as (
+    select
+        coalesce(o.order_date, q.order_date) as order_date,
+        o.total_orders,
+        o.unique_customers,
+        o.total_revenue,
+        o.avg_order_value,
+        o.completed_orders,
+        o.cancelled_orders,
+        coalesce(o.total_orders, 0) + coalesce(q.quarantined_orders, 0) as screened_orders,
+        coalesce(q.negative_amount_count, 0) as negative_amount_count,
+        coalesce(q.invalid_status_count, 0) as invalid_status_count
+    from daily_orders o
+    full outer join daily_order_quarantine q on o.order_date = q.order_date
+),
+
+event_days as (
+    select
+        coalesce(e.event_date, q.event_date) as event_date,
+        e.total_events,
+        e.active_users,
+        s.total_sessions,
+        coalesce(e.total_events, 0) + coalesce(q.quarantined_events, 0) as screened_events,
+        coalesce(q.invalid_event_type_count, 0) as invalid_event_type_count
+    from daily_events e
+    full outer join daily_event_quarantine q on e.event_date = q.event_date
+    left join daily_sessions s on coalesce(e.event_date, q.event_date) = s.event_date
+),
+
 final as (
     select
         coalesce(o.order_date, e.event_date) as metric_date,
@@ -58,27 +117,27 @@ final as (
         
         -- Data quality scores
         case 
-            when o.total_orders > 0 
-            then 1 - (o.negative_amount_count::float / o.total_orders)
+            when o.screened_orders > 0 
+            then 1 - (o.negative_amount_count::double / o.screened_orders)
             else 1
         end as order_amount_quality_score,
         
         case 
-            when o.total_orders > 0 
-            then 1 - (o.invalid_status_count::float / o.total_orders)
+            when o.screened_orders > 0 
+            then 1 - (o.invalid_status_count::double / o.screened_orders)
             else 1
         end as order_status_quality_score,
         
         case 
-            when e.total_events > 0 
-            then 1 - (e.invalid_event_type_count::float / e.total_events)
+            when e.screened_events > 0 
+            then 1 - (e.invalid_event_type_count::double / e.screened_events)
             else 1
         end as event_type_quality_score,
         
-        current_timestamp() as _calculated_at
+        {{ dbt.current_timestamp() }} as _calculated_at
         
-    from daily_orders o
-    full outer join daily_events e on o.order_date = e.event_date
+    from order_days o
+    full outer join event_days e on o.order_date = e.event_date
 )
 
 select * from final
@@ -0,0 +1,17 @@
+{{
+  config(
+    materialized=day_partition_materialization(),
+    incremental_strategy='append',
+    pre_hook="{{ delete_day_slice('event_timestamp') }}",
+    alias='events',
+    tags=['quarantine', 'day_partitioned']
+  )
+}}
+
+-- Events that failed a staging rule, with comma-separated reason codes
+select
+    *,
+    {{ dbt.current_timestamp() }} as _quarantined_at
+from {{ ref('stg_events_screened') }}
+where dq_reason is not null
+  and {{ in_backfill_day('event_timestamp') }}
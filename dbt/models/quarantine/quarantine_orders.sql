@@ -0,0 +1,17 @@
+{{
+  config(
+    materialized=day_partition_materialization(),
+    incremental_strategy='append',
+    pre_hook="{{ delete_day_slice('order_timestamp') }}",
+    alias='orders',
+    tags=['quarantine', 'day_partitioned']
+  )
+}}
+
+-- Orders that failed a staging rule, with comma-separated reason codes
+select
+    *,
+    {{ dbt.current_timestamp() }} as _quarantined_at
+from {{ ref('stg_orders_screened') }}
+where dq_reason is not null
+  and {{ in_backfill_day('order_timestamp') }}
@@ -26,10 +26,10 @@ cleaned as (
         lower(trim(email)) as email,
         trim(first_name) as first_name,
         trim(last_name) as last_name,
-        to_date(date_of_birth) as date_of_birth,
+        cast(date_of_birth as date) as date_of_birth,
         upper(trim(country)) as country_code,
         trim(city) as city,
-        to_timestamp(signup_date) as signup_timestamp,
+        cast(signup_date as {{ dbt.type_timestamp() }}) as signup_timestamp,
         customer_segment,
         _loaded_at,
         
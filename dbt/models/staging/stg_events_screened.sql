@@ -0,0 +1,57 @@
+{{
+  config(
+    materialized=day_partition_materialization(),
+    incremental_strategy='append',
+    pre_hook="{{ delete_day_slice('event_timestamp') }}",
+    tags=['staging', 'source', 'quarantine', 'day_partitioned']
+  )
+}}
+
+/*
+Single pass over raw.events: clean every row once and tag rule violations
+with reason codes. stg_events and quarantine.events both read from here.
+*/
+
+with source_data as (
+    select
+        event_id,
+        customer_id,
+        event_type,
+        event_timestamp,
+        page_url,
+        product_id,
+        session_id,
+        device_type,
+        _loaded_at
+    from {{ source('ecommerce', 'events') }}
+    where {{ in_backfill_day('cast(event_timestamp as ' ~ dbt.type_timestamp() ~ ')') }}
+),
+
+cleaned as (
+    select
+        event_id::varchar as event_id,
+        customer_id::varchar as customer_id,
+        upper(trim(event_type)) as event_type,
+        cast(event_timestamp as {{ dbt.type_timestamp() }}) as event_timestamp,
+        trim(page_url) as page_url,
+        product_id::varchar as product_id,
+        session_id::varchar as session_id,
+        upper(trim(device_type)) as device_type,
+        _loaded_at
+        
+    from source_data
+),
+
+screened as (
+    select
+        *,
+        
+        -- Data quality reason codes (null = clean row)
+        {{ dq_reason_codes({
+            'INVALID_EVENT_TYPE': "event_type not in ('PAGE_VIEW', 'ADD_TO_CART', 'PURCHASE', 'SEARCH', 'CLICK')"
+        }) }} as dq_reason
+        
+    from cleaned
+)
+
+select * from screened
@@ -0,0 +1,61 @@
+{{
+  config(
+    materialized=day_partition_materialization(),
+    incremental_strategy='append',
+    pre_hook="{{ delete_day_slice('order_timestamp') }}",
+    tags=['staging', 'source', 'quarantine', 'day_partitioned']
+  )
+}}
+
+/*
+Single pass over raw.orders: clean every row once and tag rule violations
+with reason codes. stg_orders and quarantine.orders both read from here.
+*/
+
+with source_data as (
+    select
+        order_id,
+        customer_id,
+        order_date,
+        order_status,
+        total_amount,
+        payment_method,
+        shipping_cost,
+        discount_amount,
+        _loaded_at
+    from {{ source('ecommerce', 'orders') }}
+    where {{ in_backfill_day('cast(order_date as ' ~ dbt.type_timestamp() ~ ')') }}
+),
+
+cleaned as (
+    select
+        order_id::varchar as order_id,
+        customer_id::varchar as customer_id,
+        cast(order_date as {{ dbt.type_timestamp() }}) as order_timestamp,
+        upper(trim(order_status)) as order_status,
+        total_amount::decimal(10,2) as total_amount,
+        upper(trim(payment_method)) as payment_method,
+        coalesce(shipping_cost::decimal(10,2), 0) as shipping_cost,
+        coalesce(discount_amount::decimal(10,2), 0) as discount_amount,
+        _loaded_at
+        
+    from source_data
+),
+
+screened as (
+    select
+        *,
+        
+        -- Derived fields
+        (total_amount - discount_amount + shipping_cost) as net_amount,
+        
+        -- Data quality reason codes (null = clean row)
+        {{ dq_reason_codes({
+            'NEGATIVE_AMOUNT': 'total_amount < 0',
+            'INVALID_STATUS': "order_status not in ('PENDING', 'COMPLETED', 'CANCELLED', 'REFUNDED')"
+        }) }} as dq_reason
+        
+    from cleaned
+)
+
+select * from screened
@@ -0,0 +1,58 @@
+"""
+Analyze the latest dbt invocation: critical path, dominant model and
+runtime regressions against the recorded history.
+
+Usage:
+    python scripts/analyze_dbt_performance.py --step dbt_run_mart
+    python scripts/analyze_dbt_performance.py --target-dir dbt/target --tolerance 0.3
+"""
+
+import argparse
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'airflow', 'plugins'))
+
+from ecommerce_dq.dbt_analyzer import DEFAULT_TOLERANCE, RunHistory, analyze_run  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target-dir', default=os.path.join(REPO_ROOT, 'dbt', 'target'))
+    parser.add_argument('--step', default='manual', help='Pipeline step the invocation belongs to')
+    parser.add_argument('--history-dir', help='Run history directory (default: DQ_DBT_HISTORY_DIR)')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.history_dir) if args.history_dir else RunHistory()
+    try:
+        report = analyze_run(
+            os.path.join(args.target_dir, 'run_results.json'),
+            os.path.join(args.target_dir, 'manifest.json'),
+            args.step,
+            history=history,
+            tolerance=args.tolerance,
+        )
+    finally:
+        history.close()
+
+    print(f"Invocation {report['invocation_id']}: {report['nodes']} nodes in {report['elapsed_time']:.1f}s")
+    print(f"\nCritical path ({report['critical_path_seconds']}s):")
+    for unique_id in report['critical_path']:
+        print(f"  -> {unique_id}")
+    print(f"\nDominant node: {report['dominant_node']} (share of elapsed: {report['dominant_share']})")
+
+    if report['regressions']:
+        print("\n⚠️  RUNTIME REGRESSIONS:")
+        for regression in report['regressions']:
+            print(f"  - {regression['unique_id']}: {regression['execution_time']:.1f}s "
+                  f"(median {regression['baseline']:.1f}s, +{regression['slowdown_pct']}%)")
+        return 1
+
+    print("\n✓ No runtime regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
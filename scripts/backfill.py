@@ -0,0 +1,77 @@
+"""
+Backfill a historical date range as independent, parallel per-day partitions.
+
+Usage:
+    python scripts/backfill.py split data/history/orders.csv data/history/events.csv
+    python scripts/backfill.py run --start 2025-07-01 --end 2025-09-30 --concurrency 8
+"""
+
+import argparse
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'airflow', 'plugins'))
+
+from ecommerce_dq.backfill import (  # noqa: E402
+    BACKFILL_DIR,
+    DEFAULT_CONCURRENCY,
+    backfill_days,
+    partitioned_tables,
+    run_backfill,
+    split_by_day,
+)
+from ecommerce_dq.schema import partition_column  # noqa: E402
+
+
+def split(args):
+    """Split full exports (<table>.csv) into per-day input files."""
+    tables = partitioned_tables()
+    for table in tables:
+        paths = [p for p in args.csv_paths if os.path.basename(p).split('.')[0] == table]
+        if not paths:
+            continue
+        result = split_by_day(table, paths, args.backfill_dir)
+        print(f"✓ {table}: {result['rows']} rows over {result['days']} days "
+              f"({result['unassigned']} rows without a valid {partition_column(table)})")
+    return 0
+
+
+def run(args):
+    days = backfill_days(args.start, args.end)
+    print(f"Backfilling {len(days)} days ({days[0]} .. {days[-1]}) with concurrency {args.concurrency}")
+    summary = run_backfill(days, args.dbt_project_dir, args.dbt_executable, args.concurrency,
+                           args.backfill_dir, rebuild=not args.no_rebuild)
+
+    print(f"\n{summary['days_done']}/{summary['days_total']} days, {summary['rows']} rows in "
+          f"{summary['elapsed_seconds']}s ({summary['rows_per_sec']} rows/s, {summary['days_per_hour']} days/h)")
+    if summary['failed']:
+        print(f"⚠️  Failed days (re-run them with --start/--end): {', '.join(summary['failed'])}")
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backfill-dir', default=BACKFILL_DIR, help='Per-day input files (default: DQ_BACKFILL_DIR)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    split_parser = commands.add_parser('split', help='Split full CSV exports into per-day files')
+    split_parser.add_argument('csv_paths', nargs='+', help='Exports named after their table, e.g. orders.csv')
+    split_parser.set_defaults(func=split)
+
+    run_parser = commands.add_parser('run', help='Backfill a date range')
+    run_parser.add_argument('--start', required=True, help='First day (YYYY-MM-DD)')
+    run_parser.add_argument('--end', required=True, help='Last day, inclusive (YYYY-MM-DD)')
+    run_parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Days in flight')
+    run_parser.add_argument('--dbt-project-dir', default=os.getenv('DQ_DBT_PROJECT_DIR', os.path.join(REPO_ROOT, 'dbt')))
+    run_parser.add_argument('--dbt-executable', default=os.getenv('DQ_DBT_EXECUTABLE', 'dbt'))
+    run_parser.add_argument('--no-rebuild', action='store_true', help='Skip rebuilding the cross-day models')
+    run_parser.set_defaults(func=run)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
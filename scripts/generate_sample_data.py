@@ -66,13 +66,16 @@ def generate_customers(n=NUM_CUSTOMERS):
     return df
 
 
-def generate_orders(customers_df, n=NUM_ORDERS):
-    """Generate order data with intentional quality issues."""
+def generate_orders(customers_df, n=NUM_ORDERS, id_offset=0):
+    """
+    Generate order data with intentional quality issues.
+    `id_offset` shifts order IDs so chunks generated separately do not collide.
+    """
     
     orders = []
     customer_ids = customers_df['customer_id'].tolist()
     
-    for i in range(1, n + 1):
+    for i in range(id_offset + 1, id_offset + n + 1):
         order_id = f"ORD{str(i).zfill(8)}"
         customer_id = random.choice(customer_ids)
         
@@ -110,15 +113,18 @@ def generate_orders(customers_df, n=NUM_ORDERS):
     return df
 
 
-def generate_events(customers_df, n=NUM_EVENTS):
-    """Generate user event data with intentional quality issues."""
+def generate_events(customers_df, n=NUM_EVENTS, id_offset=0):
+    """
+    Generate user event data with intentional quality issues.
+    `id_offset` shifts event IDs so chunks generated separately do not collide.
+    """
     
     events = []
     customer_ids = customers_df['customer_id'].tolist()
     event_types = ['PAGE_VIEW', 'ADD_TO_CART', 'PURCHASE', 'SEARCH', 'CLICK']
     device_types = ['DESKTOP', 'MOBILE', 'TABLET']
     
-    for i in range(1, n + 1):
+    for i in range(id_offset + 1, id_offset + n + 1):
         event_id = f"EVT{str(i).zfill(10)}"
         customer_id = random.choice(customer_ids)
         
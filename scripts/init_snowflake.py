@@ -2,6 +2,9 @@
 Snowflake initialization script.
 Creates necessary database objects for the data quality pipeline.
 
+With DQ_WAREHOUSE_BACKEND=duckdb the same schemas and raw tables are
+created in the embedded DuckDB warehouse at DQ_DUCKDB_PATH instead.
+
 Author: Patrick Cheung
 Date: October 2025
 """
@@ -15,6 +18,9 @@ from snowflake.connector import DictCursor
 # Load environment variables
 load_dotenv()
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WAREHOUSE_BACKEND = os.getenv('DQ_WAREHOUSE_BACKEND', 'snowflake').lower()
+
 def get_snowflake_connection():
     """Create Snowflake connection."""
     return snowflake.connector.connect(
@@ -26,26 +32,47 @@ def get_snowflake_connection():
     )
 
 
+def get_duckdb_connection():
+    """Open the embedded DuckDB warehouse."""
+    import duckdb
+    
+    path = os.getenv('DQ_DUCKDB_PATH', os.path.join(REPO_ROOT, 'data', 'local', 'warehouse.duckdb'))
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return duckdb.connect(path)
+
+
+def get_connection():
+    """Connection for the configured warehouse backend."""
+    if WAREHOUSE_BACKEND == 'duckdb':
+        return get_duckdb_connection()
+    return get_snowflake_connection()
+
+
 def init_database():
     """Initialize Snowflake database and schemas."""
     
-    conn = get_snowflake_connection()
+    conn = get_connection()
     cursor = conn.cursor()
     
     try:
-        database = os.getenv('SNOWFLAKE_DATABASE', 'ECOMMERCE_DWH')
-        
-        print(f"Initializing Snowflake database: {database}")
-        
-        # Create database
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
-        print(f"✓ Database '{database}' created/verified")
-        
-        # Use database
-        cursor.execute(f"USE DATABASE {database}")
+        if WAREHOUSE_BACKEND == 'duckdb':
+            # The DuckDB file is the database
+            database = os.getenv('DQ_DUCKDB_PATH', 'data/local/warehouse.duckdb')
+            print(f"Initializing local DuckDB warehouse: {database}")
+        else:
+            database = os.getenv('SNOWFLAKE_DATABASE', 'ECOMMERCE_DWH')
+            
+            print(f"Initializing Snowflake database: {database}")
+            
+            # Create database
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database}")
+            print(f"✓ Database '{database}' created/verified")
+            
+            # Use database
+            cursor.execute(f"USE DATABASE {database}")
         
         # Create schemas
-        schemas = ['RAW', 'STAGING', 'MART']
+        schemas = ['RAW', 'STAGING', 'QUARANTINE', 'INTERMEDIATE', 'MART']
         for schema in schemas:
             cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
             print(f"✓ Schema '{schema}' created/verified")
@@ -64,7 +91,7 @@ def init_database():
                 city VARCHAR(100),
                 signup_date TIMESTAMP,
                 customer_segment VARCHAR(20),
-                _loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
+                _loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
         print("✓ Table 'raw.customers' created")
@@ -79,7 +106,7 @@ def init_database():
                 payment_method VARCHAR(50),
                 shipping_cost DECIMAL(10,2),
                 discount_amount DECIMAL(10,2),
-                _loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
+                _loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
         print("✓ Table 'raw.orders' created")
@@ -94,13 +121,13 @@ def init_database():
                 product_id VARCHAR(20),
                 session_id VARCHAR(50),
                 device_type VARCHAR(20),
-                _loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP()
+                _loaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
         print("✓ Table 'raw.events' created")
         
         print("\n" + "="*60)
-        print("Snowflake initialization complete!")
+        print(f"{'DuckDB' if WAREHOUSE_BACKEND == 'duckdb' else 'Snowflake'} initialization complete!")
         print("="*60)
         print(f"\nDatabase: {database}")
         print(f"Schemas: {', '.join(schemas)}")
@@ -118,11 +145,14 @@ def init_database():
 def verify_connection():
     """Verify Snowflake connection."""
     try:
-        conn = get_snowflake_connection()
+        conn = get_connection()
         cursor = conn.cursor()
-        cursor.execute("SELECT CURRENT_VERSION()")
+        if WAREHOUSE_BACKEND == 'duckdb':
+            cursor.execute("SELECT version()")
+        else:
+            cursor.execute("SELECT CURRENT_VERSION()")
         version = cursor.fetchone()[0]
-        print(f"✓ Connected to Snowflake (version: {version})")
+        print(f"✓ Connected to {WAREHOUSE_BACKEND} (version: {version})")
         cursor.close()
         conn.close()
         return True
@@ -1,18 +1,28 @@
 """
 Airflow connection setup utility.
-Programmatically create Snowflake connection in Airflow.
+Programmatically create Snowflake connection, ingest pools and the dbt pool in Airflow.
 
 Author: Patrick Cheung
 Date: October 2025
 """
 
 import os
+import sys
 from dotenv import load_dotenv
-from airflow.models import Connection
+from airflow.models import Connection, Pool
 from airflow import settings
 
 load_dotenv()
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'airflow', 'plugins'))
+
+from ecommerce_dq.dag_factory import DBT_POOL  # noqa: E402
+from ecommerce_dq.schema import load_raw_schema  # noqa: E402
+
+# One pool per raw table in the raw schema; its slots cap how many partitions of the table load in parallel
+INGEST_POOL_SLOTS = int(os.getenv('DQ_INGEST_POOL_SLOTS', '4'))
+
 
 def create_snowflake_connection():
     """Create Snowflake connection in Airflow."""
@@ -51,7 +61,34 @@ def create_snowflake_connection():
     print(f"✓ Snowflake connection '{conn_id}' created successfully")
 
 
+def create_ingest_pools():
+    """Create the per-table pools used by the mapped ingest tasks."""
+    for table in load_raw_schema():
+        Pool.create_or_update_pool(
+            name=f"ingest_{table}",
+            slots=INGEST_POOL_SLOTS,
+            description=f"Parallel ingest of {table} partitions",
+            include_deferred=False,
+        )
+        print(f"✓ Pool 'ingest_{table}' set to {INGEST_POOL_SLOTS} slots")
+
+
+
+def create_dbt_pool():
+    """Create the single-slot pool shared by the dbt tasks of both DAGs."""
+    Pool.create_or_update_pool(
+        name=DBT_POOL,
+        slots=1,
+        description="One dbt invocation at a time across the pipeline DAGs",
+        # Deferred dbt steps keep the slot while their command runs
+        include_deferred=True,
+    )
+    print(f"✓ Pool '{DBT_POOL}' set to 1 slot")
+
+
 if __name__ == "__main__":
     print("Creating Airflow connections...")
     create_snowflake_connection()
+    create_ingest_pools()
+    create_dbt_pool()
     print("\nConnection setup complete!")
@@ -0,0 +1,439 @@
+"""
+Stream synthetic e-commerce data continuously, for load and soak tests of the
+near-real-time path (the ecommerce_microbatch DAG).
+
+Emits time-ordered events, orders and new customers at a target rate of
+events per second, modulated over the (simulated) day: the rate peaks at
+PEAK_HOUR and bottoms out twelve hours later, averaging --rate. Rows carry
+the same injected defects as generate_sample_data.py (NULL_RATE,
+DUPLICATE_RATE, INVALID_STATUS_RATE, negative amounts) and continue its IDs.
+
+Rows are generated in vectorized batches every TICK_SECONDS from precomputed
+value pools, so one core sustains several hundred thousand events/s and the
+generator is not the bottleneck of a soak test. Output goes either to
+rotating files per table, written under a temporary name and renamed to
+<output>/<table>/<table>-<timestamp>-<n>.csv when complete (the landing
+layout of data/raw), or to a pipe (one table, flushed every --flush-seconds).
+
+Usage:
+    python scripts/stream_sample_data.py --rate 2000 --output data/raw --rotate-seconds 30
+    python scripts/stream_sample_data.py --rate 100000 --duration 60 --output /tmp/soak
+    python scripts/stream_sample_data.py --rate 50000 --speedup 1440 --tables events --output - | consumer
+"""
+
+import argparse
+import functools
+import io
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from generate_sample_data import (
+    DUPLICATE_RATE,
+    INVALID_STATUS_RATE,
+    NULL_RATE,
+    NUM_CUSTOMERS,
+    NUM_EVENTS,
+    NUM_ORDERS,
+    fake,
+)
+
+COLUMNS = {
+    'customers': ['customer_id', 'email', 'first_name', 'last_name', 'date_of_birth', 'country', 'city',
+                  'signup_date', 'customer_segment', '_loaded_at'],
+    'orders': ['order_id', 'customer_id', 'order_date', 'order_status', 'total_amount', 'payment_method',
+               'shipping_cost', 'discount_amount', '_loaded_at'],
+    'events': ['event_id', 'customer_id', 'event_type', 'event_timestamp', 'page_url', 'product_id',
+               'session_id', 'device_type', '_loaded_at'],
+}
+TABLES = list(COLUMNS)
+
+# Orders and new customers per event; orders follow generate_sample_data's 5000 : 15000
+ORDERS_PER_EVENT = NUM_ORDERS / NUM_EVENTS
+NEW_CUSTOMERS_PER_EVENT = 0.002
+
+# Rate multiplier 1 + DIURNAL_AMPLITUDE * cos(...), highest at PEAK_HOUR (local time of the simulated clock)
+DIURNAL_AMPLITUDE = 0.5
+PEAK_HOUR = 20
+
+TICK_SECONDS = 0.1
+NEGATIVE_AMOUNT_RATE = 0.005
+NAME_POOL_SIZE = 1000
+
+EVENT_TYPES = ['PAGE_VIEW', 'ADD_TO_CART', 'PURCHASE', 'SEARCH', 'CLICK']
+INVALID_EVENT_TYPES = ['LOGIN', 'LOGOUT', 'UNKNOWN']
+ORDER_STATUSES = ['PENDING', 'COMPLETED', 'CANCELLED', 'REFUNDED']
+INVALID_ORDER_STATUSES = ['PROCESSING', 'SHIPPED', 'UNKNOWN']
+PAYMENT_METHODS = ['CREDIT_CARD', 'DEBIT_CARD', 'PAYPAL', 'BANK_TRANSFER']
+DEVICE_TYPES = ['DESKTOP', 'MOBILE', 'TABLET']
+
+
+def diurnal_factor(hour, amplitude: float = DIURNAL_AMPLITUDE, peak_hour: float = PEAK_HOUR):
+    """Rate multiplier at an hour of day (0-24); averages 1 over a day."""
+    return 1 + amplitude * np.cos(2 * np.pi * (np.asarray(hour) - peak_hour) / 24)
+
+
+def csv_field(value: str) -> str:
+    """A value quoted as CSV needs it, for the value pools."""
+    if any(c in value for c in ',"\n'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def timestamp_strings(seconds) -> np.ndarray:
+    """'YYYY-MM-DD HH:MM:SS.ffffff' strings of (naive) epoch seconds, as pandas writes timestamps."""
+    if not len(seconds):
+        return np.array([], dtype=object)
+    text = np.datetime_as_string((np.asarray(seconds) * 1e6).astype('int64').astype('datetime64[us]'))
+    text.view('U1').reshape(len(text), -1)[:, 10] = ' '
+    return text.astype(object)
+
+
+@functools.lru_cache(maxsize=1)
+def fake_pools() -> dict:
+    """Faker values to draw customers from; Faker itself is far too slow per row."""
+    def pool(generate, size=NAME_POOL_SIZE):
+        return np.array([csv_field(generate()) for _ in range(size)], dtype=object)
+    return {
+        'first_name': pool(fake.first_name),
+        'last_name': pool(fake.last_name),
+        'city': pool(fake.city),
+        'country': pool(fake.country_code),
+        'user_name': pool(fake.user_name),
+        'email_domain': pool(fake.free_email_domain, 10),
+    }
+
+
+def naive_seconds(moment: datetime) -> float:
+    """Epoch seconds of a naive local datetime, so formatted timestamps read as local time."""
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+def csv_lines(columns: list) -> str:
+    """Rows (one array per column) as CSV lines."""
+    if not len(columns[0]):
+        return ''
+    return '\n'.join(map(','.join, zip(*columns))) + '\n'
+
+
+class StreamGenerator:
+    """
+    Batches of rows for consecutive intervals of a simulated clock. IDs
+    continue after generate_sample_data's defaults (plus `id_offset`), and
+    events and orders reference the customers emitted before their batch.
+    """
+
+    def __init__(self, rate: float, amplitude: float = DIURNAL_AMPLITUDE,
+                 orders_per_event: float = ORDERS_PER_EVENT,
+                 new_customers_per_event: float = NEW_CUSTOMERS_PER_EVENT,
+                 start: datetime = None, speedup: float = 1.0, id_offset: int = 0, seed: int = 42):
+        self.rate = rate
+        self.amplitude = amplitude
+        self.ratios = {'events': 1.0, 'orders': orders_per_event, 'customers': new_customers_per_event}
+        self.clock = naive_seconds(start or datetime.now())
+        self.speedup = speedup
+        self.rng = np.random.default_rng(seed)
+        self.next_ids = {'customers': NUM_CUSTOMERS + id_offset + 1, 'orders': NUM_ORDERS + id_offset + 1,
+                         'events': NUM_EVENTS + id_offset + 1}
+        self._carry = {table: 0.0 for table in TABLES}
+
+        # Customer IDs referenced by events and orders: the static ones, then each new customer
+        self._customer_ids = np.empty(2 * NUM_CUSTOMERS, dtype=object)
+        self._customer_ids[:NUM_CUSTOMERS] = [f"CUST{i:06d}" for i in range(1, NUM_CUSTOMERS + 1)]
+        self._customers = NUM_CUSTOMERS
+
+        self.pools = {
+            'event_type': np.array(EVENT_TYPES, dtype=object),
+            'invalid_event_type': np.array(INVALID_EVENT_TYPES, dtype=object),
+            'order_status': np.array(ORDER_STATUSES, dtype=object),
+            'invalid_order_status': np.array(INVALID_ORDER_STATUSES, dtype=object),
+            'payment_method': np.array(PAYMENT_METHODS, dtype=object),
+            'device_type': np.array(DEVICE_TYPES, dtype=object),
+            'page_url': np.array([f"/page/{i}" for i in range(1, 101)], dtype=object),
+            'product_id': np.array([f"PROD{i:04d}" for i in range(1, 501)], dtype=object),
+            'session_id': np.array([f"SESS{i:06d}" for i in range(1, 1001)], dtype=object),
+            **fake_pools(),
+        }
+
+    def _pick(self, pool: str, n: int) -> np.ndarray:
+        values = self.pools[pool]
+        return values[self.rng.integers(0, len(values), n)]
+
+    def _nulls(self, values: np.ndarray, rate: float) -> np.ndarray:
+        values = values.astype(object, copy=True)
+        values[self.rng.random(len(values)) < rate] = ''
+        return values
+
+    def _ids(self, table: str, prefix: str, width: int, n: int) -> list:
+        first = self.next_ids[table]
+        self.next_ids[table] += n
+        return [f"{prefix}{i:0{width}d}" for i in range(first, first + n)]
+
+    def _row_count(self, table: str, events: float) -> int:
+        """Rows of a table for an interval, carrying the fraction over to the next one."""
+        due = events * self.ratios[table] + self._carry[table]
+        n = int(due)
+        self._carry[table] = due - n
+        return n
+
+    def _times(self, n: int, start: float, end: float) -> np.ndarray:
+        return np.sort(self.rng.uniform(start, end, n))
+
+    def _duplicate(self, columns: list) -> list:
+        """Re-emit DUPLICATE_RATE of the rows, each right after its original (stays time-ordered)."""
+        n = len(columns[0])
+        duplicates = np.flatnonzero(self.rng.random(n) < DUPLICATE_RATE)
+        if not len(duplicates):
+            return columns
+        order = np.sort(np.concatenate([np.arange(n), duplicates]), kind='stable')
+        return [np.asarray(column, dtype=object)[order] for column in columns]
+
+    def batch(self, seconds: float) -> dict:
+        """{table: (rows, csv lines)} for the next `seconds` of wall time (speedup x of simulated time)."""
+        start, end = self.clock, self.clock + seconds * self.speedup
+        self.clock = end
+        hour = ((start + end) / 2 % 86400) / 3600
+        events = self.rate * seconds * float(diurnal_factor(hour, self.amplitude))
+        loaded_at = timestamp_strings([naive_seconds(datetime.now())])[0]
+
+        columns = {
+            'customers': self._customer_rows(self._row_count('customers', events), start, end, loaded_at),
+            'orders': self._order_rows(self._row_count('orders', events), start, end, loaded_at),
+            'events': self._event_rows(self._row_count('events', events), start, end, loaded_at),
+        }
+        # Events and orders of this batch only reference customers emitted before it
+        self._add_customers(columns['customers'][0])
+        batch = {}
+        for table, table_columns in columns.items():
+            table_columns = self._duplicate(table_columns)
+            batch[table] = (len(table_columns[0]), csv_lines(table_columns))
+        return batch
+
+    def _customer_refs(self, n: int) -> np.ndarray:
+        refs = self._customer_ids[self.rng.integers(0, self._customers, n)]
+        return self._nulls(refs, NULL_RATE)
+
+    def _add_customers(self, ids: list):
+        if self._customers + len(ids) > len(self._customer_ids):
+            grown = np.empty(2 * (self._customers + len(ids)), dtype=object)
+            grown[:self._customers] = self._customer_ids[:self._customers]
+            self._customer_ids = grown
+        self._customer_ids[self._customers:self._customers + len(ids)] = ids
+        self._customers += len(ids)
+
+    def _event_rows(self, n: int, start: float, end: float, loaded_at: str) -> list:
+        event_types = self._pick('event_type', n)
+        invalid = self.rng.random(n) < INVALID_STATUS_RATE
+        event_types[invalid] = self._pick('invalid_event_type', int(invalid.sum()))
+        return [
+            self._ids('events', 'EVT', 10, n),
+            self._customer_refs(n),
+            event_types,
+            timestamp_strings(self._times(n, start, end)),
+            self._pick('page_url', n),
+            self._nulls(self._pick('product_id', n), 0.3),
+            self._pick('session_id', n),
+            self._pick('device_type', n),
+            np.full(n, loaded_at, dtype=object),
+        ]
+
+    def _order_rows(self, n: int, start: float, end: float, loaded_at: str) -> list:
+        statuses = self._pick('order_status', n)
+        invalid = self.rng.random(n) < INVALID_STATUS_RATE
+        statuses[invalid] = self._pick('invalid_order_status', int(invalid.sum()))
+        amounts = np.round(self.rng.uniform(10, 500, n), 2)
+        amounts[self.rng.random(n) < NEGATIVE_AMOUNT_RATE] *= -1
+        discounts = np.where(self.rng.random(n) > 0.7, np.round(self.rng.uniform(0, 50, n), 2), 0)
+        return [
+            self._ids('orders', 'ORD', 8, n),
+            self._customer_refs(n),
+            timestamp_strings(self._times(n, start, end)),
+            statuses,
+            self._nulls(np.array([f"{a:.2f}" for a in amounts.tolist()], dtype=object), NULL_RATE),
+            self._pick('payment_method', n),
+            [f"{a:.2f}" for a in np.round(self.rng.uniform(0, 20, n), 2).tolist()],
+            [f"{a:.2f}" for a in discounts.tolist()],
+            np.full(n, loaded_at, dtype=object),
+        ]
+
+    def _customer_rows(self, n: int, start: float, end: float, loaded_at: str) -> list:
+        ids = self._ids('customers', 'CUST', 6, n)
+        emails = [f"{user}{i[4:]}@{domain}"
+                  for user, domain, i in zip(self._pick('user_name', n), self._pick('email_domain', n), ids)]
+        # Aged 18 to 80 on the simulated day
+        birth_days = np.datetime64(int(end // 86400), 'D') - self.rng.integers(18 * 365, 80 * 365, n)
+        return [
+            ids,
+            self._nulls(np.array(emails, dtype=object), NULL_RATE),
+            self._nulls(self._pick('first_name', n), NULL_RATE),
+            self._nulls(self._pick('last_name', n), NULL_RATE),
+            self._nulls(np.datetime_as_string(birth_days).astype(object), NULL_RATE),
+            self._pick('country', n),
+            self._pick('city', n),
+            timestamp_strings(self._times(n, start, end)),
+            np.full(n, 'NEW', dtype=object),
+            np.full(n, loaded_at, dtype=object),
+        ]
+
+
+class RotatingCsvSink:
+    """
+    One CSV file per table at a time under <output_dir>/<table>/, written as
+    *.csv.tmp and renamed to *.csv once it is rotated, so readers only ever
+    see complete files.
+    """
+
+    def __init__(self, output_dir: str, tables: list = TABLES, rotate_seconds: float = 60,
+                 rotate_rows: int = None):
+        self.output_dir = output_dir
+        self.tables = tables
+        self.rotate_seconds = rotate_seconds
+        self.rotate_rows = rotate_rows
+        self.landed = []
+        self._files = {}
+        self._sequence = 0
+
+    def _open(self, table: str):
+        self._sequence += 1
+        table_dir = os.path.join(self.output_dir, table)
+        os.makedirs(table_dir, exist_ok=True)
+        path = os.path.join(table_dir, f"{table}-{datetime.now():%Y%m%dT%H%M%S}-{self._sequence:06d}.csv")
+        f = open(f"{path}.tmp", 'w', buffering=1 << 20)
+        f.write(','.join(COLUMNS[table]) + '\n')
+        self._files[table] = {'file': f, 'path': path, 'opened': time.monotonic(), 'rows': 0}
+
+    def _land(self, table: str):
+        current = self._files.pop(table)
+        current['file'].close()
+        os.replace(f"{current['path']}.tmp", current['path'])
+        self.landed.append(current['path'])
+
+    def write(self, batch: dict):
+        for table in self.tables:
+            rows, lines = batch[table]
+            if table not in self._files:
+                self._open(table)
+            current = self._files[table]
+            current['file'].write(lines)
+            current['rows'] += rows
+            if (time.monotonic() - current['opened'] >= self.rotate_seconds
+                    or (self.rotate_rows and current['rows'] >= self.rotate_rows)):
+                self._land(table)
+
+    def flush(self):
+        for current in self._files.values():
+            current['file'].flush()
+
+    def close(self):
+        for table in list(self._files):
+            self._land(table)
+
+
+class PipeSink:
+    """One table's rows as a single CSV stream (stdout or any text stream)."""
+
+    def __init__(self, stream, table: str = 'events'):
+        self.stream = stream
+        self.table = table
+        self.stream.write(','.join(COLUMNS[table]) + '\n')
+
+    def write(self, batch: dict):
+        self.stream.write(batch[self.table][1])
+
+    def flush(self):
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+def run(generator: StreamGenerator, sink, duration: float = None, tick: float = TICK_SECONDS,
+        flush_seconds: float = 1.0, report_seconds: float = 10.0, log=sys.stderr) -> dict:
+    """
+    Emit a batch every `tick` seconds until `duration` (forever when None).
+    Batches are scheduled on the wall clock: when generating falls behind,
+    the next ones follow without sleeping and the delay is reported.
+    """
+    started = time.monotonic()
+    cpu_started = time.process_time()
+    rows = {table: 0 for table in TABLES}
+    next_tick = last_flush = last_report = started
+    try:
+        while duration is None or next_tick - started < duration:
+            batch = generator.batch(tick)
+            for table, (count, _) in batch.items():
+                rows[table] += count
+            sink.write(batch)
+            next_tick += tick
+            now = time.monotonic()
+            if now - last_flush >= flush_seconds:
+                sink.flush()
+                last_flush = now
+            if now - last_report >= report_seconds:
+                print(f"{rows['events'] / (now - started):,.0f} events/s, behind schedule "
+                      f"{max(now - next_tick, 0):.2f}s", file=log)
+                last_report = now
+            if next_tick > now:
+                time.sleep(next_tick - now)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sink.close()
+    elapsed = time.monotonic() - started
+    return {
+        'rows': rows,
+        'elapsed_seconds': round(elapsed, 2),
+        'events_per_sec': round(rows['events'] / elapsed, 1) if elapsed else None,
+        'behind_seconds': round(max(time.monotonic() - next_tick, 0), 2),
+        # Share of one core used; the sustainable rate is about events_per_sec / cpu_share
+        'cpu_share': round((time.process_time() - cpu_started) / elapsed, 3) if elapsed else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=1000, help='Events per second, averaged over a day')
+    parser.add_argument('--amplitude', type=float, default=DIURNAL_AMPLITUDE,
+                        help='Diurnal swing of the rate (0: constant)')
+    parser.add_argument('--speedup', type=float, default=1.0,
+                        help='Simulated seconds per wall second (1440: a day every minute)')
+    parser.add_argument('--orders-per-event', type=float, default=ORDERS_PER_EVENT)
+    parser.add_argument('--customers-per-event', type=float, default=NEW_CUSTOMERS_PER_EVENT)
+    parser.add_argument('--tables', default=','.join(TABLES), help='Comma-separated tables to emit')
+    parser.add_argument('--output', default='data/raw', help="Landing directory, or '-' for stdout")
+    parser.add_argument('--rotate-seconds', type=float, default=60)
+    parser.add_argument('--rotate-rows', type=int, default=None)
+    parser.add_argument('--flush-seconds', type=float, default=1.0)
+    parser.add_argument('--duration', type=float, default=None, help='Seconds to run (default: until interrupted)')
+    parser.add_argument('--id-offset', type=int, default=0, help='Shift IDs to continue an earlier run')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args(argv)
+
+    tables = [t for t in args.tables.split(',') if t]
+    unknown = sorted(set(tables) - set(TABLES))
+    if unknown:
+        parser.error(f"Unknown tables: {', '.join(unknown)}")
+    if args.output == '-':
+        if len(tables) != 1:
+            parser.error("Streaming to stdout takes exactly one table (--tables events)")
+        sink = PipeSink(io.TextIOWrapper(sys.stdout.buffer, write_through=False), tables[0])
+    else:
+        sink = RotatingCsvSink(args.output, tables, args.rotate_seconds, args.rotate_rows)
+
+    generator = StreamGenerator(args.rate, args.amplitude, args.orders_per_event, args.customers_per_event,
+                                speedup=args.speedup, id_offset=args.id_offset, seed=args.seed)
+    print(f"Streaming {', '.join(tables)} at {args.rate:,.0f} events/s (±{args.amplitude:.0%} over the day) "
+          f"to {args.output}", file=sys.stderr)
+    summary = run(generator, sink, args.duration, flush_seconds=args.flush_seconds)
+    counts = ', '.join(f"{rows:,} {table}" for table, rows in summary['rows'].items() if table in tables)
+    print(f"✓ {counts} in {summary['elapsed_seconds']}s: {summary['events_per_sec']:,.0f} events/s "
+          f"using {summary['cpu_share']:.0%} of a core (behind schedule {summary['behind_seconds']}s)",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,17 @@
+"""
+Shared pytest configuration.
+
+Makes the pipeline helpers in airflow/plugins importable as `ecommerce_dq`
+(and the benchmark helpers in benchmarks/, the data generators in scripts/)
+and points them at the repository's data/ directory.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('DQ_DATA_DIR', os.path.join(REPO_ROOT, 'data'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'airflow', 'plugins'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'benchmarks'))
+sys.path.insert(0, os.path.join(REPO_ROOT, 'scripts'))
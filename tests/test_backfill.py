@@ -0,0 +1,188 @@
+"""
+Unit tests for the per-day backfill engine, against the local DuckDB
+backend and a stand-in dbt executable.
+"""
+
+import json
+import os
+import stat
+
+import pandas as pd
+import pytest
+
+from ecommerce_dq import backfill
+from ecommerce_dq.backfill import (
+    BackfillProgress,
+    backfill_days,
+    day_file,
+    load_raw_day,
+    partitioned_tables,
+    run_backfill,
+    split_by_day,
+)
+from ecommerce_dq.dedup import KeyIndex
+from ecommerce_dq.schema import partition_column
+from ecommerce_dq.warehouse import get_hook, init_schemas
+
+ORDER_COLUMNS = ['order_id', 'customer_id', 'order_date', 'order_status', 'total_amount']
+
+
+def orders_frame(rows):
+    return pd.DataFrame(rows, columns=ORDER_COLUMNS)
+
+
+@pytest.fixture
+def duckdb_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+    monkeypatch.setenv('DQ_DUCKDB_PATH', str(tmp_path / 'warehouse.duckdb'))
+    monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'file')
+    monkeypatch.setenv('DQ_METRICS_FILE', str(tmp_path / 'metrics.jsonl'))
+    init_schemas()
+
+
+@pytest.fixture
+def fake_dbt(tmp_path):
+    """Executable that records its arguments, one invocation per line."""
+    log = tmp_path / 'dbt_calls.jsonl'
+    script = tmp_path / 'dbt'
+    script.write_text(f"#!/usr/bin/env python3\nimport json, sys\n"
+                      f"open({str(log)!r}, 'a').write(json.dumps(sys.argv[1:]) + '\\n')\n"
+                      f"sys.exit(3 if '2025-07-02' in ' '.join(sys.argv) else 0)\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+
+    def calls():
+        return [json.loads(line) for line in log.read_text().splitlines()] if log.exists() else []
+    return str(script), calls
+
+
+class TestDayPartitions:
+    """Test the day ranges, partition columns and day input files."""
+    
+    def test_backfill_days_inclusive(self):
+        """Both ends of the range are backfilled."""
+        assert backfill_days('2025-06-29', '2025-07-02') == ['2025-06-29', '2025-06-30', '2025-07-01', '2025-07-02']
+    
+    def test_backfill_days_rejects_reversed_range(self):
+        with pytest.raises(ValueError):
+            backfill_days('2025-07-02', '2025-07-01')
+    
+    def test_partition_columns_from_raw_schema(self):
+        """Fact tables are day-partitioned, customers is a dimension."""
+        assert partition_column('raw.orders') == 'order_date'
+        assert partition_column('events') == 'event_timestamp'
+        assert partition_column('customers') is None
+        assert partitioned_tables() == ['orders', 'events']
+    
+    def test_split_by_day(self, tmp_path):
+        """Exports are split into one file per day; rows without a timestamp are unassigned."""
+        export = tmp_path / 'orders.csv'
+        orders_frame([
+            ['O1', 'C1', '2025-07-01 09:00:00', 'COMPLETED', '10.00'],
+            ['O2', 'C1', '2025-07-02 23:59:59', 'PENDING', '5.00'],
+            ['O3', 'C2', '2025-07-01 18:30:00', 'COMPLETED', '7.50'],
+            ['O4', 'C2', None, 'COMPLETED', '1.00'],
+        ]).to_csv(export, index=False)
+        
+        result = split_by_day('raw.orders', [str(export)], str(tmp_path / 'backfill'), chunk_rows=2)
+        
+        assert result == {'table': 'orders', 'days': 2, 'rows': 3, 'unassigned': 1}
+        day_one = pd.read_csv(day_file('orders', '2025-07-01', str(tmp_path / 'backfill')))
+        assert day_one['order_id'].tolist() == ['O1', 'O3']
+
+
+class TestLoadRawDay:
+    """Test that a day load replaces only its own raw slice."""
+    
+    def write_day(self, backfill_dir, day, rows):
+        os.makedirs(os.path.join(backfill_dir, 'orders'), exist_ok=True)
+        orders_frame(rows).to_csv(day_file('orders', day, backfill_dir), index=False)
+    
+    def test_replaces_day_slice(self, tmp_path, duckdb_backend):
+        """Re-loading a day replaces its rows and leaves other days alone."""
+        backfill_dir = str(tmp_path / 'backfill')
+        state_dir = str(tmp_path / 'dedup')
+        self.write_day(backfill_dir, '2025-07-01', [['O1', 'C1', '2025-07-01 09:00:00', 'COMPLETED', '10.00']])
+        self.write_day(backfill_dir, '2025-07-02', [['O2', 'C1', '2025-07-02 10:00:00', 'PENDING', '5.00']])
+        load_raw_day('orders', '2025-07-01', backfill_dir, dedup_state_dir=state_dir)
+        load_raw_day('orders', '2025-07-02', backfill_dir, dedup_state_dir=state_dir)
+        
+        self.write_day(backfill_dir, '2025-07-01', [
+            ['O1', 'C1', '2025-07-01 09:00:00', 'REFUNDED', '10.00'],
+            ['O3', 'C2', '2025-07-01 12:00:00', 'COMPLETED', '2.00'],
+            ['O3', 'C2', '2025-07-01 12:00:00', 'COMPLETED', '2.00'],
+        ])
+        assert load_raw_day('orders', '2025-07-01', backfill_dir, dedup_state_dir=state_dir) == 2
+        
+        rows = get_hook().get_records("SELECT order_id, order_status FROM raw.orders ORDER BY order_id")
+        assert rows == [('O1', 'REFUNDED'), ('O2', 'PENDING'), ('O3', 'COMPLETED')]
+    
+    def test_drops_rows_outside_the_day(self, tmp_path, duckdb_backend):
+        """A misplaced row in a day file is not loaded into the day's slice."""
+        backfill_dir = str(tmp_path / 'backfill')
+        self.write_day(backfill_dir, '2025-07-01', [
+            ['O1', 'C1', '2025-07-01 09:00:00', 'COMPLETED', '10.00'],
+            ['O2', 'C1', '2025-07-03 09:00:00', 'COMPLETED', '10.00'],
+        ])
+        
+        assert load_raw_day('orders', '2025-07-01', backfill_dir, dedup_state_dir=str(tmp_path / 'dedup')) == 1
+    
+    def test_missing_day_file_keeps_slice(self, tmp_path, duckdb_backend):
+        """Without an input file the raw slice is untouched."""
+        assert load_raw_day('orders', '2025-07-01', str(tmp_path / 'backfill')) is None
+    
+    def test_loaded_keys_are_recorded(self, tmp_path, duckdb_backend):
+        """Regular loads skip keys a backfill already loaded."""
+        backfill_dir = str(tmp_path / 'backfill')
+        state_dir = str(tmp_path / 'dedup')
+        self.write_day(backfill_dir, '2025-07-01', [['O1', 'C1', '2025-07-01 09:00:00', 'COMPLETED', '10.00']])
+        load_raw_day('orders', '2025-07-01', backfill_dir, dedup_state_dir=state_dir)
+        
+        new_df, _ = KeyIndex('raw.orders', 'order_id', state_dir=state_dir).filter_new(
+            pd.DataFrame({'order_id': ['O1', 'O9']})
+        )
+        assert new_df['order_id'].tolist() == ['O9']
+
+
+class TestRunBackfill:
+    """Test the parallel driver with a stand-in dbt."""
+    
+    def test_runs_each_day_and_reports_failures(self, tmp_path, duckdb_backend, fake_dbt, monkeypatch):
+        """Every day gets its own dbt invocation; a failed day blocks the cross-day rebuild."""
+        monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'snowflake')
+        monkeypatch.setattr(backfill, 'dbt_target', lambda: 'dev')
+        executable, calls = fake_dbt
+        
+        summary = run_backfill(backfill_days('2025-07-01', '2025-07-03'), str(tmp_path), executable,
+                               concurrency=3, backfill_dir=str(tmp_path / 'backfill'))
+        
+        assert summary['days_done'] == 2
+        assert summary['failed'] == ['2025-07-02']
+        day_vars = sorted(json.loads(c[c.index('--vars') + 1])['backfill_day'] for c in calls() if '--vars' in c)
+        assert day_vars == ['1970-01-01', '2025-07-01', '2025-07-02', '2025-07-03']
+        assert all(c[c.index('--target-path') + 1].startswith(os.path.join('target', 'backfill')) for c in calls())
+        assert not any('--exclude' in c for c in calls())
+    
+    def test_rebuilds_cross_day_models(self, tmp_path, duckdb_backend, fake_dbt):
+        """Once every day succeeded the downstream models are rebuilt."""
+        executable, calls = fake_dbt
+        
+        summary = run_backfill(['2025-07-01'], str(tmp_path), executable, backfill_dir=str(tmp_path / 'backfill'))
+        
+        assert summary['failed'] == []
+        assert calls()[-1][:5] == ['run', '--select', 'tag:day_partitioned+', '--exclude', 'tag:day_partitioned']
+
+
+class TestBackfillProgress:
+    """Test throughput and ETA reporting."""
+    
+    def test_summary(self, tmp_path, duckdb_backend):
+        progress = BackfillProgress(4)
+        progress.day_done({'day': '2025-07-01', 'rows': {'orders': 10, 'events': 30}, 'seconds': 1.0})
+        progress.day_failed('2025-07-02', RuntimeError('boom'))
+        
+        summary = progress.summary()
+        assert summary['days_done'] == 1
+        assert summary['days_failed'] == 1
+        assert summary['rows'] == 40
+        assert summary['rows_per_sec'] > 0
+        assert summary['eta_seconds'] is not None
@@ -0,0 +1,103 @@
+"""
+Unit tests for the benchmark harness (scale factors, baseline comparison).
+"""
+
+import json
+
+import pytest
+
+from dag_parse_benchmark import budget_ms, check_budget, synthetic_schema
+from feature_lookup_benchmark import percentiles
+from run_benchmarks import SCALES, compare_to_baseline, main, missing_baselines, parse_scale, split_rows
+
+
+class TestScales:
+    """Test scale factor handling."""
+    
+    def test_named_and_numeric_scales(self):
+        """Named scales resolve to row counts; numbers pass through."""
+        assert parse_scale('1M') == 1_000_000
+        assert parse_scale('100M') == 100_000_000
+        assert parse_scale('5000') == 5000
+    
+    def test_split_rows_follows_generator_ratio(self):
+        """Rows are split 1:5:15 across customers, orders and events."""
+        counts = split_rows(SCALES['smoke'])
+        
+        assert counts == {'customers': 1000, 'orders': 5000, 'events': 15000}
+
+
+class TestBaselineComparison:
+    """Test regression detection against the stored baseline."""
+    
+    baseline = {'1M': {'ingest': {'latency_s': 10.0, 'peak_rss_mb': 500.0}}}
+    
+    def test_within_tolerance(self):
+        """Small slowdowns inside the tolerance pass."""
+        results = {'1M': {'ingest': {'latency_s': 11.0, 'peak_rss_mb': 520.0}}}
+        
+        assert compare_to_baseline(results, self.baseline, tolerance=0.25) == []
+    
+    def test_latency_and_memory_regressions(self):
+        """Latency or peak RSS beyond the tolerance is reported."""
+        results = {'1M': {'ingest': {'latency_s': 13.0, 'peak_rss_mb': 700.0}}}
+        
+        regressions = compare_to_baseline(results, self.baseline, tolerance=0.25)
+        assert len(regressions) == 2
+        assert regressions[0].startswith('1M/ingest: latency_s')
+    
+    def test_missing_baseline_is_not_a_regression(self):
+        """Scales or stages without a baseline are skipped by the comparison (the run checks them up front)."""
+        results = {'10M': {'ingest': {'latency_s': 99.0, 'peak_rss_mb': 9999.0}}}
+        
+        assert compare_to_baseline(results, self.baseline, tolerance=0.25) == []
+    
+    def test_missing_baselines(self):
+        """Every planned scale/stage without a reference is listed."""
+        assert missing_baselines(['1M', '10M'], ['ingest', 'dbt'], self.baseline) == ['1M/dbt', '10M/ingest', '10M/dbt']
+    
+    def test_run_without_baseline_fails_before_measuring(self, tmp_path, capsys):
+        """A scale without a baseline fails the run instead of passing unchecked."""
+        path = tmp_path / 'baseline.json'
+        path.write_text(json.dumps(self.baseline))
+        
+        assert main(['--scale', '10M', '--stages', 'ingest', '--baseline', str(path)]) == 2
+        assert 'No baseline for 10M/ingest' in capsys.readouterr().out
+
+
+class TestParseBudget:
+    """Test the synthetic schemas and budget checks of the DAG parse benchmark."""
+    
+    def test_synthetic_schema_pads_with_child_feeds(self):
+        """Synthetic feeds reference customers and have no staging model."""
+        schema = synthetic_schema(30)
+        
+        assert len(schema) == 30
+        assert list(schema)[:3] == ['customers', 'orders', 'events']
+        assert schema['events_026']['table_name'] == 'events_026'
+        assert 'staging_model' not in schema['events_026']
+    
+    def test_synthetic_schema_keeps_real_feeds(self):
+        with pytest.raises(ValueError):
+            synthetic_schema(2)
+    
+    def test_budget_violations(self):
+        """Slow parses and heavy imports both break the budget."""
+        results = [
+            {'feeds': 3, 'parse_ms': 50.0, 'import_errors': {}, 'heavy_modules': []},
+            {'feeds': 100, 'parse_ms': budget_ms(100, 3) + 1, 'import_errors': {}, 'heavy_modules': ['pandas']},
+        ]
+        
+        violations = check_budget(results, base_feeds=3)
+        assert len(violations) == 2
+        assert violations[0].startswith('100 feeds: parse')
+        assert violations[1] == '100 feeds: imported pandas at parse time'
+
+
+class TestLookupPercentiles:
+    """Test the latency summary of the feature lookup benchmark."""
+    
+    def test_percentiles_in_milliseconds(self):
+        samples = [i / 1_000_000 for i in range(1, 101)]
+        
+        assert percentiles(samples) == {'p50_ms': 0.051, 'p99_ms': 0.1}
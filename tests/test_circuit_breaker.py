@@ -0,0 +1,96 @@
+"""
+Unit tests for the fail-fast quality gates.
+"""
+
+import pytest
+
+from ecommerce_dq.circuit_breaker import (
+    BLOCK, GATES, WARN, Check, blocking_failures, evaluate_checks, gate_checks, raw_checks, should_continue,
+)
+
+
+def fake_warehouse(values: dict):
+    """run_scalar stand-in returning a fixed value per check SQL."""
+    return lambda sql: values[sql]
+
+
+class TestCheck:
+    """Test check bounds."""
+    
+    def test_bounds(self):
+        """Values outside [min_value, max_value] fail."""
+        check = Check('rate', 'SELECT 1', min_value=0, max_value=0.05)
+        
+        assert check.passes(0.01)
+        assert not check.passes(0.06)
+        assert not check.passes(-1)
+    
+    def test_missing_value_fails(self):
+        """A NULL result (e.g. ratio over an empty table) fails the check."""
+        assert not Check('rate', 'SELECT 1', max_value=0.05).passes(None)
+    
+    def test_unknown_severity(self):
+        """Only BLOCK and WARN severities are accepted."""
+        with pytest.raises(ValueError):
+            Check('rate', 'SELECT 1', severity='critical')
+
+
+class TestGate:
+    """Test breaker decisions from check results."""
+    
+    def test_blocking_failure_opens_breaker(self):
+        """A failed BLOCK check stops the pipeline."""
+        checks = [
+            Check('loaded', 'q1', BLOCK, min_value=1),
+            Check('email', 'q2', WARN, min_value=0.95),
+        ]
+        results = evaluate_checks(fake_warehouse({'q1': 0, 'q2': 0.99}), checks)
+        
+        assert not should_continue(results)
+        assert [r['name'] for r in blocking_failures(results)] == ['loaded']
+    
+    def test_warning_does_not_open_breaker(self):
+        """A failed WARN check is reported but the pipeline continues."""
+        checks = [
+            Check('loaded', 'q1', BLOCK, min_value=1),
+            Check('email', 'q2', WARN, min_value=0.95),
+        ]
+        results = evaluate_checks(fake_warehouse({'q1': 100, 'q2': 0.5}), checks)
+        
+        assert should_continue(results)
+        assert results[1] == {'name': 'email', 'severity': WARN, 'value': 0.5, 'passed': False}
+    
+    def test_gates_defined(self):
+        """Both DAG gates have at least one blocking check."""
+        assert set(GATES) == {'raw', 'staging'}
+        for gate in GATES:
+            assert any(check.severity == BLOCK for check in gate_checks(gate))
+    
+    def test_raw_checks_generated_per_feed(self):
+        """Each feed gets a load check, and a null-rate check per non-nullable foreign key."""
+        assert [c.name for c in raw_checks('raw.orders')] == [
+            'raw_orders_loaded', 'raw_orders_freshness_hours', 'raw_orders_null_customer_id_rate',
+        ]
+        # events.customer_id is nullable; customers have no event time
+        assert [c.name for c in raw_checks('events')] == ['raw_events_loaded', 'raw_events_freshness_hours']
+        assert 'raw_customers_null_email_rate' in [c.name for c in gate_checks('raw', 'customers')]
+        assert len(gate_checks('raw')) == 7
+    
+    def test_metadata_served_checks(self):
+        """Checks naming a statistic skip their SQL unless the metadata is missing."""
+        checks = [
+            Check('loaded', 'q1', BLOCK, min_value=1, metadata=('row_count', 'raw.orders')),
+            Check('fresh', 'q2', WARN, max_value=24, metadata=('freshness_hours', 'raw.orders')),
+            Check('email', 'q3', WARN, min_value=0.95),
+        ]
+        metadata = {('row_count', 'raw.orders'): 100, ('freshness_hours', 'raw.orders'): None}
+        scanned = []
+        
+        def run_scalar(sql):
+            scanned.append(sql)
+            return {'q2': 30.0, 'q3': 0.99}[sql]
+        
+        results = evaluate_checks(run_scalar, checks, lambda *key: metadata[key])
+        
+        assert scanned == ['q2', 'q3']
+        assert [(r['value'], r['passed']) for r in results] == [(100, True), (30.0, False), (0.99, True)]
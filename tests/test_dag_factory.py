@@ -0,0 +1,132 @@
+"""
+Unit tests for the schema-driven pipeline DAG factory. Skipped when Airflow
+is not installed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('airflow.operators.python')
+
+from dag_parse_benchmark import HEAVY_MODULES, synthetic_schema  # noqa: E402
+from ecommerce_dq.dag_factory import DBT_POOL, build_pipeline_dag, ingest_order  # noqa: E402
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAG_PATH = os.path.join(REPO_ROOT, 'airflow', 'dags', 'ecommerce_data_quality_pipeline.py')
+MICROBATCH_DAG_PATH = os.path.join(REPO_ROOT, 'airflow', 'dags', 'ecommerce_microbatch.py')
+BACKFILL_DAG_PATH = os.path.join(REPO_ROOT, 'airflow', 'dags', 'ecommerce_backfill.py')
+
+
+def write_schema(tmp_path, schema: dict) -> str:
+    path = tmp_path / 'raw_schema.json'
+    path.write_text(json.dumps(schema))
+    return str(path)
+
+
+def build(path: str = None):
+    kwargs = {'path': path} if path else {}
+    return build_pipeline_dag('test_pipeline', {'owner': 'test', 'start_date': None}, 'test', **kwargs)
+
+
+class TestIngestOrder:
+    """Test the feed ordering derived from foreign keys."""
+    
+    def test_parents_first(self):
+        """Orders and events reference customers."""
+        assert ingest_order() == {'customers': [], 'orders': ['customers'], 'events': ['customers']}
+    
+    def test_cycle_rejected(self, tmp_path):
+        schema = synthetic_schema(3)
+        schema['customers']['columns'].append(
+            {'name': 'last_order_id', 'type': 'VARCHAR(20)', 'nullable': True, 'foreign_key': 'orders.order_id'}
+        )
+        
+        with pytest.raises(ValueError, match='cycle'):
+            ingest_order(write_schema(tmp_path, schema))
+
+
+class TestBuildPipelineDag:
+    """Test the tasks generated per feed."""
+    
+    def test_tasks_per_feed(self):
+        """Every feed gets partition listing, mapped ingest and a raw gate, after its parents."""
+        dag = build()
+        
+        for table in ('customers', 'orders', 'events'):
+            assert dag.get_task(f"ingest_data.list_{table}_partitions")
+            assert dag.get_task(f"ingest_data.ingest_{table}").partial_kwargs['pool'] == f"ingest_{table}"
+            assert dag.get_task(f"ingest_data.{table}_quality_gate").op_kwargs == {
+                'gate': 'raw', 'table_name': f"raw.{table}"
+            }
+        assert 'ingest_data.ingest_customers' in dag.get_task('ingest_data.ingest_orders').upstream_task_ids
+        assert not dag.has_task('raw_quality_gate')
+    
+    def test_dbt_steps_in_order(self):
+        """The staging gate sits between the staging and mart layers."""
+        dag = build()
+        
+        chain = ['dbt_deps', 'dbt_run_staging', 'dbt_test_staging', 'staging_quality_gate', 'dbt_run_mart',
+                 'dbt_test_mart']
+        for upstream, downstream in zip(chain, chain[1:]):
+            assert f"dbt_transformation.{upstream}" in dag.get_task(
+                f"dbt_transformation.{downstream}"
+            ).upstream_task_ids
+        assert dag.get_task('dbt_transformation.export_feature_cache').upstream_task_ids == {
+            'dbt_transformation.dbt_test_mart'
+        }
+    
+    def test_dbt_shares_one_pool(self):
+        """The daily dbt steps, the micro-batch refresh and the backfill tasks take turns in the dbt pool."""
+        from airflow.models import DagBag
+        
+        dag = build()
+        for step in ('dbt_run_staging', 'dbt_test_staging', 'dbt_run_mart', 'dbt_test_mart'):
+            assert dag.get_task(f"dbt_transformation.{step}").pool == DBT_POOL
+        
+        microbatch = DagBag(MICROBATCH_DAG_PATH, include_examples=False).dags['ecommerce_microbatch']
+        assert microbatch.get_task('refresh_event_days').pool == DBT_POOL
+        backfill = DagBag(BACKFILL_DAG_PATH, include_examples=False).dags['ecommerce_backfill']
+        assert {task.pool for task in backfill.tasks} == {DBT_POOL}
+    
+    def test_open_gate_still_alerts(self):
+        """Gates skip by trigger rule, so the all_done alert runs and reads every gate's results."""
+        dag = build()
+        gates = sorted(['ingest_data.customers_quality_gate', 'ingest_data.orders_quality_gate',
+                        'ingest_data.events_quality_gate', 'dbt_transformation.staging_quality_gate'])
+        
+        for gate in gates:
+            assert dag.get_task(gate).ignore_downstream_trigger_rules is False
+        alert = dag.get_task('alert_on_issues')
+        assert alert.trigger_rule == 'all_done'
+        assert alert.op_kwargs == {'gate_task_ids': gates}
+    
+    def test_new_feed_is_a_schema_edit(self, tmp_path):
+        """A feed added to the schema gets its own tasks, and validation when it has a staging model."""
+        schema = synthetic_schema(4)
+        schema['events_000']['staging_model'] = 'stg_events_000'
+        dag = build(write_schema(tmp_path, schema))
+        
+        assert dag.has_task('ingest_data.ingest_events_000')
+        assert dag.has_task('ingest_data.events_000_quality_gate')
+        assert 'events_000_referential_integrity' in dag.get_task('validate_quality').queries
+        assert len(dag.tasks) == len(build().tasks) + 3
+
+
+class TestParseImports:
+    """Test that parsing the DAG file stays light."""
+    
+    def test_no_heavy_imports_at_parse_time(self):
+        """pandas and the warehouse drivers are only imported by the task callables."""
+        script = (
+            "import runpy, sys; runpy.run_path(sys.argv[1]); "
+            "print('heavy:', [m for m in sys.argv[2].split(',') if m in sys.modules])"
+        )
+        env = {**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+        out = subprocess.run([sys.executable, '-c', script, DAG_PATH, ','.join(HEAVY_MODULES)],
+                             capture_output=True, text=True, env=env, check=True).stdout
+        
+        assert out.strip().splitlines()[-1] == 'heavy: []'
@@ -0,0 +1,143 @@
+"""
+Unit tests for the dbt run performance analyzer.
+"""
+
+import json
+
+from ecommerce_dq.dbt_analyzer import (
+    RunHistory,
+    analyze_run,
+    bytes_scanned_sql,
+    critical_path,
+    find_regressions,
+    parse_nodes,
+)
+
+MANIFEST = {
+    'nodes': {
+        'model.p.stg_orders_screened': {'depends_on': {'nodes': []}},
+        'model.p.stg_orders': {'depends_on': {'nodes': ['model.p.stg_orders_screened']}},
+        'model.p.stg_events': {'depends_on': {'nodes': []}},
+        'model.p.int_activity': {'depends_on': {'nodes': ['model.p.stg_orders', 'model.p.stg_events']}},
+        'model.p.daily_metrics': {'depends_on': {'nodes': ['model.p.int_activity', 'source.p.raw.orders']}},
+    }
+}
+
+
+def make_run_results(invocation_id, generated_at, times):
+    return {
+        'metadata': {'invocation_id': invocation_id, 'generated_at': generated_at},
+        'elapsed_time': 20.0,
+        'results': [
+            {
+                'unique_id': unique_id,
+                'status': 'success',
+                'execution_time': seconds,
+                'adapter_response': {'rows_affected': 10, 'query_id': f"q-{unique_id}"},
+            }
+            for unique_id, seconds in times.items()
+        ],
+    }
+
+
+def write_artifacts(tmp_path, run_results):
+    run_results_path = tmp_path / 'run_results.json'
+    manifest_path = tmp_path / 'manifest.json'
+    run_results_path.write_text(json.dumps(run_results))
+    manifest_path.write_text(json.dumps(MANIFEST))
+    return str(run_results_path), str(manifest_path)
+
+
+TIMES = {
+    'model.p.stg_orders_screened': 4.0,
+    'model.p.stg_orders': 1.0,
+    'model.p.stg_events': 8.0,
+    'model.p.int_activity': 3.0,
+    'model.p.daily_metrics': 2.0,
+}
+
+
+class TestCriticalPath:
+    """Test the longest-path computation."""
+    
+    def test_longest_weighted_path(self):
+        """The path follows the slowest chain of dependencies, not the longest one."""
+        nodes = parse_nodes(make_run_results('i1', '2025-10-01T00:00:00Z', TIMES))
+        
+        path, seconds = critical_path(nodes, MANIFEST)
+        
+        assert path == ['model.p.stg_events', 'model.p.int_activity', 'model.p.daily_metrics']
+        assert seconds == 13.0
+    
+    def test_dependencies_outside_the_run_are_ignored(self):
+        """A step that only runs marts still gets a path over its own nodes."""
+        nodes = parse_nodes(make_run_results('i1', '2025-10-01T00:00:00Z', {
+            'model.p.int_activity': 3.0, 'model.p.daily_metrics': 2.0,
+        }))
+        
+        assert critical_path(nodes, MANIFEST) == (['model.p.int_activity', 'model.p.daily_metrics'], 5.0)
+    
+    def test_empty_run(self):
+        """No nodes means no path."""
+        assert critical_path([], MANIFEST) == ([], 0.0)
+
+
+class TestRegressions:
+    """Test regression detection against the run history."""
+    
+    def record_history(self, history, count=5):
+        for i in range(count):
+            nodes = parse_nodes(make_run_results(f"i{i}", f"2025-10-0{i + 1}T00:00:00Z", TIMES))
+            history.record(f"i{i}", f"2025-10-0{i + 1}T00:00:00Z", 'dbt_run_staging', nodes)
+    
+    def test_flags_slow_node(self, tmp_path):
+        """A node well past its median is flagged; unchanged nodes are not."""
+        history = RunHistory(str(tmp_path))
+        self.record_history(history)
+        
+        current = parse_nodes(make_run_results('new', '2025-10-09T00:00:00Z', {
+            **TIMES, 'model.p.stg_events': 16.0, 'model.p.stg_orders': 1.4,
+        }))
+        regressions = find_regressions(current, history, 'new', tolerance=0.5)
+        
+        assert [r['unique_id'] for r in regressions] == ['model.p.stg_events']
+        assert regressions[0]['baseline'] == 8.0
+        assert regressions[0]['slowdown_pct'] == 100.0
+        history.close()
+    
+    def test_needs_enough_history(self, tmp_path):
+        """Nodes with fewer than the minimum recorded runs are never flagged."""
+        history = RunHistory(str(tmp_path))
+        self.record_history(history, count=2)
+        
+        current = parse_nodes(make_run_results('new', '2025-10-09T00:00:00Z', {'model.p.stg_events': 100.0}))
+        
+        assert find_regressions(current, history, 'new') == []
+        history.close()
+
+
+class TestAnalyzeRun:
+    """Test the end-to-end report."""
+    
+    def test_report_and_history(self, tmp_path):
+        """The report names the dominant node and the run lands in the history once."""
+        history = RunHistory(str(tmp_path / 'history'))
+        run_results_path, manifest_path = write_artifacts(
+            tmp_path, make_run_results('i1', '2025-10-01T00:00:00Z', TIMES)
+        )
+        
+        report = analyze_run(run_results_path, manifest_path, 'dbt_run_mart', history=history,
+                             bytes_scanned={'q-model.p.stg_events': 2048})
+        analyze_run(run_results_path, manifest_path, 'dbt_run_mart', history=history)
+        
+        assert report['dominant_node'] == 'model.p.stg_events'
+        assert report['dominant_share'] == 0.4
+        assert report['critical_path_seconds'] == 13.0
+        assert history.conn.execute("SELECT COUNT(*) FROM node_runs").fetchone()[0] == len(TIMES)
+        history.close()
+
+
+def test_bytes_scanned_sql_filters_query_ids():
+    """The lookup is restricted to the invocation's query IDs."""
+    sql = bytes_scanned_sql(['01a', '01b'])
+    assert "query_id IN ('01a', '01b')" in sql
@@ -0,0 +1,194 @@
+"""
+Unit tests for the ingestion deduplication index.
+"""
+
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from ecommerce_dq.dedup import BloomFilter, KeyIndex, hash_keys
+from ecommerce_dq.schema import primary_key, read_dtypes
+
+
+class TestBloomFilter:
+    """Test the numpy Bloom filter."""
+    
+    def test_no_false_negatives(self):
+        """Every added key must be reported as possibly present."""
+        bloom = BloomFilter.for_capacity(10_000)
+        hashes = hash_keys(pd.Series([f"ORD{i:08d}" for i in range(10_000)]))
+        bloom.add(hashes)
+        
+        assert bloom.might_contain(hashes).all()
+    
+    def test_false_positive_rate(self):
+        """Unseen keys should rarely be reported as present."""
+        bloom = BloomFilter.for_capacity(10_000, error_rate=0.01)
+        bloom.add(hash_keys(pd.Series([f"ORD{i:08d}" for i in range(10_000)])))
+        
+        unseen = hash_keys(pd.Series([f"EVT{i:010d}" for i in range(10_000)]))
+        assert bloom.might_contain(unseen).mean() < 0.03
+    
+    def test_save_and_load(self, tmp_path):
+        """A saved filter reloads with identical bits."""
+        bloom = BloomFilter.for_capacity(100)
+        bloom.add(hash_keys(pd.Series(['A', 'B'])))
+        bloom.save(str(tmp_path))
+        
+        loaded = BloomFilter.load(str(tmp_path))
+        assert np.array_equal(loaded.bits, bloom.bits)
+        assert loaded.count == 2
+
+
+class TestKeyIndex:
+    """Test within-file and cross-load deduplication."""
+    
+    def test_drops_in_file_duplicates(self, tmp_path):
+        """Repeated keys within one file keep only the first row."""
+        df = pd.DataFrame({'order_id': ['O1', 'O2', 'O2', 'O3'], 'amount': [1, 2, 2, 3]})
+        
+        index = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path))
+        new_df, stats = index.filter_new(df)
+        
+        assert new_df['order_id'].tolist() == ['O1', 'O2', 'O3']
+        assert stats['in_file_duplicates'] == 1
+        assert stats['cross_load_duplicates'] == 0
+    
+    def test_drops_keys_from_earlier_loads(self, tmp_path):
+        """Keys committed by an earlier load are dropped on the next one."""
+        first = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path))
+        first.filter_new(pd.DataFrame({'order_id': ['O1', 'O2']}))
+        first.commit()
+        first.close()
+        
+        second = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path))
+        new_df, stats = second.filter_new(pd.DataFrame({'order_id': ['O2', 'O3']}))
+        
+        assert new_df['order_id'].tolist() == ['O3']
+        assert stats['cross_load_duplicates'] == 1
+    
+    def test_uncommitted_load_is_not_remembered(self, tmp_path):
+        """A load that never commits (e.g. failed upload) can be retried."""
+        failed = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path))
+        failed.filter_new(pd.DataFrame({'order_id': ['O1']}))
+        failed.close()
+        
+        retry = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), attempt=2)
+        new_df, _ = retry.filter_new(pd.DataFrame({'order_id': ['O1']}))
+        
+        assert len(new_df) == 1
+    
+    def test_parallel_partitions_claim_keys(self, tmp_path):
+        """A key claimed by a partition still loading is a duplicate for the others."""
+        first = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-1')
+        second = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-2')
+        first.filter_new(pd.DataFrame({'order_id': ['O1', 'O2']}))
+        
+        new_df, stats = second.filter_new(pd.DataFrame({'order_id': ['O2', 'O3']}))
+        first.commit()
+        second.commit()
+        
+        assert new_df['order_id'].tolist() == ['O3']
+        assert stats['cross_load_duplicates'] == 1
+        later = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path))
+        assert later.filter_new(pd.DataFrame({'order_id': ['O1', 'O3']}))[1]['output_rows'] == 0
+    
+    def test_aborted_partition_releases_claims(self, tmp_path):
+        """Keys of a failed partition can be loaded by another one."""
+        failed = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-1')
+        failed.filter_new(pd.DataFrame({'order_id': ['O1']}))
+        failed.abort()
+        
+        other = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-2')
+        assert len(other.filter_new(pd.DataFrame({'order_id': ['O1']}))[0]) == 1
+    
+    def test_partition_retry_ignores_own_stale_claims(self, tmp_path):
+        """A retried partition reloads keys claimed by its crashed attempt."""
+        crashed = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-1')
+        crashed.filter_new(pd.DataFrame({'order_id': ['O1']}))
+        crashed.close()
+        
+        retry = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-1', attempt=2)
+        other = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-2')
+        
+        assert len(retry.filter_new(pd.DataFrame({'order_id': ['O1']}))[0]) == 1
+        assert len(other.filter_new(pd.DataFrame({'order_id': ['O1']}))[0]) == 0
+    
+    def test_same_partition_loaded_concurrently(self, tmp_path):
+        """Another live load of the same input, e.g. daily and micro-batch ingests of one file, holds its claims."""
+        daily = KeyIndex('raw.events', 'event_id', state_dir=str(tmp_path), partition='events/a.csv')
+        microbatch = KeyIndex('raw.events', 'event_id', state_dir=str(tmp_path), partition='events/a.csv')
+        daily.filter_new(pd.DataFrame({'event_id': ['E1', 'E2']}))
+        
+        new_df, stats = microbatch.filter_new(pd.DataFrame({'event_id': ['E1', 'E2', 'E3']}))
+        
+        assert new_df['event_id'].tolist() == ['E3']
+        assert stats['cross_load_duplicates'] == 2
+    
+    def test_claims_table_without_attempts(self, tmp_path):
+        """A key store created before claims recorded their attempt is upgraded in place."""
+        directory = tmp_path / 'orders'
+        directory.mkdir()
+        conn = sqlite3.connect(directory / 'keys.sqlite')
+        conn.execute("""
+            CREATE TABLE claims (key TEXT PRIMARY KEY, partition TEXT, token TEXT, claimed_at REAL) WITHOUT ROWID
+        """)
+        conn.execute("INSERT INTO claims VALUES ('O1', 'part-1', 'old', ?)", (time.time(),))
+        conn.commit()
+        conn.close()
+        
+        retry = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-1', attempt=2)
+        other = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path), partition='part-2')
+        
+        assert len(retry.filter_new(pd.DataFrame({'order_id': ['O1']}))[0]) == 1
+        assert len(other.filter_new(pd.DataFrame({'order_id': ['O1']}))[0]) == 0
+    
+    def test_compact_dtypes_match_object_keys(self, tmp_path):
+        """Keys read as Arrow-backed strings dedup against keys committed as objects."""
+        index = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path))
+        index.filter_new(pd.DataFrame({'order_id': ['O1', 'O2']}))
+        index.commit()
+        
+        compact = pd.DataFrame({'order_id': ['O2', 'O3', None]}).astype('string[pyarrow]')
+        new_df, stats = index.filter_new(compact)
+        
+        assert new_df['order_id'].tolist() == ['O3', pd.NA]
+        assert stats['cross_load_duplicates'] == 1
+    
+    def test_null_keys_are_kept(self, tmp_path):
+        """Rows without a key are passed through for not_null tests to catch."""
+        df = pd.DataFrame({'order_id': [None, None, 'O1']})
+        
+        new_df, _ = KeyIndex('raw.orders', 'order_id', state_dir=str(tmp_path)).filter_new(df)
+        assert len(new_df) == 3
+    
+    def test_bloom_grows_past_capacity(self, tmp_path):
+        """The filter is rebuilt from the exact store when it fills up."""
+        index = KeyIndex('raw.events', 'event_id', state_dir=str(tmp_path), capacity=10)
+        index.filter_new(pd.DataFrame({'event_id': [f"E{i}" for i in range(100)]}))
+        index.commit()
+        
+        assert index.bloom.capacity >= 100
+        new_df, _ = index.filter_new(pd.DataFrame({'event_id': ['E5', 'E500']}))
+        assert new_df['event_id'].tolist() == ['E500']
+
+
+def test_primary_keys_from_raw_schema():
+    """Dedup keys come from raw_schema.json."""
+    assert primary_key('raw.customers') == 'customer_id'
+    assert primary_key('orders') == 'order_id'
+    assert primary_key('raw.events') == 'event_id'
+
+
+def test_read_dtypes_from_raw_schema():
+    """Low-cardinality columns are categoricals, all other columns Arrow-backed strings."""
+    dtypes = read_dtypes('raw.events')
+    
+    assert dtypes['event_type'] == 'category'
+    assert dtypes['session_id'] == 'category'
+    assert dtypes['event_id'] == 'string[pyarrow]'
+    assert dtypes['event_timestamp'] == 'string[pyarrow]'
+    assert set(dtypes) == {'event_id', 'customer_id', 'event_type', 'event_timestamp', 'page_url',
+                           'product_id', 'session_id', 'device_type', '_loaded_at'}
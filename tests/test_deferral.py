@@ -0,0 +1,130 @@
+"""
+Unit tests for the submit-and-poll primitives behind the deferrable operators,
+using the local DuckDB stand-in for asynchronous warehouse queries.
+"""
+
+import os
+import signal
+import time
+
+import pytest
+
+from ecommerce_dq import deferral
+from ecommerce_dq.deferral import (
+    ERROR,
+    RUNNING,
+    SUCCESS,
+    LocalQueryClient,
+    check_queries,
+    command_status,
+    launch_command,
+    query_client,
+    read_output,
+)
+
+
+def wait_for(poll, timeout=30.0):
+    """Poll until `poll()` returns something other than RUNNING."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        result = poll()
+        if result[0] != RUNNING:
+            return result
+        time.sleep(0.05)
+    raise AssertionError('timed out waiting for completion')
+
+
+@pytest.fixture
+def local_client(tmp_path, monkeypatch):
+    """Local stand-in client on a fresh DuckDB file."""
+    monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+    monkeypatch.setenv('DQ_DUCKDB_PATH', str(tmp_path / 'warehouse.duckdb'))
+    monkeypatch.setattr(deferral, 'DEFERRED_STATE_DIR', str(tmp_path / 'deferred'))
+    return query_client()
+
+
+class TestLocalQueryClient:
+    """Test the detached-process stand-in for asynchronous queries."""
+    
+    def test_duckdb_backend_uses_stand_in(self, local_client):
+        """The DuckDB backend gets the local stand-in."""
+        assert isinstance(local_client, LocalQueryClient)
+    
+    def test_query_runs_detached(self, local_client):
+        """A submitted query completes in the background and its first row is fetched by ID."""
+        query_id = local_client.submit("SELECT 42 AS answer, 'ok' AS status")
+        
+        assert wait_for(lambda: local_client.status(query_id)) == (SUCCESS, None)
+        assert local_client.fetch_first(query_id) == (['answer', 'status'], (42, 'ok'))
+    
+    def test_failed_query(self, local_client):
+        """Errors are reported through the status, not raised."""
+        query_id = local_client.submit("SELECT * FROM missing_table")
+        
+        state, message = wait_for(lambda: local_client.status(query_id))
+        assert state == ERROR
+        assert 'missing_table' in message
+
+
+class TestCheckQueries:
+    """Test one polling round over named queries."""
+    
+    def test_all_finished(self, local_client):
+        """The event succeeds once every query is done and records completion times."""
+        query_ids = {'a': local_client.submit("SELECT 1"), 'b': local_client.submit("SELECT 2")}
+        finished = {}
+        
+        event = wait_for(lambda: (check_queries(local_client, query_ids, finished)['status'],))
+        
+        assert event == (SUCCESS,)
+        assert set(finished) == {'a', 'b'}
+    
+    def test_first_failure_wins(self, local_client):
+        """A failing query fails the event with its name."""
+        query_ids = {'bad': local_client.submit("SELECT * FROM missing_table")}
+        
+        wait_for(lambda: local_client.status(query_ids['bad']))
+        event = check_queries(local_client, query_ids, {})
+        
+        assert event['status'] == ERROR
+        assert event['query'] == 'bad'
+
+
+class TestDetachedCommands:
+    """Test detached command launch and completion."""
+    
+    def test_output_and_exit_code(self, tmp_path):
+        """Output and a zero exit code are recorded in the run directory."""
+        run_dir = str(tmp_path / 'run')
+        launch_command("echo hello", run_dir)
+        
+        assert wait_for(lambda: command_status(run_dir)) == (SUCCESS, 0)
+        assert read_output(run_dir).strip() == 'hello'
+    
+    def test_failure(self, tmp_path):
+        """A non-zero exit code is an error."""
+        run_dir = str(tmp_path / 'run')
+        launch_command("exit 3", run_dir)
+        
+        assert wait_for(lambda: command_status(run_dir)) == (ERROR, 3)
+    
+    def test_heartbeat_keeps_long_command_running(self, tmp_path):
+        """A command outliving the heartbeat timeout still runs while it beats."""
+        run_dir = str(tmp_path / 'run')
+        launch_command("sleep 2", run_dir, heartbeat_seconds=0.1)
+        time.sleep(1.5)
+        
+        assert command_status(run_dir, heartbeat_timeout=1) == (RUNNING, None)
+        assert wait_for(lambda: command_status(run_dir, heartbeat_timeout=1)) == (SUCCESS, 0)
+    
+    def test_killed_command_is_an_error(self, tmp_path):
+        """A command killed before writing its exit code fails once its heartbeat goes stale."""
+        run_dir = str(tmp_path / 'run')
+        launch_command("sleep 30", run_dir, heartbeat_seconds=0.1)
+        assert command_status(run_dir, heartbeat_timeout=1) == (RUNNING, None)
+        
+        with open(os.path.join(run_dir, 'pid')) as f:
+            os.killpg(int(f.read()), signal.SIGKILL)
+        
+        assert wait_for(lambda: command_status(run_dir, heartbeat_timeout=1)) == (ERROR, None)
+        assert not os.path.exists(os.path.join(run_dir, 'exit_code'))
@@ -0,0 +1,137 @@
+"""
+Unit tests for the versioned Arrow feature cache, against the local DuckDB
+backend.
+"""
+
+import os
+from datetime import date
+
+import pyarrow as pa
+import pytest
+
+from ecommerce_dq.feature_cache import HASH_COLUMN, load_manifest, open_cached, refresh_cache, version_path
+from ecommerce_dq.warehouse import get_hook, init_schemas
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+    monkeypatch.setenv('DQ_DUCKDB_PATH', str(tmp_path / 'warehouse.duckdb'))
+    init_schemas()
+    hook = get_hook()
+    hook.run("""
+        CREATE TABLE mart.customer_features AS
+        SELECT * FROM (VALUES
+            ('C1', 3, 120.5, CURRENT_TIMESTAMP),
+            ('C2', 1, NULL, CURRENT_TIMESTAMP),
+            ('C3', 0, 0.0, CURRENT_TIMESTAMP)
+        ) t(customer_id, total_orders, total_spend, _calculated_at)
+    """)
+    return hook
+
+
+def rebuild(hook, sql: str):
+    """Change the mart and restamp every row, as a full dbt rebuild does."""
+    hook.run(f"{sql}; UPDATE mart.customer_features SET _calculated_at = CURRENT_TIMESTAMP + INTERVAL 1 HOUR")
+
+
+class TestRefreshCache:
+    """Test versioning, incremental refreshes and retention."""
+    
+    def test_first_refresh_is_full(self, tmp_path, warehouse):
+        summary = refresh_cache('customer_features', cache_dir=str(tmp_path / 'cache'))
+        
+        assert summary['refresh'] == 'full'
+        assert summary['version'] == 1
+        assert open_cached(cache_dir=str(tmp_path / 'cache')).column('customer_id').to_pylist() == ['C1', 'C2', 'C3']
+    
+    def test_rebuild_without_changes_keeps_version(self, tmp_path, warehouse):
+        """A new _calculated_at alone is not a change."""
+        cache_dir = str(tmp_path / 'cache')
+        refresh_cache('customer_features', cache_dir=cache_dir)
+        rebuild(warehouse, "SELECT 1")
+        
+        summary = refresh_cache('customer_features', cache_dir=cache_dir)
+        assert (summary['version'], summary['changed'], summary['deleted']) == (1, 0, 0)
+    
+    def test_incremental_refresh_applies_only_changed_rows(self, tmp_path, warehouse, monkeypatch):
+        """Changed, new and deleted keys are applied on top of the previous version."""
+        cache_dir = str(tmp_path / 'cache')
+        refresh_cache('customer_features', cache_dir=cache_dir)
+        rebuild(warehouse, """
+            UPDATE mart.customer_features SET total_spend = 10.0 WHERE customer_id = 'C2';
+            DELETE FROM mart.customer_features WHERE customer_id = 'C3';
+            INSERT INTO mart.customer_features VALUES ('C4', 2, 30.0, CURRENT_TIMESTAMP)
+        """)
+        monkeypatch.setattr('ecommerce_dq.feature_cache.FULL_REFRESH_SHARE', 1.0)
+        
+        summary = refresh_cache('customer_features', cache_dir=cache_dir)
+        
+        assert summary['refresh'] == 'incremental'
+        assert (summary['version'], summary['changed'], summary['deleted']) == (2, 2, 1)
+        cached = open_cached(cache_dir=cache_dir, columns=['customer_id', 'total_spend'])
+        assert cached.to_pylist() == [
+            {'customer_id': 'C1', 'total_spend': 120.5},
+            {'customer_id': 'C2', 'total_spend': 10.0},
+            {'customer_id': 'C4', 'total_spend': 30.0},
+        ]
+        # Earlier versions stay readable
+        assert open_cached(version=1, cache_dir=cache_dir).num_rows == 3
+    
+    def test_retention_evicts_old_versions(self, tmp_path, warehouse):
+        cache_dir = str(tmp_path / 'cache')
+        for spend in (1, 2, 3):
+            rebuild(warehouse, f"UPDATE mart.customer_features SET total_spend = {spend} WHERE customer_id = 'C1'")
+            summary = refresh_cache('customer_features', cache_dir=cache_dir, keep=2)
+        
+        assert summary['evicted'] == [1]
+        assert [v['version'] for v in load_manifest('customer_features', cache_dir)['versions']] == [2, 3]
+        assert not os.path.exists(version_path('customer_features', 1, cache_dir))
+    
+    def test_time_relative_columns_are_not_changes(self, tmp_path, warehouse):
+        """Days-since columns advance every day without making a row changed; reads derive them from their anchors."""
+        cache_dir = str(tmp_path / 'cache')
+        warehouse.run("""
+            CREATE OR REPLACE TABLE mart.customer_features AS
+            SELECT * FROM (VALUES
+                ('C1', TIMESTAMP '2025-01-01 10:00:00', TIMESTAMP '2024-06-01 00:00:00', 5, 5),
+                ('C2', NULL, TIMESTAMP '2024-12-25 08:00:00', NULL, 12)
+            ) t(customer_id, last_order_date, signup_timestamp, days_since_last_order, recency_days)
+        """)
+        refresh_cache('customer_features', cache_dir=cache_dir)
+        warehouse.run("UPDATE mart.customer_features SET days_since_last_order = days_since_last_order + 1, "
+                      "recency_days = recency_days + 1")
+        
+        summary = refresh_cache('customer_features', cache_dir=cache_dir)
+        
+        assert (summary['version'], summary['changed']) == (1, 0)
+        cached = open_cached(cache_dir=cache_dir, columns=['days_since_last_order', 'recency_days'],
+                             as_of=date(2025, 1, 11))
+        assert cached.to_pylist() == [
+            {'days_since_last_order': 10, 'recency_days': 10},
+            {'days_since_last_order': None, 'recency_days': 17},
+        ]
+    
+    def test_unknown_table(self, tmp_path, warehouse):
+        with pytest.raises(ValueError):
+            refresh_cache('orders', cache_dir=str(tmp_path / 'cache'))
+
+
+class TestOpenCached:
+    """Test the consumer side."""
+    
+    def test_memory_mapped_without_row_hash(self, tmp_path, warehouse):
+        cache_dir = str(tmp_path / 'cache')
+        refresh_cache('customer_features', cache_dir=cache_dir)
+        
+        allocated = pa.total_allocated_bytes()
+        cached = open_cached(cache_dir=cache_dir)
+        
+        assert HASH_COLUMN not in cached.column_names
+        assert cached.num_rows == 3
+        # Zero-copy: the buffers live in the mapped file, not in Arrow's memory pool
+        assert pa.total_allocated_bytes() == allocated
+    
+    def test_missing_cache(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            open_cached(cache_dir=str(tmp_path / 'cache'))
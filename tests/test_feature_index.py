@@ -0,0 +1,162 @@
+"""
+Unit tests for the point-lookup feature index, against the local DuckDB
+backend.
+"""
+
+import math
+import os
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from ecommerce_dq.feature_cache import load_manifest, refresh_cache
+from ecommerce_dq.feature_index import FeatureLookup, build_index, index_dir, key_hashes
+from ecommerce_dq.warehouse import get_hook, init_schemas
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+    monkeypatch.setenv('DQ_DUCKDB_PATH', str(tmp_path / 'warehouse.duckdb'))
+    init_schemas()
+    get_hook().run("""
+        CREATE TABLE mart.customer_features AS
+        SELECT * FROM (VALUES
+            ('C1', 'c1@example.com', 3, 120.50::DECIMAL(38, 2), CURRENT_TIMESTAMP),
+            ('C2', 'c2@example.com', 1, NULL, CURRENT_TIMESTAMP),
+            ('C10', 'c10@example.com', 0, 0.00::DECIMAL(38, 2), CURRENT_TIMESTAMP)
+        ) t(customer_id, email, total_orders, total_spend, _calculated_at)
+    """)
+    path = str(tmp_path / 'cache')
+    summary = refresh_cache('customer_features', cache_dir=path)
+    build_index('customer_features', summary['version'], cache_dir=path)
+    return path
+
+
+class TestBuildIndex:
+    """Test what the index holds."""
+    
+    def test_numeric_columns_only(self, cache_dir):
+        """Keys, PII and bookkeeping columns are not features."""
+        meta = build_index(cache_dir=cache_dir)
+        
+        assert meta['columns'] == ['total_orders', 'total_spend']
+        assert meta['rows'] == 3
+        assert os.path.isdir(index_dir('customer_features', 1, cache_dir))
+    
+    def test_key_hashes_are_deterministic(self):
+        keys = np.array([b'C1', b'C2', b'CUST000000001'])
+        
+        assert np.array_equal(key_hashes(keys), key_hashes(keys.astype('S16')))
+        assert len(set(key_hashes(keys).tolist())) == 3
+        assert not np.array_equal(key_hashes(keys, seed=0), key_hashes(keys, seed=1))
+
+
+class TestFeatureLookup:
+    """Test batch and single-key reads."""
+    
+    def test_batch_get_in_request_order(self, cache_dir):
+        lookup = FeatureLookup(cache_dir=cache_dir)
+        
+        features, found = lookup.batch_get(['C10', 'C1', 'C2'])
+        
+        assert features.dtype == np.float32
+        assert found.tolist() == [True, True, True]
+        assert features[:, 0].tolist() == [0.0, 3.0, 1.0]
+        assert features[1, 1] == pytest.approx(120.5)
+        # NULL features read as NaN
+        assert math.isnan(features[2, 1])
+    
+    def test_unknown_ids(self, cache_dir):
+        """Unknown ids, including ones a truncation would turn into a known key, are not found."""
+        lookup = FeatureLookup(cache_dir=cache_dir)
+        
+        features, found = lookup.batch_get(['C3', 'C1', 'C100', 'C1x', 'Ç1'])
+        
+        assert found.tolist() == [False, True, False, False, False]
+        assert np.isnan(features[~found]).all()
+        assert lookup.batch_get([])[0].shape == (0, 2)
+    
+    def test_column_selection(self, cache_dir):
+        lookup = FeatureLookup(cache_dir=cache_dir)
+        
+        features, _ = lookup.batch_get(['C1'], columns=['total_spend'])
+        
+        assert features.shape == (1, 1)
+        assert lookup.get('C1', columns=['total_orders']) == {'total_orders': 3.0}
+    
+    def test_get_with_lru(self, cache_dir):
+        lookup = FeatureLookup(cache_dir=cache_dir, lru_size=1)
+        
+        assert lookup.get('C1') == {'total_orders': 3.0, 'total_spend': pytest.approx(120.5)}
+        assert lookup.get('C2')['total_orders'] == 1.0
+        assert lookup.get('C3') is None
+        # The least recently used id was evicted
+        assert list(lookup._lru) == ['C2']
+    
+    def test_reload_switches_to_new_version(self, cache_dir):
+        """Readers pick up the index of a new cache version, and drop what they cached."""
+        lookup = FeatureLookup(cache_dir=cache_dir)
+        lookup.get('C1')
+        get_hook().run("UPDATE mart.customer_features SET total_orders = 4 WHERE customer_id = 'C1'")
+        summary = refresh_cache('customer_features', cache_dir=cache_dir)
+        build_index('customer_features', summary['version'], cache_dir=cache_dir)
+        
+        assert lookup.reload()
+        assert lookup.version == 2
+        assert lookup.get('C1')['total_orders'] == 4.0
+        assert not lookup.reload()
+    
+    def test_reload_keeps_serving_without_index(self, cache_dir):
+        """A current version whose index is missing does not take the loaded one down."""
+        lookup = FeatureLookup(cache_dir=cache_dir)
+        get_hook().run("UPDATE mart.customer_features SET total_orders = 4 WHERE customer_id = 'C1'")
+        refresh_cache('customer_features', cache_dir=cache_dir)
+        
+        assert not lookup.reload()
+        assert lookup.version == 1
+        assert lookup.get('C1')['total_orders'] == 3.0
+    
+    def test_version_published_after_its_index(self, cache_dir):
+        """A failed index build leaves the previous version current."""
+        def fail(table, version, cache_dir):
+            raise OSError('disk full')
+        
+        get_hook().run("UPDATE mart.customer_features SET total_orders = 4 WHERE customer_id = 'C1'")
+        with pytest.raises(OSError):
+            refresh_cache('customer_features', cache_dir=cache_dir, prepare=fail)
+        assert load_manifest('customer_features', cache_dir)['current'] == 1
+        
+        summary = refresh_cache('customer_features', cache_dir=cache_dir, prepare=build_index)
+        assert summary['version'] == 2
+        assert FeatureLookup(cache_dir=cache_dir).get('C1')['total_orders'] == 4.0
+    
+    def test_eviction_removes_index(self, cache_dir):
+        for orders in (5, 6):
+            get_hook().run(f"UPDATE mart.customer_features SET total_orders = {orders} WHERE customer_id = 'C1'")
+            summary = refresh_cache('customer_features', cache_dir=cache_dir, keep=1)
+            build_index('customer_features', summary['version'], cache_dir=cache_dir)
+        
+        assert not os.path.exists(index_dir('customer_features', 1, cache_dir))
+        assert os.path.isdir(index_dir('customer_features', 3, cache_dir))
+    
+    def test_missing_cache(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            FeatureLookup(cache_dir=str(tmp_path / 'cache'))
+    
+    def test_time_relative_features_as_of_today(self, cache_dir):
+        """Days-since features are returned as of the lookup, not as of the index build."""
+        anchor = datetime.now(timezone.utc).date() - timedelta(days=3)
+        get_hook().run(f"""
+            CREATE OR REPLACE TABLE mart.customer_features AS
+            SELECT 'C1' AS customer_id, TIMESTAMP '{anchor} 12:00:00' AS last_order_date,
+                   TIMESTAMP '2024-01-01 00:00:00' AS signup_timestamp, 0 AS days_since_last_order, 0 AS recency_days
+        """)
+        summary = refresh_cache('customer_features', cache_dir=cache_dir)
+        meta = build_index('customer_features', summary['version'], cache_dir=cache_dir)
+        lookup = FeatureLookup(cache_dir=cache_dir)
+        
+        assert meta['time_relative'] == ['days_since_last_order', 'recency_days']
+        assert lookup.get('C1') == {'days_since_last_order': 3.0, 'recency_days': 3.0}
+        assert lookup.batch_get(['C1'], columns=['recency_days'])[0].tolist() == [[3.0]]
@@ -0,0 +1,178 @@
+"""
+Unit tests for pipeline instrumentation.
+"""
+
+import json
+import socket
+
+import duckdb
+import pytest
+
+from ecommerce_dq.instrumentation import (
+    COUNTER,
+    FileExporter,
+    Instrumentation,
+    StatsDExporter,
+    emit_dbt_run_results,
+    exporters_from_env,
+)
+
+
+def read_records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def make_instrumentation(tmp_path, **tags):
+    path = tmp_path / 'metrics.jsonl'
+    return Instrumentation([FileExporter(str(path))], **tags), path
+
+
+class TestSpans:
+    """Test span timing and derived metrics."""
+    
+    def test_span_records_attributes_and_metrics(self, tmp_path):
+        """A span exports itself plus duration, rows, bytes and rows/sec metrics."""
+        metrics, path = make_instrumentation(tmp_path, task='ingest')
+        
+        with metrics.span('ingest.read', table='orders', chunk=0) as span:
+            span['rows'] = 1000
+            span['bytes'] = 4096
+        
+        records = read_records(path)
+        spans = [r for r in records if r['kind'] == 'span']
+        assert len(spans) == 1
+        attributes = spans[0]['attributes']
+        assert attributes['status'] == 'ok'
+        assert attributes['rows'] == 1000
+        assert attributes['rows_per_sec'] > 0
+        assert attributes['peak_rss_mb'] > 0
+        
+        names = {r['name'] for r in records if r['kind'] == 'metric'}
+        assert names == {
+            'ingest.read.duration_ms', 'ingest.read.rows', 'ingest.read.bytes',
+            'ingest.read.rows_per_sec', 'ingest.read.peak_rss_mb',
+        }
+    
+    def test_metric_tags_exclude_high_cardinality(self, tmp_path):
+        """Chunk numbers and query IDs stay on the span, not on metric tags."""
+        metrics, path = make_instrumentation(tmp_path, task='ingest')
+        
+        with metrics.span('ingest.upload', table='orders', chunk=3) as span:
+            span['query_id'] = 'abc-123'
+        
+        metric = next(r for r in read_records(path) if r['kind'] == 'metric')
+        assert metric['tags'] == {'task': 'ingest', 'table': 'orders', 'status': 'ok'}
+    
+    def test_span_marks_errors(self, tmp_path):
+        """A failing block is exported with status=error and the error propagates."""
+        metrics, path = make_instrumentation(tmp_path)
+        
+        with pytest.raises(RuntimeError):
+            with metrics.span('validate_quality'):
+                raise RuntimeError('warehouse down')
+        
+        span = next(r for r in read_records(path) if r['kind'] == 'span')
+        assert span['attributes']['status'] == 'error'
+    
+    def test_query_returns_first_row(self, tmp_path):
+        """query() runs the SQL on the cursor and times it under the check name."""
+        metrics, path = make_instrumentation(tmp_path)
+        cursor = duckdb.connect().cursor()
+        
+        assert metrics.query(cursor, "SELECT 41 + 1, 'x'", 'answer') == (42, 'x')
+        
+        span = next(r for r in read_records(path) if r['kind'] == 'span')
+        assert span['name'] == 'query'
+        assert span['attributes']['check'] == 'answer'
+        assert 'query_id' in span['attributes']
+
+
+class TestExporters:
+    """Test exporter formats and configuration."""
+    
+    def test_statsd_line_format(self):
+        """Lines use DogStatsD tag syntax with sorted tags."""
+        line = StatsDExporter.format_line('ecommerce_dq', 'ingest.read.rows', 10, COUNTER,
+                                          {'table': 'orders', 'task': 'ingest'})
+        assert line == 'ecommerce_dq.ingest.read.rows:10|c|#table:orders,task:ingest'
+    
+    def test_statsd_sends_udp(self):
+        """Metrics arrive as UDP datagrams."""
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.bind(('127.0.0.1', 0))
+        receiver.settimeout(2)
+        exporter = StatsDExporter('127.0.0.1', receiver.getsockname()[1])
+        
+        Instrumentation([exporter], task='alert_on_issues').metric('alert.issues', 3)
+        
+        assert receiver.recv(1024).decode() == 'ecommerce_dq.alert.issues:3|g|#task:alert_on_issues'
+        receiver.close()
+    
+    def test_exporters_from_env(self, tmp_path, monkeypatch):
+        """DQ_METRICS_EXPORTERS selects exporters; unknown names are rejected."""
+        monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'statsd,file')
+        monkeypatch.setenv('DQ_METRICS_FILE', str(tmp_path / 'm.jsonl'))
+        exporters = exporters_from_env()
+        assert [type(e) for e in exporters] == [StatsDExporter, FileExporter]
+        
+        monkeypatch.setenv('DQ_METRICS_EXPORTERS', '')
+        assert exporters_from_env() == []
+        
+        monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'carrier-pigeon')
+        with pytest.raises(ValueError):
+            exporters_from_env()
+
+
+class TestDbtRunResults:
+    """Test export of dbt run_results.json."""
+    
+    RUN_RESULTS = {
+        'metadata': {'generated_at': '2025-10-01T00:01:00.000000Z'},
+        'elapsed_time': 60.0,
+        'results': [
+            {
+                'unique_id': 'model.ecommerce_dq.stg_orders',
+                'status': 'success',
+                'execution_time': 2.5,
+                'timing': [{'name': 'compile', 'started_at': '2025-10-01T00:00:10Z',
+                            'completed_at': '2025-10-01T00:00:11Z'}],
+                'adapter_response': {'rows_affected': 500, 'query_id': '01b2-q1'},
+            },
+            {
+                'unique_id': 'test.ecommerce_dq.not_null_stg_orders_order_id',
+                'status': 'pass',
+                'execution_time': 0.5,
+                'timing': [],
+                'adapter_response': {},
+            },
+        ],
+    }
+    
+    def write_run_results(self, tmp_path):
+        path = tmp_path / 'run_results.json'
+        path.write_text(json.dumps(self.RUN_RESULTS))
+        return str(path)
+    
+    def test_exports_node_spans(self, tmp_path):
+        """Each node becomes a span carrying status, rows and query ID."""
+        metrics, path = make_instrumentation(tmp_path, task='dbt_run_staging')
+        
+        assert emit_dbt_run_results(metrics, self.write_run_results(tmp_path)) == 2
+        
+        spans = [r for r in read_records(path) if r['kind'] == 'span']
+        assert [s['name'] for s in spans] == ['dbt.node', 'dbt.node', 'dbt.invocation']
+        model = spans[0]['attributes']
+        assert model['query_id'] == '01b2-q1'
+        assert model['rows'] == 500
+        assert model['duration_ms'] == 2500
+        assert model['peak_rss_mb'] is None
+    
+    def test_ignores_stale_or_missing_results(self, tmp_path):
+        """Results older than the task start, or no file at all, export nothing."""
+        metrics, path = make_instrumentation(tmp_path)
+        run_results_path = self.write_run_results(tmp_path)
+        
+        assert emit_dbt_run_results(metrics, run_results_path, not_before=4102444800) == 0
+        assert emit_dbt_run_results(metrics, str(tmp_path / 'missing.json')) == 0
+        assert not path.exists()
@@ -0,0 +1,105 @@
+"""
+Unit tests for referential integrity checks.
+"""
+
+import sqlite3
+
+import pandas as pd
+
+from ecommerce_dq.integrity import ParentKeySet, check_orphans, merge_orphan_reports
+from ecommerce_dq.schema import foreign_keys, referenced_columns
+from ecommerce_dq.validation import orphan_check_sql
+
+
+def make_keyset(tmp_path, keys):
+    keyset = ParentKeySet('raw.customers', 'customer_id', state_dir=str(tmp_path))
+    keyset.add(pd.Series(keys))
+    return keyset
+
+
+class TestParentKeySet:
+    """Test the sorted hash key set."""
+    
+    def test_contains(self, tmp_path):
+        """Known keys are found, unknown keys are not."""
+        keyset = make_keyset(tmp_path, ['CUST000001', 'CUST000002', 'CUST000003'])
+        
+        mask = keyset.contains(pd.Series(['CUST000002', 'CUST999999', 'CUST000003']))
+        assert mask.tolist() == [True, False, True]
+    
+    def test_add_merges_and_ignores_nulls(self, tmp_path):
+        """Adding keys keeps the set unique and skips nulls."""
+        keyset = make_keyset(tmp_path, ['C1', 'C2'])
+        keyset.add(pd.Series(['C2', 'C3', None]))
+        
+        assert len(keyset) == 3
+    
+    def test_save_and_load(self, tmp_path):
+        """A saved key set reloads with the same membership."""
+        make_keyset(tmp_path, ['C1', 'C2']).save()
+        
+        loaded = ParentKeySet.load('customers', 'customer_id', state_dir=str(tmp_path))
+        assert loaded.contains(pd.Series(['C1', 'C9'])).tolist() == [True, False]
+    
+    def test_save_merges_parallel_writers(self, tmp_path):
+        """Key sets saved by parallel partitions of the parent are unioned, not overwritten."""
+        make_keyset(tmp_path, ['C1']).save()
+        make_keyset(tmp_path, ['C2']).save()
+        
+        keyset = ParentKeySet.load('raw.customers', 'customer_id', state_dir=str(tmp_path))
+        assert keyset.contains(pd.Series(['C1', 'C2'])).all()
+    
+    def test_load_missing(self, tmp_path):
+        """Loading before the parent was ingested returns None."""
+        assert ParentKeySet.load('customers', 'customer_id', state_dir=str(tmp_path)) is None
+
+
+class TestCheckOrphans:
+    """Test chunked orphan probing."""
+    
+    def test_orphan_report(self, tmp_path):
+        """Orphans are counted across chunks; nulls are reported separately."""
+        keyset = make_keyset(tmp_path, ['C1', 'C2'])
+        orders = pd.DataFrame({'customer_id': ['C1', 'C9', None, 'C2', 'C8', 'C9']})
+        
+        report = check_orphans(orders, 'customer_id', keyset, chunk_size=2)
+        
+        assert report['checked_rows'] == 6
+        assert report['null_keys'] == 1
+        assert report['orphan_rows'] == 3
+        assert report['orphan_sample'] == ['C9', 'C8']
+    
+    def test_pushdown_sql_matches_probe(self, tmp_path):
+        """The pushdown SQL finds the same orphans as the in-memory probe."""
+        customers = pd.DataFrame({'customer_id': ['C1', 'C2']})
+        orders = pd.DataFrame({'customer_id': ['C1', 'C9', None, 'C2', 'C8', 'C9']})
+        
+        conn = sqlite3.connect(':memory:')
+        customers.to_sql('customers', conn, index=False)
+        orders.to_sql('orders', conn, index=False)
+        orphan_rows, orphan_keys = conn.execute(
+            orphan_check_sql('orders', 'customer_id', 'customers', 'customer_id')
+        ).fetchone()
+        
+        report = check_orphans(orders, 'customer_id', make_keyset(tmp_path, customers['customer_id']))
+        assert orphan_rows == report['orphan_rows'] == 3
+        assert orphan_keys == 2
+    
+    def test_merge_reports_across_ingest_chunks(self, tmp_path):
+        """Per-chunk reports add up to the report of the whole file."""
+        keyset = make_keyset(tmp_path, ['C1', 'C2'])
+        orders = pd.DataFrame({'customer_id': ['C1', 'C9', None, 'C2', 'C8', 'C9']})
+        
+        total = None
+        for start in (0, 3):
+            total = merge_orphan_reports(total, check_orphans(orders.iloc[start:start + 3], 'customer_id', keyset))
+        
+        assert total == check_orphans(orders, 'customer_id', keyset)
+
+
+def test_foreign_keys_from_raw_schema():
+    """Foreign keys and their parents come from raw_schema.json."""
+    assert foreign_keys('raw.orders') == {'customer_id': ('customers', 'customer_id')}
+    assert foreign_keys('raw.events') == {'customer_id': ('customers', 'customer_id')}
+    assert referenced_columns('raw.customers') == ['customer_id']
+    assert referenced_columns('raw.orders') == []
@@ -0,0 +1,187 @@
+"""
+Unit tests for micro-batch event ingestion: file discovery, batch bookkeeping
+and lag reporting.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from ecommerce_dq import microbatch, tasks
+from ecommerce_dq.backfill import day_models_selector
+from ecommerce_dq.microbatch import ingest_event_batch, lag_report, new_files
+from ecommerce_dq.partitions import byte_ranges, partition_id
+from ecommerce_dq.table_metadata import record_load
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The daily ingest of a landed file, with the micro-batch ingest of the same file running
+# while the daily load holds its key claims but has not written its rows yet. Both share
+# one DuckDB connection, standing in for a warehouse that takes concurrent writers.
+OVERLAP_SCRIPT = """
+import sys
+
+import duckdb
+
+from ecommerce_dq import tasks, warehouse
+from ecommerce_dq.partitions import discover_partitions
+
+landed, raw_dir, database = sys.argv[1:]
+conn = duckdb.connect(database)
+conn.execute('CREATE SCHEMA raw')
+
+
+class SharedConnection:
+    def __init__(self, conn):
+        self._conn = conn
+    
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+    
+    def close(self):
+        pass
+
+
+class SharedHook:
+    def get_conn(self):
+        return SharedConnection(conn)
+
+
+write = warehouse.write_dataframe
+
+
+def overlapping_write(*args, **kwargs):
+    warehouse.write_dataframe = write
+    tasks.ingest_csv_to_snowflake('raw.events', landed)
+    return write(*args, **kwargs)
+
+
+warehouse.get_hook = SharedHook
+warehouse.write_dataframe = overlapping_write
+for partition in discover_partitions('raw.events', raw_dir):
+    tasks.ingest_csv_to_snowflake(**partition)
+print('rows:', conn.execute('SELECT count(*) FROM raw.events').fetchone()[0])
+print('relisted:', len(tasks.list_ingest_partitions('raw.events')))
+"""
+
+
+class FakeTaskInstance:
+    def __init__(self, xcom: dict):
+        self.xcom = xcom
+    
+    def xcom_pull(self, task_ids=None, key='return_value'):
+        return self.xcom[task_ids]
+
+
+def land(raw_dir, name, arrived_at):
+    """Land an event file with the given arrival (modification) time."""
+    path = raw_dir / 'events' / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text('event_id,event_timestamp\n')
+    os.utime(path, (arrived_at, arrived_at))
+    return str(path)
+
+
+class TestNewFiles:
+    """Test which landed files make up the next batch."""
+    
+    def test_unloaded_files_oldest_first(self, tmp_path):
+        raw_dir, state_dir = tmp_path / 'raw', str(tmp_path / 'ingest')
+        late = land(raw_dir, 'b.csv', 2000)
+        early = land(raw_dir, 'c.csv', 1000)
+        loaded = land(raw_dir, 'a.csv', 500)
+        land(raw_dir, 'd.csv.tmp', 100)
+        record_load('raw.events', loaded, 10, None, state_dir)
+        
+        files = new_files('raw.events', str(raw_dir), state_dir=state_dir)
+        
+        assert files == [{'csv_path': early, 'arrived_at': 1000}, {'csv_path': late, 'arrived_at': 2000}]
+        assert new_files('raw.events', str(raw_dir), max_files=1, state_dir=state_dir)[0]['csv_path'] == early
+    
+    def test_file_loaded_as_ranges(self, tmp_path):
+        """A file the daily ingest split into byte ranges is loaded once all of its ranges are."""
+        raw_dir, state_dir = tmp_path / 'raw', str(tmp_path / 'ingest')
+        path = land(raw_dir, 'big.csv', 1000)
+        with open(path, 'a') as f:
+            f.writelines(f"E{i:06d},2025-10-01 00:00:00\n" for i in range(200))
+        ranges = byte_ranges(path, 1024)
+        record_load('raw.events', partition_id(path, *ranges[0]), 10, None, state_dir)
+        
+        assert new_files('raw.events', str(raw_dir), state_dir=state_dir, target_bytes=1024)
+        for start, end in ranges[1:]:
+            record_load('raw.events', partition_id(path, start, end), 10, None, state_dir)
+        assert new_files('raw.events', str(raw_dir), state_dir=state_dir, target_bytes=1024) == []
+    
+    def test_empty_landing_dir(self, tmp_path):
+        assert new_files('raw.events', str(tmp_path / 'raw'), state_dir=str(tmp_path / 'ingest')) == []
+
+
+class TestBatch:
+    """Test the batch summary and its lag report."""
+    
+    def test_ingest_collects_days(self, monkeypatch):
+        loads = {
+            'a.csv': {'rows': 3, 'days': ['2025-10-01']},
+            'b.csv': {'rows': 2, 'days': ['2025-10-01', '2025-10-02']},
+        }
+        monkeypatch.setattr(tasks, 'ingest_csv_to_snowflake', lambda table, path, **context: loads[path])
+        batch = {'files': [{'csv_path': 'a.csv', 'arrived_at': 10.0}, {'csv_path': 'b.csv', 'arrived_at': 12.0}],
+                 'detected_at': 15.0}
+        
+        summary = ingest_event_batch(ti=FakeTaskInstance({'wait_for_event_files': batch}))
+        
+        assert summary['rows'] == 5
+        assert summary['days'] == ['2025-10-01', '2025-10-02']
+        assert summary['files'] == batch['files']
+    
+    def test_lag_report(self):
+        files = [{'csv_path': 'a.csv', 'arrived_at': 100.0}, {'csv_path': 'b.csv', 'arrived_at': 160.0},
+                 {'csv_path': 'c.csv', 'arrived_at': 190.0}]
+        
+        report = lag_report(files, refreshed_at=400.0, target_seconds=250)
+        
+        assert report['lag_p50_seconds'] == 240.0
+        assert report['lag_max_seconds'] == 300.0
+        assert not report['within_target']
+        assert lag_report(files, refreshed_at=200.0)['within_target']
+        assert lag_report([], refreshed_at=200.0)['within_target'] is False
+    
+    @pytest.mark.parametrize('tables, selector', [
+        (None, 'tag:day_partitioned'),
+        (['raw.events'], 'tag:day_partitioned,source:ecommerce.events+'),
+    ])
+    def test_refreshed_models(self, tables, selector):
+        """Only the day-partitioned models downstream of the batch's feed are refreshed."""
+        assert day_models_selector(tables) == selector
+    
+    def test_landing_dir(self, tmp_path):
+        assert microbatch.landing_dir('raw.events', str(tmp_path)) == str(tmp_path / 'events')
+
+
+class TestOverlapWithDailyIngest:
+    """Test a landed file picked up by the daily and the micro-batch ingest at once."""
+    
+    def test_landed_file_loaded_once(self, tmp_path):
+        """The micro-batch load defers to the daily load's live claims; the next daily run skips the file."""
+        raw_dir = tmp_path / 'raw'
+        landed = land(raw_dir, 'events-0001.csv', 1000)
+        with open(landed, 'w') as f:
+            f.write('event_id,customer_id,event_type,event_timestamp,session_id\n')
+            f.writelines(f"E{i:03d},C001,page_view,2025-10-01 10:{i % 60:02d}:00,S{i // 10}\n" for i in range(50))
+        env = {
+            **os.environ,
+            'PYTHONPATH': os.pathsep.join(sys.path),
+            'DQ_DATA_DIR': str(tmp_path),
+            'DQ_RAW_SCHEMA_PATH': os.path.join(REPO_ROOT, 'data', 'schemas', 'raw_schema.json'),
+            'DQ_WAREHOUSE_BACKEND': 'duckdb',
+            'DQ_METRICS_EXPORTERS': '',
+        }
+        
+        out = subprocess.run([sys.executable, '-c', OVERLAP_SCRIPT, landed, str(raw_dir),
+                              str(tmp_path / 'warehouse.duckdb')],
+                             capture_output=True, text=True, env=env, check=True).stdout
+        
+        assert 'rows: 50' in out
+        assert 'relisted: 0' in out
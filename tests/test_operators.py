@@ -0,0 +1,222 @@
+"""
+Unit tests for the deferrable operators and their triggers, against the local
+DuckDB stand-in. Skipped when Airflow is not installed.
+"""
+
+import asyncio
+import os
+import signal
+
+import pytest
+
+pytest.importorskip('airflow.triggers.base')
+
+from airflow.exceptions import AirflowException, TaskDeferred  # noqa: E402
+
+from ecommerce_dq import deferral, operators, sizing  # noqa: E402
+from ecommerce_dq.operators import (  # noqa: E402
+    DeferrableCommandOperator,
+    DeferrableWarehouseQueryOperator,
+    NewFilesSensor,
+)
+from ecommerce_dq.results import QueryResult  # noqa: E402
+from ecommerce_dq.sizing import read_history  # noqa: E402
+from ecommerce_dq.triggers import CommandTrigger, NewFilesTrigger, WarehouseQueryTrigger  # noqa: E402
+from ecommerce_dq.warehouse import get_hook  # noqa: E402
+
+
+class FakeTaskInstance:
+    dag_id = 'dag'
+    run_id = 'manual__2025-10-01T00:00:00+00:00'
+    task_id = 'task'
+    map_index = -1
+    try_number = 1
+    
+    def __init__(self):
+        self.xcom = {}
+    
+    def xcom_push(self, key, value):
+        self.xcom[key] = value
+
+
+def run_trigger(trigger):
+    """Run a trigger to its first event, as the triggerer would."""
+    async def first_event():
+        async for event in trigger.run():
+            return event.payload
+    return asyncio.run(asyncio.wait_for(first_event(), timeout=30))
+
+
+def defer(operator, context):
+    """Execute until the operator defers; return its trigger."""
+    with pytest.raises(TaskDeferred) as deferred:
+        operator.execute(context)
+    return deferred.value.trigger
+
+
+@pytest.fixture
+def duckdb_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+    monkeypatch.setenv('DQ_DUCKDB_PATH', str(tmp_path / 'warehouse.duckdb'))
+    monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'file')
+    monkeypatch.setenv('DQ_METRICS_FILE', str(tmp_path / 'metrics.jsonl'))
+    monkeypatch.setattr(deferral, 'DEFERRED_STATE_DIR', str(tmp_path / 'deferred'))
+    monkeypatch.setattr(operators, 'DEFERRED_STATE_DIR', str(tmp_path / 'deferred'))
+    monkeypatch.setattr(sizing, 'SIZING_STATE_DIR', str(tmp_path / 'sizing'))
+    monkeypatch.setenv('DQ_WAREHOUSES', 'XSMALL=DQ_WH_XS,LARGE=DQ_WH_L')
+    get_hook().run("CREATE TABLE orders AS SELECT * FROM (VALUES (1), (2), (3)) t(amount)")
+
+
+class TestDeferrableWarehouseQueryOperator:
+    """Test the deferred and blocking query paths."""
+    
+    QUERIES = {'total': "SELECT SUM(amount) AS total FROM orders", 'count': "SELECT COUNT(*) AS n FROM orders"}
+    EXPECTED = {'total': QueryResult('total', ['total'], (6,)), 'count': QueryResult('count', ['n'], (3,))}
+    
+    def test_defers_and_resumes_with_results(self, duckdb_backend):
+        """Queries are submitted, polled by the trigger and fetched on resume."""
+        operator = DeferrableWarehouseQueryOperator(task_id='validate', queries=self.QUERIES, xcom_key='results',
+                                                    poll_interval=0.05)
+        ti = FakeTaskInstance()
+        
+        trigger = defer(operator, {'ti': ti})
+        assert isinstance(trigger, WarehouseQueryTrigger)
+        event = run_trigger(trigger)
+        results = operator.execute_complete({'ti': ti}, event)
+        
+        assert results == self.EXPECTED
+        assert results['count'].n == 3
+        assert ti.xcom['results'] == results
+    
+    def test_trigger_round_trips_through_serialization(self, duckdb_backend):
+        """The triggerer rebuilds the trigger from its serialized form."""
+        trigger = defer(DeferrableWarehouseQueryOperator(task_id='t', queries=self.QUERIES, poll_interval=0.05),
+                        {'ti': FakeTaskInstance()})
+        
+        classpath, kwargs = trigger.serialize()
+        assert classpath == 'ecommerce_dq.triggers.WarehouseQueryTrigger'
+        assert run_trigger(WarehouseQueryTrigger(**kwargs))['status'] == 'success'
+    
+    def test_failed_query_fails_task(self, duckdb_backend):
+        """A failing query fails the task on resume."""
+        operator = DeferrableWarehouseQueryOperator(task_id='t', queries={'bad': "SELECT * FROM missing"},
+                                                    poll_interval=0.05)
+        
+        event = run_trigger(defer(operator, {'ti': FakeTaskInstance()}))
+        
+        with pytest.raises(AirflowException, match="Query 'bad'"):
+            operator.execute_complete({'ti': FakeTaskInstance()}, event)
+    
+    def test_blocking_mode(self, duckdb_backend):
+        """deferrable=False runs the queries in the worker."""
+        operator = DeferrableWarehouseQueryOperator(task_id='t', queries=self.QUERIES, deferrable=False)
+        
+        assert operator.execute({'ti': FakeTaskInstance()}) == self.EXPECTED
+    
+    @pytest.mark.parametrize('deferrable', [True, False])
+    def test_sized_queries_record_runtime(self, duckdb_backend, deferrable):
+        """A sized step is measured, given a warehouse and its runtime recorded, in both modes."""
+        operator = DeferrableWarehouseQueryOperator(task_id='validate', queries=self.QUERIES, poll_interval=0.05,
+                                                    deferrable=deferrable, sizing_step='validate',
+                                                    sizing_schemas=['main'])
+        
+        if deferrable:
+            with pytest.raises(TaskDeferred) as deferred:
+                operator.execute({'ti': FakeTaskInstance()})
+            results = operator.execute_complete({'ti': FakeTaskInstance()}, run_trigger(deferred.value.trigger),
+                                                **deferred.value.kwargs)
+        else:
+            results = operator.execute({'ti': FakeTaskInstance()})
+        
+        assert results == self.EXPECTED
+        [run] = read_history('validate')
+        assert (run['size'], run['input_size']) == ('XSMALL', 3)
+
+
+class TestDeferrableCommandOperator:
+    """Test the detached command path used by the dbt steps."""
+    
+    def test_defers_until_exit(self, duckdb_backend, capsys):
+        """The command runs detached and its output is echoed on resume."""
+        operator = DeferrableCommandOperator(task_id='dbt', bash_command='echo "$GREETING"',
+                                             env={'GREETING': 'hello'}, append_env=True, poll_interval=0.05)
+        
+        trigger = defer(operator, {'ti': FakeTaskInstance()})
+        assert isinstance(trigger, CommandTrigger)
+        operator.execute_complete({}, run_trigger(trigger))
+        
+        assert 'hello' in capsys.readouterr().out
+    
+    def test_sized_command_gets_warehouse(self, duckdb_backend, capsys):
+        """The dbt profile's SNOWFLAKE_WAREHOUSE is the sized one, and the runtime lands in the history."""
+        operator = DeferrableCommandOperator(task_id='dbt', bash_command='echo "warehouse=$SNOWFLAKE_WAREHOUSE"',
+                                             poll_interval=0.05, sizing_step='dbt_run_mart', sizing_schemas=['main'])
+        
+        with pytest.raises(TaskDeferred) as deferred:
+            operator.execute({'ti': FakeTaskInstance()})
+        operator.execute_complete({}, run_trigger(deferred.value.trigger), **deferred.value.kwargs)
+        
+        assert 'warehouse=DQ_WH_XS' in capsys.readouterr().out
+        assert len(read_history('dbt_run_mart')) == 1
+    
+    def test_non_zero_exit_fails_task(self, duckdb_backend):
+        """A failing command fails the task on resume."""
+        operator = DeferrableCommandOperator(task_id='dbt', bash_command='exit 2', poll_interval=0.05)
+        
+        event = run_trigger(defer(operator, {'ti': FakeTaskInstance()}))
+        
+        with pytest.raises(AirflowException, match='exit code 2'):
+            operator.execute_complete({}, event)
+    
+    def test_lost_command_fails_task(self, duckdb_backend):
+        """A command gone without an exit code fails the task, and deferral is bounded by default."""
+        operator = DeferrableCommandOperator(task_id='dbt', bash_command='sleep 30', poll_interval=0.05)
+        
+        with pytest.raises(TaskDeferred) as deferred:
+            operator.execute({'ti': FakeTaskInstance()})
+        assert deferred.value.timeout == operators.COMMAND_TIMEOUT
+        run_dir = deferred.value.trigger.run_dir
+        with open(os.path.join(run_dir, 'pid')) as f:
+            os.killpg(int(f.read()), signal.SIGKILL)
+        os.utime(os.path.join(run_dir, 'heartbeat'), (0, 0))
+        
+        event = run_trigger(deferred.value.trigger)
+        with pytest.raises(AirflowException, match='without an exit code'):
+            operator.execute_complete({}, event, **deferred.value.kwargs)
+
+
+class TestNewFilesSensor:
+    """Test waiting for landed event files."""
+    
+    @staticmethod
+    def land(raw_dir, name):
+        path = raw_dir / 'events' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('event_id,event_timestamp\n')
+        return str(path)
+    
+    def test_defers_until_files_land(self, tmp_path):
+        raw_dir = tmp_path / 'raw'
+        sensor = NewFilesSensor(task_id='wait', table_name='raw.events', raw_dir=str(raw_dir), poll_interval=0.05)
+        
+        trigger = defer(sensor, {'ti': FakeTaskInstance()})
+        assert isinstance(trigger, NewFilesTrigger)
+        classpath, kwargs = trigger.serialize()
+        assert classpath == 'ecommerce_dq.triggers.NewFilesTrigger'
+        path = self.land(raw_dir, 'batch-001.csv')
+        event = sensor.execute_complete({}, run_trigger(NewFilesTrigger(**kwargs)))
+        
+        assert [f['csv_path'] for f in event['files']] == [path]
+        assert event['detected_at'] >= os.path.getmtime(path)
+    
+    def test_files_already_landed(self, tmp_path):
+        """No deferral when the next batch is already there, in either mode."""
+        raw_dir = tmp_path / 'raw'
+        paths = [self.land(raw_dir, f"batch-00{n}.csv") for n in range(3)]
+        
+        for deferrable in (True, False):
+            sensor = NewFilesSensor(task_id='wait', table_name='raw.events', raw_dir=str(raw_dir), max_files=2,
+                                    deferrable=deferrable)
+            event = sensor.execute({'ti': FakeTaskInstance()})
+            assert len(event['files']) == 2
+            assert {f['csv_path'] for f in event['files']} <= set(paths)
@@ -0,0 +1,92 @@
+"""
+Unit tests for ingest partition discovery.
+"""
+
+import pandas as pd
+
+from ecommerce_dq.partitions import byte_ranges, discover_partitions, open_partition, partition_id
+
+
+def write_csv(path, rows):
+    df = pd.DataFrame({'order_id': [f"ORD{i:06d}" for i in range(rows)], 'amount': range(rows)})
+    df.to_csv(path, index=False)
+    return df
+
+
+class TestDiscoverPartitions:
+    """Test partition discovery over a raw directory."""
+    
+    def test_single_file_and_partition_directory(self, tmp_path):
+        """<table>.csv and <table>/*.csv are all partitions of the table, in name order."""
+        write_csv(tmp_path / 'orders.csv', 5)
+        (tmp_path / 'orders').mkdir()
+        write_csv(tmp_path / 'orders' / 'part-0002.csv', 5)
+        write_csv(tmp_path / 'orders' / 'part-0001.csv', 5)
+        write_csv(tmp_path / 'events.csv', 5)
+        
+        partitions = discover_partitions('raw.orders', str(tmp_path))
+        
+        assert [p['csv_path'] for p in partitions] == [
+            str(tmp_path / 'orders.csv'),
+            str(tmp_path / 'orders' / 'part-0001.csv'),
+            str(tmp_path / 'orders' / 'part-0002.csv'),
+        ]
+        assert all(p['table_name'] == 'raw.orders' for p in partitions)
+    
+    def test_large_file_is_split_into_ranges(self, tmp_path):
+        """Files over the target size become byte-range partitions."""
+        write_csv(tmp_path / 'orders.csv', 1000)
+        
+        partitions = discover_partitions('raw.orders', str(tmp_path), target_bytes=4096)
+        
+        assert len(partitions) > 1
+        assert all('start' in p and 'end' in p for p in partitions)
+    
+    def test_loaded_partition_files_skipped(self, tmp_path):
+        """Partition files in the ingest manifest are not listed again; <table>.csv always is."""
+        write_csv(tmp_path / 'orders.csv', 5)
+        (tmp_path / 'orders').mkdir()
+        write_csv(tmp_path / 'orders' / 'part-0001.csv', 5)
+        write_csv(tmp_path / 'orders' / 'part-0002.csv', 1000)
+        loaded = str(tmp_path / 'orders' / 'part-0001.csv')
+        large = str(tmp_path / 'orders' / 'part-0002.csv')
+        loads = {str(tmp_path / 'orders.csv'): {}, loaded: {}}
+        
+        partitions = discover_partitions('raw.orders', str(tmp_path), target_bytes=4096, loads=loads)
+        
+        assert {p['csv_path'] for p in partitions} == {str(tmp_path / 'orders.csv'), large}
+        loads.update({partition_id(large, start, end): {} for start, end in byte_ranges(large, 4096)})
+        partitions = discover_partitions('raw.orders', str(tmp_path), target_bytes=4096, loads=loads)
+        assert [p['csv_path'] for p in partitions] == [str(tmp_path / 'orders.csv')]
+    
+    def test_missing_table(self, tmp_path):
+        """A table without input files has no partitions."""
+        assert discover_partitions('raw.orders', str(tmp_path)) == []
+
+
+class TestByteRanges:
+    """Test newline-aligned splitting and range reads."""
+    
+    def test_ranges_cover_every_row_once(self, tmp_path):
+        """Reading every range (header prepended) reproduces the file exactly."""
+        path = tmp_path / 'orders.csv'
+        df = write_csv(path, 1000)
+        
+        parts = []
+        for start, end in byte_ranges(str(path), 1000):
+            with open_partition(str(path), start, end) as f:
+                parts.extend(pd.read_csv(f, chunksize=37))
+        
+        assert pd.concat(parts, ignore_index=True).equals(df)
+    
+    def test_header_only_file(self, tmp_path):
+        """A file without data rows has no ranges."""
+        path = tmp_path / 'orders.csv'
+        path.write_text('order_id,amount\n')
+        
+        assert byte_ranges(str(path), 10) == []
+    
+    def test_partition_id(self):
+        """Whole files are identified by path, ranges by path and offsets."""
+        assert partition_id('/raw/orders.csv') == '/raw/orders.csv'
+        assert partition_id('/raw/orders.csv', 10, 20) == '/raw/orders.csv:10-20'
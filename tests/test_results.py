@@ -0,0 +1,57 @@
+"""
+Unit tests for the typed check query results.
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from ecommerce_dq.results import QueryResult
+
+
+class TestQueryResult:
+    """Test column access and the versioned serialized form."""
+    
+    def test_access_by_column_name(self):
+        """Values are read by the query's column aliases, case-insensitively."""
+        result = QueryResult('orders_validity', ['TOTAL_ORDERS', 'negative_amounts'], (100, 2))
+        
+        assert result.total_orders == 100
+        assert result['negative_amounts'] == 2
+        assert result.as_dict() == {'total_orders': 100, 'negative_amounts': 2}
+    
+    def test_unknown_column(self):
+        """A typo in a column name fails loudly instead of reading the wrong position."""
+        result = QueryResult('orders_validity', ['total_orders'], (100,))
+        
+        with pytest.raises(AttributeError, match="no column 'negative_amount'"):
+            result.negative_amount
+        with pytest.raises(KeyError):
+            result['negative_amount']
+    
+    def test_values_must_match_columns(self):
+        with pytest.raises(ValueError):
+            QueryResult('bad', ['a', 'b'], (1,))
+    
+    def test_missing_row_reads_as_nulls(self):
+        """A query that returned no row yields None for every column."""
+        assert QueryResult('empty', ['orphan_rows'], None).orphan_rows is None
+    
+    def test_from_cursor(self):
+        """Columns come from the DB-API cursor description."""
+        class Cursor:
+            description = [('ORPHAN_ROWS', None), ('ORPHAN_KEYS', None)]
+        
+        result = QueryResult.from_cursor('orders_referential_integrity', Cursor(), (3, 1))
+        assert (result.orphan_rows, result.orphan_keys) == (3, 1)
+    
+    def test_serialize_round_trip(self):
+        """The serialized form rebuilds an equal result."""
+        result = QueryResult('customers_completeness', ['email_completeness'], (Decimal('0.97'),))
+        
+        assert QueryResult.deserialize(result.serialize(), QueryResult.__version__) == result
+    
+    def test_rejects_newer_version(self):
+        """Payloads written by a newer schema version are not guessed at."""
+        with pytest.raises(TypeError):
+            QueryResult.deserialize({'name': 'x', 'columns': [], 'values': []}, QueryResult.__version__ + 1)
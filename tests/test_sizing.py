@@ -0,0 +1,189 @@
+"""
+Unit tests for the warehouse right-sizing policy, offline: decisions from
+input sizes and step history, and the local DuckDB stand-in.
+"""
+
+import pytest
+
+from ecommerce_dq.sizing import (
+    BYTES,
+    HISTORY_RUNS,
+    ROWS,
+    SizingDecision,
+    choose_warehouse,
+    decide,
+    finish_step,
+    input_rows,
+    read_history,
+    record_run,
+    warehouse_set,
+)
+from ecommerce_dq.warehouse import get_hook, init_schemas, use_warehouse
+
+WAREHOUSES = {'XSMALL': 'DQ_WH_XS', 'MEDIUM': 'DQ_WH_M', 'LARGE': 'DQ_WH_L'}
+
+
+def run(size, input_size, seconds, unit=ROWS):
+    return {'size': size, 'input_size': input_size, 'unit': unit, 'seconds': seconds}
+
+
+class FakeCursor:
+    def __init__(self, executed):
+        self.executed = executed
+    
+    def execute(self, sql):
+        self.executed.append(sql)
+    
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+    
+    def cursor(self):
+        return FakeCursor(self.executed)
+
+
+class TestWarehouseSet:
+    """Test parsing DQ_WAREHOUSES."""
+    
+    def test_smallest_first(self):
+        assert list(warehouse_set('large=DQ_WH_L, X-Small=DQ_WH_XS,MEDIUM=DQ_WH_M')) == ['XSMALL', 'MEDIUM', 'LARGE']
+        assert warehouse_set('') == {}
+    
+    @pytest.mark.parametrize('spec', ['HUGE=WH', 'SMALL=', 'SMALL=WH; DROP TABLE x'])
+    def test_invalid(self, spec):
+        with pytest.raises(ValueError):
+            warehouse_set(spec)
+
+
+class TestDecide:
+    """Test the size picked for an input."""
+    
+    def test_sized_by_input_without_history(self):
+        """Default rates: a few rows stay on the smallest size, gigabytes scale up."""
+        small = decide('ingest_customers', 300, BYTES, warehouses=WAREHOUSES, target_seconds=300)
+        large = decide('ingest_events', 40 * 2 ** 30, BYTES, warehouses=WAREHOUSES, target_seconds=300)
+        
+        assert (small.size, small.warehouse, small.history_runs) == ('XSMALL', 'DQ_WH_XS', 0)
+        # 40 GB at 20 MB/s per XSMALL credit: 2048s on XSMALL, 512s on MEDIUM, 256s on LARGE
+        assert (large.size, large.warehouse) == ('LARGE', 'DQ_WH_L')
+        assert large.estimated_seconds == pytest.approx(256)
+    
+    def test_largest_candidate_when_none_meets_target(self):
+        decision = decide('dbt_run_mart', 10 ** 12, warehouses=WAREHOUSES, target_seconds=60)
+        
+        assert decision.size == 'LARGE'
+        assert decision.estimated_seconds > 60
+    
+    def test_all_sizes_without_warehouses(self):
+        """Unconfigured, every size is a candidate and the decision is advisory."""
+        decision = decide('dbt_run_mart', 10 ** 9, target_seconds=300)
+        
+        # 2000s on XSMALL at 500k rows/s, 250s on LARGE
+        assert decision.warehouse is None
+        assert decision.size == 'LARGE'
+    
+    def test_slow_history_scales_up(self):
+        """A step that ran long for its input moves up, by the ratio it overran."""
+        history = [run('XSMALL', 1_000_000, 1200), run('XSMALL', 2_000_000, 2400)]
+        
+        decision = decide('dbt_run_mart', 1_500_000, history=history, warehouses=WAREHOUSES, target_seconds=600)
+        
+        assert decision.size == 'MEDIUM'
+        assert decision.estimated_seconds == pytest.approx(450)
+        assert decision.history_runs == 2
+    
+    def test_fast_history_scales_down(self):
+        """A step that finished quickly on a large warehouse moves down."""
+        history = [run('LARGE', 5_000_000, 10), run('LARGE', 5_000_000, 12)]
+        
+        decision = decide('validate_quality', 5_000_000, history=history, warehouses=WAREHOUSES, target_seconds=300)
+        
+        assert decision.size == 'XSMALL'
+        assert decision.estimated_seconds == pytest.approx(88)
+    
+    def test_incomparable_history_is_ignored(self):
+        """Runs on much smaller inputs, or measured in another unit, say little about this one."""
+        history = [run('XSMALL', 100, 30), run('XSMALL', 10_000, 5000, BYTES)]
+        
+        decision = decide('dbt_run_mart', 10_000, history=history, warehouses=WAREHOUSES)
+        
+        assert decision.history_runs == 0
+        assert decision.size == 'XSMALL'
+    
+    def test_unknown_unit(self):
+        with pytest.raises(ValueError):
+            decide('dbt_run_mart', 10, 'files')
+
+
+class TestHistory:
+    """Test the decision log and the runtimes fed back into it."""
+    
+    def test_decisions_learn_from_finished_runs(self, tmp_path, monkeypatch, capsys):
+        monkeypatch.setenv('DQ_WAREHOUSES', 'XSMALL=DQ_WH_XS,MEDIUM=DQ_WH_M')
+        state_dir = str(tmp_path / 'sizing')
+        
+        first = choose_warehouse('dbt_run_staging', 1_000_000, state_dir=state_dir)
+        finish_step(first, 1200.0, state_dir=state_dir)
+        second = choose_warehouse('dbt_run_staging', 1_000_000, state_dir=state_dir)
+        
+        assert first.warehouse == 'DQ_WH_XS'
+        assert second.warehouse == 'DQ_WH_M'
+        assert read_history('dbt_run_staging', state_dir)[0]['seconds'] == 1200.0
+        out = capsys.readouterr().out
+        assert "Warehouse for 'dbt_run_staging': XSMALL (DQ_WH_XS)" in out
+        assert "ran 1200.0s on XSMALL" in out
+    
+    def test_unapplied_decision_not_recorded(self, tmp_path, monkeypatch, capsys):
+        """Without DQ_WAREHOUSES the connection default ran the step, so its size is unknown."""
+        monkeypatch.delenv('DQ_WAREHOUSES', raising=False)
+        state_dir = str(tmp_path / 'sizing')
+        
+        decision = choose_warehouse('dbt_run_staging', 1_000_000, state_dir=state_dir)
+        
+        assert decision.warehouse is None
+        assert finish_step(decision, 1200.0, state_dir=state_dir) == []
+        assert read_history('dbt_run_staging', state_dir) == []
+        assert "ran 1200.0s on the connection default" in capsys.readouterr().out
+    
+    def test_history_keeps_recent_runs(self, tmp_path):
+        decision = SizingDecision('ingest_events', 'XSMALL', None, 1000, BYTES, 1.0)
+        for seconds in range(HISTORY_RUNS + 5):
+            runs = record_run(decision, seconds, str(tmp_path))
+        
+        assert len(runs) == HISTORY_RUNS
+        assert runs[0]['seconds'] == 5
+    
+    def test_decision_round_trips_as_dict(self):
+        decision = SizingDecision('dbt_run_mart', 'MEDIUM', 'DQ_WH_M', 10, ROWS, 2.5, 3)
+        
+        assert SizingDecision.from_dict(decision.as_dict()) == decision
+
+
+class TestApplying:
+    """Test switching warehouses on the two backends."""
+    
+    def test_snowflake_session_switches(self, monkeypatch):
+        monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'snowflake')
+        conn = FakeConnection()
+        
+        use_warehouse(conn, 'DQ_WH_M')
+        use_warehouse(conn, None)
+        
+        assert conn.executed == ['USE WAREHOUSE DQ_WH_M']
+    
+    def test_duckdb_stand_in(self, tmp_path, monkeypatch):
+        """Offline, the input is measured from the local tables and applying a warehouse is a no-op."""
+        monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+        monkeypatch.setenv('DQ_DUCKDB_PATH', str(tmp_path / 'warehouse.duckdb'))
+        init_schemas()
+        get_hook().run("CREATE TABLE raw.orders AS SELECT range AS id FROM range(1500)")
+        get_hook().run("CREATE TABLE staging.stg_orders AS SELECT range AS id FROM range(500)")
+        
+        with get_hook().get_conn() as conn:
+            use_warehouse(conn, 'DQ_WH_M')
+            assert input_rows(conn, ['raw', 'staging']) == 2000
+            assert input_rows(conn, ['mart']) == 0
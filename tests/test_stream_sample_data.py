@@ -0,0 +1,143 @@
+"""
+Unit tests for the streaming data generator: rate control, ordering and
+injected defects.
+"""
+
+import io
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import generate_sample_data as static
+from stream_sample_data import (
+    COLUMNS,
+    NUM_CUSTOMERS,
+    NUM_EVENTS,
+    PEAK_HOUR,
+    PipeSink,
+    RotatingCsvSink,
+    StreamGenerator,
+    diurnal_factor,
+)
+
+START = datetime(2025, 10, 1, 12, 0, 0)
+
+
+def read_rows(lines: str, table: str) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(lines), names=COLUMNS[table], dtype=str, keep_default_na=False)
+
+
+class TestRate:
+    """Test how many rows each interval gets."""
+    
+    def test_diurnal_factor_averages_one(self):
+        factors = diurnal_factor([h / 10 for h in range(240)], amplitude=0.5)
+        
+        assert factors.mean() == pytest.approx(1.0)
+        assert diurnal_factor(PEAK_HOUR, amplitude=0.5) == pytest.approx(1.5)
+        assert diurnal_factor(PEAK_HOUR - 12, amplitude=0.5) == pytest.approx(0.5)
+    
+    def test_fractional_rows_carry_over(self):
+        """Ticks too short for a whole order still add up to the target rate."""
+        generator = StreamGenerator(rate=1000, amplitude=0, orders_per_event=0.001, start=START)
+        batches = [generator.batch(0.01) for _ in range(100)]
+        
+        assert generator.next_ids['events'] - NUM_EVENTS - 1 == 1000
+        assert generator.next_ids['orders'] - static.NUM_ORDERS - 1 == 1
+        assert sum(b['events'][0] for b in batches) >= 1000
+    
+    def test_rate_follows_the_simulated_day(self):
+        peak = StreamGenerator(rate=1000, amplitude=0.5, start=START.replace(hour=PEAK_HOUR))
+        trough = StreamGenerator(rate=1000, amplitude=0.5, start=START.replace(hour=PEAK_HOUR - 12))
+        
+        peak.batch(1.0)
+        trough.batch(1.0)
+        
+        assert peak.next_ids['events'] - NUM_EVENTS - 1 == pytest.approx(1500, abs=1)
+        assert trough.next_ids['events'] - NUM_EVENTS - 1 == pytest.approx(500, abs=1)
+
+
+class TestRows:
+    """Test the generated rows."""
+    
+    def test_columns_match_static_generator(self):
+        customers = static.generate_customers(3)
+        
+        assert list(customers.columns) == COLUMNS['customers']
+        assert list(static.generate_orders(customers, 3).columns) == COLUMNS['orders']
+        assert list(static.generate_events(customers, 3).columns) == COLUMNS['events']
+    
+    def test_time_ordered_with_continuing_ids(self):
+        generator = StreamGenerator(rate=2000, amplitude=0, start=START, speedup=60)
+        first, second = (read_rows(generator.batch(0.5)['events'][1], 'events') for _ in range(2))
+        events = pd.concat([first, second])
+        timestamps = pd.to_datetime(events['event_timestamp'])
+        
+        assert timestamps.is_monotonic_increasing
+        assert timestamps.min() >= pd.Timestamp(START)
+        # Two half seconds at 60x: one simulated minute
+        assert timestamps.max() < pd.Timestamp(START) + pd.Timedelta(minutes=1)
+        assert first['event_id'].iloc[0] == f"EVT{NUM_EVENTS + 1:010d}"
+        assert events['event_id'].nunique() == 2000
+    
+    def test_injected_defect_rates(self):
+        """Same null, duplicate and invalid value rates as the static generator."""
+        generator = StreamGenerator(rate=200_000, amplitude=0, start=START)
+        batch = generator.batch(1.0)
+        events = read_rows(batch['events'][1], 'events')
+        orders = read_rows(batch['orders'][1], 'orders')
+        
+        assert (events['customer_id'] == '').mean() == pytest.approx(static.NULL_RATE, abs=0.003)
+        assert events.duplicated().mean() == pytest.approx(static.DUPLICATE_RATE, abs=0.002)
+        assert (~events['event_type'].isin(['PAGE_VIEW', 'ADD_TO_CART', 'PURCHASE', 'SEARCH', 'CLICK'])).mean() \
+            == pytest.approx(static.INVALID_STATUS_RATE, abs=0.002)
+        assert (orders['total_amount'] == '').mean() == pytest.approx(static.NULL_RATE, abs=0.004)
+        assert (orders['total_amount'].str.startswith('-')).mean() == pytest.approx(0.005, abs=0.002)
+    
+    def test_references_known_customers_only(self):
+        """Events only reference customers emitted in earlier batches."""
+        generator = StreamGenerator(rate=50_000, amplitude=0, new_customers_per_event=0.01, start=START)
+        first = generator.batch(1.0)
+        second = generator.batch(1.0)
+        
+        new_ids = set(read_rows(first['customers'][1], 'customers')['customer_id'])
+        first_refs = set(read_rows(first['events'][1], 'events')['customer_id']) - {''}
+        second_refs = set(read_rows(second['events'][1], 'events')['customer_id']) - {''}
+        assert not first_refs & new_ids
+        assert second_refs & new_ids
+        assert max(first_refs) <= f"CUST{NUM_CUSTOMERS:06d}"
+
+
+class TestSinks:
+    """Test file rotation and pipe output."""
+    
+    def test_rotated_files_land_complete(self, tmp_path):
+        generator = StreamGenerator(rate=1000, amplitude=0, start=START)
+        sink = RotatingCsvSink(str(tmp_path), tables=['events'], rotate_seconds=3600, rotate_rows=500)
+        
+        for _ in range(3):
+            sink.write(generator.batch(0.3))
+        in_progress = os.listdir(tmp_path / 'events')
+        sink.close()
+        
+        assert any(name.endswith('.csv.tmp') for name in in_progress)
+        assert len(sink.landed) == 2
+        assert all(name.endswith('.csv') for name in os.listdir(tmp_path / 'events'))
+        rows = pd.concat(pd.read_csv(path) for path in sink.landed)
+        assert list(rows.columns) == COLUMNS['events']
+        assert rows['event_id'].nunique() == 900
+    
+    def test_pipe_has_one_header(self):
+        stream = io.StringIO()
+        generator = StreamGenerator(rate=100, amplitude=0, start=START)
+        sink = PipeSink(stream, 'orders')
+        
+        sink.write(generator.batch(1.0))
+        sink.write(generator.batch(1.0))
+        sink.close()
+        
+        orders = pd.read_csv(io.StringIO(stream.getvalue()))
+        assert list(orders.columns) == COLUMNS['orders']
+        assert orders['order_id'].nunique() == pytest.approx(2 * 100 * static.NUM_ORDERS / NUM_EVENTS, abs=1)
@@ -0,0 +1,82 @@
+"""
+Unit tests for metadata-served row counts and freshness, against the local
+DuckDB backend.
+"""
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from ecommerce_dq.table_metadata import TableMetadata, event_time_summary, read_manifest, record_load
+from ecommerce_dq.warehouse import get_hook, init_schemas
+
+
+@pytest.fixture
+def warehouse(tmp_path, monkeypatch):
+    monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+    monkeypatch.setenv('DQ_DUCKDB_PATH', str(tmp_path / 'warehouse.duckdb'))
+    init_schemas()
+    hook = get_hook()
+    hook.run("""
+        CREATE TABLE raw.orders AS SELECT * FROM (VALUES
+            ('O1', '2025-01-01 08:00:00'),
+            ('O2', '2025-01-02 12:00:00')
+        ) t(order_id, order_date)
+    """)
+    return hook
+
+
+class TestIngestManifest:
+    """Test what the ingest records."""
+    
+    def test_loads_accumulate_per_partition(self, tmp_path):
+        """Chunks of a partition, and retries of it, add to one entry."""
+        state_dir = str(tmp_path / 'ingest')
+        record_load('raw.orders', 'orders.csv', 2, '2025-01-01T08:00:00', state_dir)
+        record_load('raw.orders', 'orders.csv', 3, '2024-12-31T08:00:00', state_dir)
+        record_load('raw.orders', 'orders/part2.csv', 1, None, state_dir)
+        
+        loads = read_manifest('orders', state_dir)['loads']
+        assert loads['orders.csv']['rows'] == 5
+        assert loads['orders.csv']['max_event_time'] == '2025-01-01T08:00:00'
+        assert loads['orders/part2.csv']['max_event_time'] is None
+    
+    def test_event_time_summary_skips_unparseable(self):
+        df = pd.DataFrame({'order_date': ['2025-01-01 08:00:00', 'not a date', None, '2024-12-31 23:00:00']})
+        
+        assert event_time_summary(df, 'order_date') == ('2025-01-01T08:00:00', ['2024-12-31', '2025-01-01'])
+        assert event_time_summary(df.iloc[1:3], 'order_date') == (None, [])
+
+
+class TestTableMetadata:
+    """Test when metadata answers and when it falls back to a scan (None)."""
+    
+    def test_served_when_manifest_matches(self, tmp_path, warehouse):
+        state_dir = str(tmp_path / 'ingest')
+        record_load('raw.orders', 'orders.csv', 2, '2025-01-02T12:00:00', state_dir)
+        
+        with warehouse.get_conn() as conn:
+            metadata = TableMetadata(conn, state_dir)
+            assert metadata.read('row_count', 'raw.orders') == 2
+            assert metadata.freshness_hours('raw.orders', now=datetime(2025, 1, 3, 12)) == 24.0
+    
+    def test_stale_manifest_falls_back(self, tmp_path, warehouse):
+        """Rows loaded outside the ingest make the manifest stale."""
+        state_dir = str(tmp_path / 'ingest')
+        record_load('raw.orders', 'orders.csv', 1, '2025-01-01T08:00:00', state_dir)
+        
+        with warehouse.get_conn() as conn:
+            metadata = TableMetadata(conn, state_dir)
+            assert metadata.row_count('raw.orders') is None
+            assert metadata.freshness_hours('raw.orders') is None
+    
+    def test_missing_metadata(self, tmp_path, warehouse):
+        """Without a manifest, counts come from table statistics alone; freshness needs a scan."""
+        with warehouse.get_conn() as conn:
+            metadata = TableMetadata(conn, str(tmp_path / 'ingest'))
+            assert metadata.row_count('raw.orders') == 2
+            assert metadata.freshness_hours('raw.orders') is None
+            assert metadata.row_count('raw.events') is None
+            with pytest.raises(ValueError):
+                metadata.read('null_rate', 'raw.orders')
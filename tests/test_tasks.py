@@ -0,0 +1,70 @@
+"""
+Unit tests for the pipeline task callables that need no warehouse.
+"""
+
+from ecommerce_dq.results import QueryResult
+from ecommerce_dq.tasks import alert_on_quality_issues
+
+
+class FakeTaskInstance:
+    def __init__(self, xcom: dict):
+        self.xcom = xcom
+    
+    def xcom_pull(self, key, task_ids=None):
+        return self.xcom.get((task_ids, key), self.xcom.get(key))
+
+
+def quality_results(**orphans):
+    results = {
+        'customers_completeness': QueryResult('customers_completeness', ['email_completeness'], [0.99]),
+        'orders_validity': QueryResult('orders_validity', ['negative_amounts', 'invalid_statuses'], [0, 0]),
+        'events_quality': QueryResult('events_quality', ['invalid_event_types'], [0]),
+    }
+    for table, rows in orphans.items():
+        name = f"{table}_referential_integrity"
+        results[name] = QueryResult(name, ['orphan_rows', 'orphan_keys'], [rows, rows])
+    return results
+
+
+class TestAlertOnQualityIssues:
+    """Test alerting over the business and generated referential integrity checks."""
+    
+    def test_clean_results(self, monkeypatch, tmp_path):
+        monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'file')
+        monkeypatch.setenv('DQ_METRICS_FILE', str(tmp_path / 'metrics.jsonl'))
+        ti = FakeTaskInstance({'quality_results': quality_results(orders=0, events=0)})
+        
+        assert alert_on_quality_issues(ti=ti) == []
+    
+    def test_orphans_of_any_feed_alert(self, monkeypatch, tmp_path):
+        """Every generated referential integrity check is alerted on, not a fixed list of feeds."""
+        monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'file')
+        monkeypatch.setenv('DQ_METRICS_FILE', str(tmp_path / 'metrics.jsonl'))
+        ti = FakeTaskInstance({'quality_results': quality_results(orders=0, returns=3)})
+        
+        assert alert_on_quality_issues(ti=ti) == ['Found 3 returns rows with unknown foreign keys']
+    
+    def test_open_circuit_breaker_alerts(self, monkeypatch, tmp_path):
+        """A gate that skipped validation is alerted on with its blocking failures."""
+        monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'file')
+        monkeypatch.setenv('DQ_METRICS_FILE', str(tmp_path / 'metrics.jsonl'))
+        gate_results = [
+            {'name': 'raw_orders_row_count', 'severity': 'block', 'passed': False, 'value': 0},
+            {'name': 'raw_orders_null_customer_id_rate', 'severity': 'warn', 'passed': False, 'value': 0.2},
+        ]
+        ti = FakeTaskInstance({('ingest_data.orders_quality_gate', 'gate_results'): gate_results})
+        
+        issues = alert_on_quality_issues(
+            gate_task_ids=['ingest_data.customers_quality_gate', 'ingest_data.orders_quality_gate'], ti=ti
+        )
+        
+        assert issues == ["Circuit breaker open at 'ingest_data.orders_quality_gate': raw_orders_row_count = 0"]
+    
+    def test_missing_results_alert(self, monkeypatch, tmp_path):
+        """A failed validation without an open gate is still an issue."""
+        monkeypatch.setenv('DQ_METRICS_EXPORTERS', 'file')
+        monkeypatch.setenv('DQ_METRICS_FILE', str(tmp_path / 'metrics.jsonl'))
+        
+        assert alert_on_quality_issues(ti=FakeTaskInstance({})) == [
+            'Quality validation produced no results (validate_quality did not succeed)'
+        ]
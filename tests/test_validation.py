@@ -0,0 +1,59 @@
+"""
+Unit tests for the generated post-transformation validations.
+"""
+
+import json
+
+from ecommerce_dq.validation import BUSINESS_CHECKS, quality_checks, referential_integrity_checks
+
+
+def write_schema(tmp_path, schema: dict) -> str:
+    path = tmp_path / 'raw_schema.json'
+    path.write_text(json.dumps(schema))
+    return str(path)
+
+
+def feed(name, columns, staging_model=None):
+    spec = {'table_name': name, 'columns': columns}
+    if staging_model:
+        spec['staging_model'] = staging_model
+    return spec
+
+
+class TestReferentialIntegrityChecks:
+    """Test the orphan checks generated from the raw schema's foreign keys."""
+    
+    def test_checks_from_raw_schema(self):
+        """Orders and events reference customers, on the staging models."""
+        checks = referential_integrity_checks()
+        
+        assert sorted(checks) == ['events_referential_integrity', 'orders_referential_integrity']
+        assert 'FROM staging.stg_orders c' in checks['orders_referential_integrity']
+        assert 'FROM staging.stg_customers p' in checks['orders_referential_integrity']
+    
+    def test_feeds_without_staging_model_skipped(self, tmp_path):
+        """Only feeds whose child and parent both have a staging model are validated."""
+        path = write_schema(tmp_path, {
+            'customers': feed('customers', [{'name': 'customer_id', 'primary_key': True}], 'stg_customers'),
+            'returns': feed('returns', [{'name': 'customer_id', 'foreign_key': 'customers.customer_id'}]),
+        })
+        
+        assert referential_integrity_checks(path) == {}
+    
+    def test_one_check_per_foreign_key(self, tmp_path):
+        """A feed with several foreign keys gets one check per key column."""
+        path = write_schema(tmp_path, {
+            'customers': feed('customers', [{'name': 'customer_id', 'primary_key': True}], 'stg_customers'),
+            'orders': feed('orders', [{'name': 'order_id', 'primary_key': True}], 'stg_orders'),
+            'returns': feed('returns', [
+                {'name': 'customer_id', 'foreign_key': 'customers.customer_id'},
+                {'name': 'order_id', 'foreign_key': 'orders.order_id'},
+            ], 'stg_returns'),
+        })
+        
+        assert sorted(referential_integrity_checks(path)) == [
+            'returns_customer_id_referential_integrity', 'returns_order_id_referential_integrity',
+        ]
+    
+    def test_quality_checks_include_business_checks(self):
+        assert set(BUSINESS_CHECKS) < set(quality_checks())
@@ -0,0 +1,154 @@
+"""
+Unit tests for the pluggable warehouse backend.
+"""
+
+import os
+import subprocess
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ecommerce_dq.warehouse import (
+    DuckDBHook,
+    dbt_target,
+    get_hook,
+    init_schemas,
+    locked_command,
+    table_row_counts,
+    warehouse_backend,
+    write_dataframe,
+)
+
+
+@pytest.fixture
+def duckdb_backend(tmp_path, monkeypatch):
+    """Select the DuckDB backend on a fresh warehouse file."""
+    path = str(tmp_path / 'local' / 'warehouse.duckdb')
+    monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'duckdb')
+    monkeypatch.setenv('DQ_DUCKDB_PATH', path)
+    return path
+
+
+class TestBackendSelection:
+    """Test backend configuration."""
+    
+    def test_defaults_to_snowflake(self, monkeypatch):
+        """Without configuration the pipeline targets Snowflake and the dev profile."""
+        monkeypatch.delenv('DQ_WAREHOUSE_BACKEND', raising=False)
+        
+        assert warehouse_backend() == 'snowflake'
+        assert dbt_target() == 'dev'
+    
+    def test_duckdb_backend(self, duckdb_backend):
+        """The DuckDB backend returns a hook on DQ_DUCKDB_PATH and the local dbt target."""
+        hook = get_hook()
+        
+        assert isinstance(hook, DuckDBHook)
+        assert hook.path == duckdb_backend
+        assert dbt_target() == 'local'
+    
+    def test_unknown_backend(self, monkeypatch):
+        """A typo in the backend name fails loudly."""
+        monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'bigquery')
+        
+        with pytest.raises(ValueError):
+            warehouse_backend()
+
+
+class TestDuckDBBackend:
+    """Test the embedded DuckDB warehouse."""
+    
+    def test_init_schemas(self, duckdb_backend):
+        """All pipeline schemas are created, and re-running is harmless."""
+        init_schemas()
+        init_schemas()
+        
+        schemas = {row[0] for row in get_hook().get_records(
+            "SELECT schema_name FROM information_schema.schemata"
+        )}
+        assert {'raw', 'staging', 'quarantine', 'intermediate', 'mart'} <= schemas
+    
+    def test_write_dataframe_loads_nan_as_null(self, duckdb_backend):
+        """Like write_pandas, NaN amounts arrive as NULL in the VARCHAR raw table."""
+        init_schemas()
+        hook = get_hook()
+        hook.run("CREATE TABLE raw.orders (order_id VARCHAR, total_amount VARCHAR)")
+        
+        df = pd.DataFrame({'total_amount': [10.5, np.nan], 'order_id': ['O1', 'O2']})
+        conn = hook.get_conn()
+        try:
+            assert write_dataframe(conn, df, 'raw.orders') == 2
+        finally:
+            conn.close()
+        
+        assert hook.get_first("SELECT COUNT(*), COUNT(total_amount) FROM raw.orders") == (2, 1)
+    
+    def test_connections_take_turns(self, duckdb_backend):
+        """A second connection (e.g. a parallel ingest partition) waits for the first to close."""
+        hook = get_hook()
+        first = hook.get_conn()
+        opened = threading.Event()
+        
+        def open_second():
+            hook.get_conn().close()
+            opened.set()
+        
+        thread = threading.Thread(target=open_second)
+        thread.start()
+        assert not opened.wait(0.2)
+        first.close()
+        thread.join(timeout=5)
+        assert opened.is_set()
+    
+    def test_locked_command_takes_turns(self, duckdb_backend, tmp_path):
+        """A locked command (dbt) waits for open connections, as connections wait for it."""
+        marker = str(tmp_path / 'ran')
+        first = get_hook().get_conn()
+        
+        process = subprocess.Popen(['bash', '-c', locked_command(f"touch '{marker}'")])
+        with pytest.raises(subprocess.TimeoutExpired):
+            process.wait(0.3)
+        first.close()
+        
+        assert process.wait(5) == 0
+        assert os.path.exists(marker)
+    
+    def test_locked_command_unchanged_on_snowflake(self, monkeypatch):
+        monkeypatch.setenv('DQ_WAREHOUSE_BACKEND', 'snowflake')
+        assert locked_command('dbt run') == 'dbt run'
+    
+    def test_portable_check_sql(self, duckdb_backend):
+        """Quality-check SQL written for Snowflake runs unchanged, with 64-bit ratios."""
+        from ecommerce_dq.circuit_breaker import evaluate_checks, gate_checks
+        
+        init_schemas()
+        hook = get_hook()
+        hook.run("""
+            CREATE TABLE raw.customers AS SELECT * FROM (VALUES ('C1', 'a@x.com'), ('C2', NULL)) t(customer_id, email);
+            CREATE TABLE raw.orders AS
+                SELECT * FROM (VALUES ('O1', 'C1', '2025-01-01 10:00:00')) t(order_id, customer_id, order_date);
+            CREATE TABLE raw.events AS
+                SELECT * FROM (VALUES ('E1', 'C1', '2025-01-01 10:00:00')) t(event_id, customer_id, event_timestamp);
+        """)
+        
+        results = evaluate_checks(lambda sql: hook.get_first(sql)[0], gate_checks('raw'))
+        
+        by_name = {r['name']: r['value'] for r in results}
+        assert by_name['raw_customers_null_email_rate'] == 0.5
+        assert by_name['raw_orders_null_customer_id_rate'] == 0.0
+        assert by_name['raw_orders_freshness_hours'] > 24
+    
+    def test_table_row_counts(self, duckdb_backend):
+        """Base tables only: views have no row count."""
+        init_schemas()
+        hook = get_hook()
+        hook.run("""
+            CREATE TABLE raw.orders AS SELECT * FROM range(3) t(i);
+            CREATE VIEW raw.orders_view AS SELECT * FROM raw.orders;
+        """)
+        
+        with hook.get_conn() as conn:
+            assert table_row_counts(conn, 'raw') == {'orders': 3}
+            assert table_row_counts(conn, 'mart') == {}
@@ -0,0 +1,75 @@
+"""
+Unit tests for the compressed XCom backend. Skipped when Airflow is not installed.
+"""
+
+import gzip
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('airflow.models.xcom')
+
+from ecommerce_dq import xcom  # noqa: E402
+from ecommerce_dq.results import QueryResult  # noqa: E402
+from ecommerce_dq.xcom import CompressedXComBackend, is_reference  # noqa: E402
+
+XCOM_IDS = {'key': 'quality_results', 'task_id': 'validate_quality', 'dag_id': 'dag',
+            'run_id': 'manual__2025-10-01T00:00:00+00:00', 'map_index': -1}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(xcom, 'XCOM_STORE', str(tmp_path / 'xcom'))
+    monkeypatch.setattr(xcom, 'OFFLOAD_BYTES', 1024)
+    monkeypatch.setenv('AIRFLOW__CORE__ALLOWED_DESERIALIZATION_CLASSES', r'airflow\..* ecommerce_dq\..*')
+    return tmp_path / 'xcom'
+
+
+def round_trip(value):
+    """Serialize as for the metadata DB row, then read it back as a task would."""
+    row = SimpleNamespace(value=CompressedXComBackend.serialize_value(value, **XCOM_IDS))
+    return row, CompressedXComBackend.deserialize_value(row)
+
+
+class TestCompressedXComBackend:
+    """Test inline values, offloaded payloads and typed results."""
+    
+    def test_small_values_stay_inline(self, store):
+        """Payloads under the threshold are stored in the row as usual."""
+        row, value = round_trip({'passed': True})
+        
+        assert value == {'passed': True}
+        assert not store.exists()
+    
+    def test_large_payloads_are_offloaded_compressed(self, store):
+        """Large payloads go to a compressed file; the row keeps a small reference."""
+        payload = {'sample_rows': [{'order_id': f"ORD{i:08d}", 'status': 'COMPLETED'} for i in range(500)]}
+        
+        row, value = round_trip(payload)
+        
+        assert value == payload
+        assert len(row.value) < 300
+        files = [os.path.join(d, f) for d, _, names in os.walk(store) for f in names]
+        assert len(files) == 1 and files[0].endswith('quality_results--1.json.gz')
+        with open(files[0], 'rb') as f:
+            compressed = f.read()
+        assert len(compressed) < len(gzip.decompress(compressed)) / 5
+    
+    def test_query_results_round_trip(self, store):
+        """Typed results come back as QueryResult objects, inline or offloaded."""
+        results = {f"check_{i}": QueryResult(f"check_{i}", ['total_rows', 'email_completeness'], (1000, 0.97))
+                   for i in range(50)}
+        
+        row, value = round_trip(results)
+        
+        assert value == results
+        assert value['check_3'].email_completeness == 0.97
+    
+    def test_listing_shows_reference(self, store):
+        """The webserver's XCom listing shows the reference instead of fetching the payload."""
+        row, _ = round_trip(list(range(2000)))
+        
+        listed = CompressedXComBackend.orm_deserialize_value(SimpleNamespace(value=row.value))
+        assert 'compressed' in listed and str(store) in listed
+        assert is_reference(xcom.BaseXCom.deserialize_value(row))